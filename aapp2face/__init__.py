@@ -1,3 +1,3 @@
-__version__ = "1.0.1"
+__version__ = "2.0.0"
 
 from aapp2face.lib import *
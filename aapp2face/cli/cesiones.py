@@ -2,15 +2,17 @@
 Módulo para el comando `cesiones`
 """
 
+from itertools import chain
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 import typer
 
 from aapp2face import exceptions
+from aapp2face.lib.batch import BATCH_WORKERS, ResultadoLote, leer_documentos_cesion
 from aapp2face.lib.objects import DatosSolicitante, EstadoCesion, GestionarCesion
 
-from .helpers import err_rprint, rprint
+from .helpers import err_rprint, export_data, rprint, verify_export
 
 app = typer.Typer(help="Gestión de las cesiones de crédito.")
 
@@ -41,6 +43,109 @@ def consultar(
     rprint(f"[field]Comentario:[/field]      {cesion.comentario}")
 
 
+def _leer_numeros_registro(path: Path) -> Iterator[str]:
+    """Lee los números de registro de un archivo, uno por línea."""
+
+    with open(path, encoding="utf-8") as file:
+        for linea in file:
+            if linea.strip():
+                yield linea.strip()
+
+
+def _error_lote(resultado: ResultadoLote) -> dict[str, str]:
+    """Devuelve el código y descripción del error de un resultado."""
+
+    if resultado.correcto:
+        return {"codigo_error": "", "error": ""}
+    return {
+        "codigo_error": getattr(resultado.error, "code", ""),
+        "error": getattr(resultado.error, "msg", str(resultado.error)),
+    }
+
+
+@app.command()
+def estados(
+    ctx: typer.Context,
+    lista: Optional[Path] = typer.Option(
+        None,
+        "--list",
+        "-l",
+        exists=True,
+        dir_okay=False,
+        show_default=False,
+        help="Archivo con los números de registro a consultar, uno por línea.",
+    ),
+    workers: int = typer.Option(
+        BATCH_WORKERS,
+        "--workers",
+        "-w",
+        min=1,
+        help="Número de consultas simultáneas.",
+    ),
+    export: Optional[Path] = typer.Option(
+        None,
+        "--export",
+        "-e",
+        show_default=False,
+        help="Exporta la salida a un archivo CSV.",
+    ),
+    numeros_registro: list[str] = typer.Argument(
+        None,
+        show_default=False,
+        help="Números de registro de las facturas a consultar.",
+    ),
+):
+    """Consulta el estado de la cesión de varias facturas.
+
+    Las facturas se indican como argumentos o en un archivo con un
+    número de registro por línea, y se consultan de forma concurrente.
+    Los errores de cada factura se muestran sin detener la consulta
+    del resto y, al exportar, se incluyen en el archivo.
+    """
+
+    verify_export(export)
+
+    numeros = numeros_registro or []
+    if lista is not None:
+        numeros = chain(numeros, _leer_numeros_registro(lista))
+
+    cesiones = []
+    correctas = errores = 0
+    for resultado in ctx.obj.face_connection.consultar_estado_cesiones(
+        numeros, workers
+    ):
+        cesion: EstadoCesion | None = resultado.resultado
+        fila = {
+            "numero_registro": resultado.peticion,
+            "codigo": cesion.codigo if cesion else "",
+            "comentario": cesion.comentario if cesion else "",
+            **_error_lote(resultado),
+        }
+        if resultado.correcto:
+            correctas += 1
+        else:
+            errores += 1
+            codigo = f" {fila['codigo_error']}" if fila["codigo_error"] else ""
+            err_rprint(
+                f"[error]Error{codigo}:[/error] {fila['error']} ([data]'{resultado.peticion}'[/data])."
+            )
+        if export:
+            cesiones.append(fila)
+        elif cesion is not None:
+            rprint(
+                f"[field]Número registro:[/field] [info]{cesion.numero_registro}[/info]"
+            )
+            rprint(f"[field]Estado:[/field]          {cesion.codigo}")
+            rprint(f"[field]Comentario:[/field]      {cesion.comentario}\n")
+
+    if export and cesiones:
+        export_data(cesiones, export)
+
+    rprint(
+        f"[info]{correctas}[/info] cesiones consultadas y [error]{errores}[/error] errores."
+    )
+
+
 @app.command()
 def documento(
     ctx: typer.Context,
@@ -104,6 +209,119 @@ def documento(
     rprint(f"[field]Mime:[/field]          {documento.mime}")
 
 
+@app.command()
+def documentos(
+    ctx: typer.Context,
+    force: Optional[bool] = typer.Option(
+        False,
+        "--force",
+        "-f",
+        help="Sobrescribe los archivos de los documentos si existen.",
+    ),
+    workers: int = typer.Option(
+        BATCH_WORKERS,
+        "--workers",
+        "-w",
+        min=1,
+        help="Número de documentos obtenidos simultáneamente.",
+    ),
+    export: Optional[Path] = typer.Option(
+        None,
+        "--export",
+        "-e",
+        show_default=False,
+        help="Exporta la salida a un archivo CSV.",
+    ),
+    origen: Path = typer.Argument(
+        ...,
+        exists=True,
+        dir_okay=False,
+        show_default=False,
+        help="Archivo CSV con los documentos a obtener.",
+    ),
+    nif: str = typer.Argument(
+        ...,
+        show_default=False,
+        help="NIF del solicitante.",
+    ),
+    nombre: str = typer.Argument(
+        ...,
+        show_default=False,
+        help="Nombre del solicitante.",
+    ),
+    apellidos: str = typer.Argument(
+        ...,
+        show_default=False,
+        help="Apellidos del solicitante.",
+    ),
+):
+    """Obtiene varios documentos de cesión.
+
+    Los documentos se indican en un archivo CSV, separado por ';', con
+    las columnas csv y repositorio. Se obtienen de forma concurrente y
+    cada uno se guarda en el directorio de descargas en cuanto se
+    recibe.
+    """
+
+    verify_export(export)
+
+    path = Path(ctx.obj.config["App"]["download_dir"])
+    path.mkdir(parents=True, exist_ok=True)
+
+    documentos = []
+    correctos = errores = 0
+    try:
+        for resultado in ctx.obj.face_connection.obtener_documentos_cesion(
+            leer_documentos_cesion(origen),
+            DatosSolicitante(nif, nombre, apellidos),
+            path,
+            force,
+            workers,
+        ):
+            documento = resultado.resultado
+            fila = {
+                "csv": resultado.peticion.csv,
+                "repositorio": resultado.peticion.repositorio,
+                "numero_registro": documento.numero_registro if documento else "",
+                "nombre": documento.nombre if documento else "",
+                "mime": documento.mime if documento else "",
+                **_error_lote(resultado),
+            }
+            if resultado.correcto:
+                correctos += 1
+            elif isinstance(resultado.error, FileExistsError):
+                errores += 1
+                archivo = Path(resultado.error.filename).name
+                fila["error"] = "El archivo ya existe"
+                err_rprint(
+                    f"[warning]Aviso:[/warning] El archivo [data]{archivo}[/data] ya existe, no será sobrescrito ([data]'{resultado.peticion.csv}'[/data])."
+                )
+            else:
+                errores += 1
+                codigo = f" {fila['codigo_error']}" if fila["codigo_error"] else ""
+                err_rprint(
+                    f"[error]Error{codigo}:[/error] {fila['error']} ([data]'{resultado.peticion.csv}'[/data])."
+                )
+            if export:
+                documentos.append(fila)
+            elif documento is not None:
+                rprint(
+                    f"[field]Núm. Registro:[/field] [info]{documento.numero_registro}[/info]"
+                )
+                rprint(f"[field]Archivo:[/field]       {documento.nombre}")
+                rprint(f"[field]Mime:[/field]          {documento.mime}\n")
+    except ValueError as exc:
+        err_rprint(f"[error]Error:[/error] {exc}.")
+        raise typer.Exit(4)
+    finally:
+        if export and documentos:
+            export_data(documentos, export)
+
+    rprint(
+        f"[info]{correctos}[/info] documentos obtenidos y [error]{errores}[/error] errores."
+    )
+
+
 @app.command()
 def gestionar(
     ctx: typer.Context,
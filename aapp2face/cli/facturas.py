@@ -3,12 +3,26 @@ Módulo para el comando `facturas`
 """
 
 import dataclasses
+import sqlite3
+from contextlib import nullcontext
+from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 import typer
+from rich.markup import escape
 
 from aapp2face import exceptions
+from aapp2face.lib.batch import (
+    BATCH_WORKERS,
+    leer_directorio,
+    leer_manifiesto,
+    notificar_facturas,
+    notificar_facturas_no_electronicas,
+    validar_facturas_no_electronicas,
+)
+from aapp2face.lib.index import INDEX_DB_FILENAME, InvoiceIndex
+from aapp2face.lib.journal import DownloadJournal
 from aapp2face.lib.objects import (
     CambiarEstadoFactura,
     ConfirmaDescargaFactura,
@@ -16,8 +30,10 @@ from aapp2face.lib.objects import (
     NuevaFactura,
     PeticionCambiarEstadoFactura,
 )
+from aapp2face.lib.retry import RetryPolicy
+from aapp2face.lib.validation import FacturaeValidator
 
-from .helpers import err_rprint, export_data, rprint, verify_export
+from .helpers import err_rprint, export_data, export_results, rprint, verify_export
 
 app = typer.Typer(help="Gestión de facturas.")
 
@@ -45,6 +61,52 @@ def obtener_facturas_nuevas(
     return facturas
 
 
+def obtener_facturas_nuevas_identidades(
+    ctx: typer.Context, oficina_contable: str = ""
+) -> list[NuevaFactura]:
+    """Devuelve las facturas nuevas registradas en FACe para todas las
+    identidades de la configuración.
+
+    Parameters
+    ----------
+    ctx : typer.Context
+        Contexto que contiene el conjunto de conexiones a FACe
+    oficina_contable : str, optional
+        Código DIR3 de la Oficina Contable. Si se pasa, se consulta solo
+        con la identidad que la gestiona.
+    """
+
+    pool = ctx.obj.face_pool
+    if pool is None:
+        err_rprint(
+            "[error]Error:[/error] No hay identidades en la configuración ([data]X509.<nombre>[/data])."
+        )
+        raise typer.Exit(4)
+
+    if oficina_contable:
+        try:
+            return pool.llamar_oficina(
+                oficina_contable, "solicitar_nuevas_facturas", oficina_contable
+            )
+        except exceptions.FACeManagementException as exc:
+            err_rprint(f"[error]Error {exc.code}:[/error] {exc.msg}.")
+            raise typer.Exit(4)
+        except exceptions.UnknownIdentityError as exc:
+            err_rprint(f"[error]Error:[/error] {exc}.")
+            raise typer.Exit(4)
+
+    facturas = []
+    for resultado in pool.en_todas("solicitar_nuevas_facturas", ""):
+        if resultado.correcto:
+            facturas.extend(resultado.resultado)
+        else:
+            err_rprint(
+                f"[error]Error:[/error] {resultado.error} ([data]'{resultado.peticion}'[/data]).\n"
+            )
+
+    return facturas
+
+
 @app.command()
 def nuevas(
     ctx: typer.Context,
@@ -55,6 +117,12 @@ def nuevas(
         show_default=False,
         help="Exporta la salida a un archivo CSV.",
     ),
+    all_identities: Optional[bool] = typer.Option(
+        False,
+        "--all-identities",
+        "-a",
+        help="Consulta a la vez con todas las identidades de la configuración.",
+    ),
     oficina_contable: Optional[str] = typer.Argument(
         "", help="Código DIR3 de la Oficina Contable."
     ),
@@ -68,11 +136,18 @@ def nuevas(
     El resultado está limitado por el servicio de FACe a un máximo de
     500 facturas. Se deben procesar las facturas para que entren el
     resto de facturas encoladas.
+
+    Con la opción `--all-identities` se consulta con el certificado de
+    cada sección `[X509.<nombre>]` de la configuración, a la vez. Si se
+    indica una Oficina Contable, solo con la identidad que la gestiona.
     """
 
     verify_export(export)
 
-    facturas = obtener_facturas_nuevas(ctx, oficina_contable)
+    if all_identities:
+        facturas = obtener_facturas_nuevas_identidades(ctx, oficina_contable)
+    else:
+        facturas = obtener_facturas_nuevas(ctx, oficina_contable)
 
     if export:
         data = [dataclasses.asdict(factura) for factura in facturas]
@@ -106,6 +181,12 @@ def descargar(
         show_default=False,
         help="Exporta la salida a un archivo CSV.",
     ),
+    validate: Optional[bool] = typer.Option(
+        False,
+        "--validate",
+        "-V",
+        help="Valida el esquema y la firma de las facturas descargadas.",
+    ),
     numeros_registro: list[str] = typer.Argument(
         None,
         show_default=False,
@@ -123,68 +204,309 @@ def descargar(
     número de registro de esta y en él se descargarán tanto el archivo
     de la factura como los archivos de los correspondientes anexos si
     los tuviera.
+
+    Con la opción `--validate` las facturas se validan en segundo plano
+    contra el esquema de su versión de Facturae y se verifica su firma,
+    mientras continúa la descarga.
     """
 
     verify_export(export)
 
-    if not numeros_registro:
-        facturas_nuevas = obtener_facturas_nuevas(ctx)
-        numeros_registro = [factura.numero_registro for factura in facturas_nuevas]
-
-    path = Path(ctx.obj.config["App"]["download_dir"])
-    facturas = []
-    for numero_registro in numeros_registro:
-        try:
-            # Descargar factura
-            factura_en_proceso = ctx.obj.face_connection.descargar_factura(
-                numero_registro
+    validator = None
+    if validate:
+        schema_dir = ctx.obj.config["Validation"]["schema_dir"]
+        if not schema_dir:
+            err_rprint(
+                "[error]Error:[/error] No se ha configurado el directorio de esquemas de Facturae ([data]schema_dir[/data])."
             )
+            raise typer.Exit(4)
+        validator = FacturaeValidator(
+            Path(schema_dir),
+            ctx.obj.config.getboolean("Validation", "verify_signature"),
+            ctx.obj.config.getint("Validation", "workers") or None,
+        )
 
-            # Guardar factura
-            path.joinpath(numero_registro).mkdir(parents=True, exist_ok=True)
-            try:
-                factura_en_proceso.guardar(path.joinpath(numero_registro), force)
-            except FileExistsError:
-                err_rprint(
-                    f"[warning]Aviso:[/warning] El archivo [data]{factura_en_proceso.nombre}[/data] ya existe, no será sobrescrito.\n"
+    # El validador finaliza sus procesos también si la descarga falla
+    with validator if validator is not None else nullcontext():
+        # Datos de las facturas nuevas usados para organizar las descargas
+        nuevas = {}
+        clasificacion = {}
+        if not numeros_registro:
+            facturas_nuevas = obtener_facturas_nuevas(ctx)
+            numeros_registro = [factura.numero_registro for factura in facturas_nuevas]
+            nuevas = {factura.numero_registro: factura for factura in facturas_nuevas}
+            clasificacion = {
+                factura.numero_registro: {
+                    "oficina_contable": factura.oficina_contable,
+                    "fecha_registro": factura.fecha_hora_registro,
+                }
+                for factura in facturas_nuevas
+            }
+
+        store = ctx.obj.download_store
+        journal = None
+        if ctx.obj.config.getboolean("Storage", "journal") and not force:
+            journal = DownloadJournal(store.path, store)
+        indice = None
+        if ctx.obj.config.getboolean("Storage", "index"):
+            indice = InvoiceIndex(store.path.joinpath(INDEX_DB_FILENAME))
+        sync_batch = ctx.obj.config.getint("Storage", "sync_batch")
+        sin_anotar: list[tuple] = []
+
+        def confirmar_lote():
+            # Los archivos se sincronizan antes de anotar su descarga
+            store.sync()
+            if journal is not None and sin_anotar:
+                for anotacion in sin_anotar:
+                    journal.fin(*anotacion, sync=False)
+                journal.sync()
+            sin_anotar.clear()
+            if indice is not None:
+                indice.commit()
+
+        facturas = []
+        omitidas = 0
+        # Cualquier error que interrumpa la descarga deja anotadas las
+        # facturas ya guardadas y cerrados el diario y el índice
+        try:
+            for numero_registro in numeros_registro:
+                # Omitir facturas ya descargadas en ejecuciones anteriores
+                if journal is not None and journal.completada(numero_registro):
+                    facturas.append(journal.datos(numero_registro))
+                    omitidas += 1
+                    continue
+
+                # Los archivos de una descarga interrumpida pueden estar
+                # incompletos y los de una completada que no ha superado la
+                # comprobación anterior, dañados o eliminados
+                sobrescribir = force or (
+                    journal is not None and journal.anotada(numero_registro)
                 )
-
-            # Guardar anexos
-            for anexo in factura_en_proceso.anexos:
                 try:
-                    anexo.guardar(path.joinpath(numero_registro), force)
-                except FileExistsError:
+                    # Descargar factura
+                    factura_en_proceso = ctx.obj.face_connection.descargar_factura(
+                        numero_registro
+                    )
+                    if validator is not None:
+                        validator.enviar(numero_registro, factura_en_proceso.factura)
+                    if journal is not None:
+                        journal.inicio(numero_registro)
+                    archivos = []
+                    completa = True
+
+                    # Guardar factura
+                    try:
+                        archivos.append(
+                            store.guardar(
+                                numero_registro,
+                                factura_en_proceso.nombre,
+                                factura_en_proceso.factura,
+                                sobrescribir,
+                                **clasificacion.get(numero_registro, {}),
+                            )
+                        )
+                    except FileExistsError:
+                        completa = False
+                        err_rprint(
+                            f"[warning]Aviso:[/warning] El archivo [data]{factura_en_proceso.nombre}[/data] ya existe, no será sobrescrito.\n"
+                        )
+
+                    # Guardar anexos
+                    for anexo in factura_en_proceso.anexos:
+                        try:
+                            archivos.append(
+                                store.guardar(
+                                    numero_registro,
+                                    anexo.nombre,
+                                    anexo.anexo,
+                                    sobrescribir,
+                                    **clasificacion.get(numero_registro, {}),
+                                )
+                            )
+                        except FileExistsError:
+                            completa = False
+                            err_rprint(
+                                f"[warning]Aviso:[/warning] El archivo [data]{anexo.nombre}[/data] ya existe, no será sobrescrito.\n"
+                            )
+
+                    # Añadir a lista de facturas descargas
+                    dict_factura = {}
+                    dict_factura["numero_registro"] = numero_registro
+                    dict_factura.update(dataclasses.asdict(factura_en_proceso))
+                    lista_anexos = [anexo["nombre"] for anexo in dict_factura["anexos"]]
+                    dict_factura["lista_anexos"] = ", ".join(lista_anexos)
+                    facturas.append(dict_factura)
+
+                    # Indexar factura
+                    if indice is not None:
+                        indice.indexar(
+                            numero_registro,
+                            factura_en_proceso,
+                            nuevas.get(numero_registro),
+                        )
+
+                    # Anotar la descarga si todos los archivos se han guardado
+                    if journal is not None and completa:
+                        datos = {
+                            clave: valor
+                            for clave, valor in dict_factura.items()
+                            if clave not in ("factura", "mime", "anexos")
+                        }
+                        sin_anotar.append((numero_registro, archivos, datos))
+                        if len(sin_anotar) >= sync_batch:
+                            confirmar_lote()
+                except (
+                    exceptions.FACeManagementException,
+                    exceptions.UndefinedError,
+                ) as exc:
+                    err_rprint(
+                        f"[error]Error {exc.code}:[/error] {exc.msg} ([data]'{numero_registro}'[/data]).\n"
+                    )
+                except exceptions.CircuitOpenError as exc:
                     err_rprint(
-                        f"[warning]Aviso:[/warning] El archivo [data]{anexo.nombre}[/data] ya existe, no será sobrescrito.\n"
+                        f"[error]Error:[/error] {exc} ([data]'{numero_registro}'[/data]).\n"
                     )
+        finally:
+            confirmar_lote()
+            if journal is not None:
+                journal.close()
+            if indice is not None:
+                indice.close()
+
+        if export:
+            export_data(facturas, export, ["factura", "mime", "anexos"])
+        else:
+            for factura in facturas:
+                rprint(
+                    f"[field]Núm. Registro:[/field] [info]{factura['numero_registro']}[/info]"
+                )
+                rprint(f"[field]Núm. Factura:[/field]  {factura['numero']}")
+                rprint(f"[field]Serie:[/field]         {factura['serie']}")
+                rprint(f"[field]Importe:[/field]       {factura['importe']}")
+                rprint(f"[field]Proveedor:[/field]     {factura['proveedor']}")
+                rprint(f"[field]Archivo:[/field]       {factura['nombre']}")
+                rprint(f"[field]Anexos:[/field]        {factura['lista_anexos']}\n")
+
+        rprint(f"[info]{len(facturas) - omitidas}[/info] facturas descargadas")
+        if omitidas:
+            rprint(f"[info]{omitidas}[/info] facturas ya descargadas anteriormente")
+
+        if validator is not None:
+            no_validas = 0
+            for resultado in validator.resultados():
+                if resultado.valida:
+                    continue
+                no_validas += 1
+                for error in resultado.errores:
+                    err_rprint(
+                        f"[warning]Aviso:[/warning] Factura no válida ([data]'{resultado.numero_registro}'[/data]): {escape(error)}"
+                    )
+            rprint(f"[info]{no_validas}[/info] facturas no superan la validación")
 
-            # Añadir a lista de facturas descargas
-            dict_factura = {}
-            dict_factura["numero_registro"] = numero_registro
-            dict_factura.update(dataclasses.asdict(factura_en_proceso))
-            lista_anexos = [anexo["nombre"] for anexo in dict_factura["anexos"]]
-            dict_factura["lista_anexos"] = ", ".join(lista_anexos)
-            facturas.append(dict_factura)
-        except exceptions.FACeManagementException as exc:
-            err_rprint(
-                f"[error]Error {exc.code}:[/error] {exc.msg} ([data]'{numero_registro}'[/data]).\n"
-            )
+
+@app.command()
+def buscar(
+    ctx: typer.Context,
+    proveedor: Optional[str] = typer.Option(
+        None,
+        "--proveedor",
+        "-p",
+        show_default=False,
+        help="NIF del proveedor o parte de su nombre.",
+    ),
+    numero: Optional[str] = typer.Option(
+        None,
+        "--numero",
+        "-n",
+        show_default=False,
+        help="Número de la factura.",
+    ),
+    oficina_contable: Optional[str] = typer.Option(
+        None,
+        "--oficina-contable",
+        "-o",
+        show_default=False,
+        help="Código DIR3 de la Oficina Contable.",
+    ),
+    desde: Optional[datetime] = typer.Option(
+        None,
+        "--desde",
+        formats=["%Y-%m-%d"],
+        show_default=False,
+        help="Fecha de expedición mínima.",
+    ),
+    hasta: Optional[datetime] = typer.Option(
+        None,
+        "--hasta",
+        formats=["%Y-%m-%d"],
+        show_default=False,
+        help="Fecha de expedición máxima.",
+    ),
+    export: Optional[Path] = typer.Option(
+        None,
+        "--export",
+        "-e",
+        show_default=False,
+        help="Exporta la salida a un archivo CSV.",
+    ),
+    texto: Optional[str] = typer.Argument(
+        None,
+        show_default=False,
+        help="Texto a buscar en el número, serie o proveedor de las facturas.",
+    ),
+):
+    """Busca facturas descargadas.
+
+    Busca en el índice local de facturas descargadas, sin consultar a
+    FACe, las facturas que cumplen todos los criterios indicados. El
+    índice se actualiza con cada descarga si la opción `index` de la
+    sección `[Storage]` de la configuración está activa.
+    """
+
+    verify_export(export)
+
+    path = ctx.obj.download_store.path.joinpath(INDEX_DB_FILENAME)
+    if not path.exists():
+        err_rprint(
+            f"[error]Error:[/error] No existe el índice de facturas descargadas ([data]{path}[/data])."
+        )
+        raise typer.Exit(4)
+
+    indice = InvoiceIndex(path)
+    try:
+        facturas = indice.buscar(
+            texto,
+            proveedor,
+            numero,
+            oficina_contable,
+            desde.date().isoformat() if desde else None,
+            hasta.date().isoformat() if hasta else None,
+        )
+    except sqlite3.OperationalError as exc:
+        err_rprint(f"[error]Error:[/error] Búsqueda no válida: {exc}.")
+        raise typer.Exit(4)
+    finally:
+        indice.close()
 
     if export:
-        export_data(facturas, export, ["factura", "mime", "anexos"])
+        if facturas:
+            export_data(facturas, export)
     else:
         for factura in facturas:
             rprint(
-                f"[field]Núm. Registro:[/field] [info]{factura['numero_registro']}[/info]"
+                f"[field]Núm. Registro:[/field]  [info]{factura['numero_registro']}[/info]"
+            )
+            rprint(f"[field]Núm. Factura:[/field]   {factura['numero']}")
+            rprint(f"[field]Serie:[/field]          {factura['serie']}")
+            rprint(f"[field]Importe:[/field]        {factura['importe']}")
+            rprint(
+                f"[field]Proveedor:[/field]      {factura['proveedor']} {factura['nombre_proveedor'] or ''}"
             )
-            rprint(f"[field]Núm. Factura:[/field]  {factura['numero']}")
-            rprint(f"[field]Serie:[/field]         {factura['serie']}")
-            rprint(f"[field]Importe:[/field]       {factura['importe']}")
-            rprint(f"[field]Proveedor:[/field]     {factura['proveedor']}")
-            rprint(f"[field]Archivo:[/field]       {factura['nombre']}")
-            rprint(f"[field]Anexos:[/field]        {factura['lista_anexos']}\n")
+            rprint(f"[field]Fecha expedición:[/field] {factura['fecha_expedicion']}")
+            rprint(f"[field]Oficina contable:[/field] {factura['oficina_contable']}")
+            rprint(f"[field]Archivo:[/field]        {factura['nombre']}\n")
 
-    rprint(f"[info]{len(facturas)}[/info] facturas descargadas")
+    rprint(f"[info]{len(facturas)}[/info] facturas encontradas")
 
 
 @app.command()
@@ -325,12 +647,16 @@ def estado(
         )
         peticiones.append(peticion)
 
-    confirmaciones: CambiarEstadoFactura = (
-        ctx.obj.face_connection.cambiar_estado_listado_facturas(peticiones)
+    # Los cambios se muestran según se aplica cada lote, de modo que si
+    # falla un lote quedan informados los cambios ya aplicados en FACe
+    confirmaciones = ctx.obj.face_connection.iter_cambiar_estado_listado_facturas(
+        peticiones
     )
 
+    total = 0
     errors = 0
     for confirmacion in confirmaciones:
+        total += 1
         if isinstance(confirmacion, CambiarEstadoFactura):
             rprint(
                 f"[field]Número de registro:[/field] [info]{confirmacion.numero_registro}[/info]"
@@ -344,7 +670,7 @@ def estado(
             errors += 1
         print()
     rprint(
-        f"[info]{len(confirmaciones)-errors}[/info] cambios correctos y [error]{errors}[/error] errores."
+        f"[info]{total-errors}[/info] cambios correctos y [error]{errors}[/error] errores."
     )
 
 
@@ -402,3 +728,181 @@ def crcf(
         raise typer.Exit(4)
 
     rprint(f"[field]Código RCF:[/field] {rcf}")
+
+
+@app.command()
+def notificar(
+    ctx: typer.Context,
+    results: Path = typer.Option(
+        ...,
+        "--results",
+        "-r",
+        show_default=False,
+        help="Archivo CSV donde se guardará el resultado de cada notificación.",
+    ),
+    workers: int = typer.Option(
+        BATCH_WORKERS,
+        "--workers",
+        "-w",
+        min=1,
+        help="Número de notificaciones simultáneas.",
+    ),
+    organo_gestor: str = typer.Option(
+        "", "--organo-gestor", help="Código DIR3 del Órgano Gestor."
+    ),
+    unidad_tramitadora: str = typer.Option(
+        "", "--unidad-tramitadora", help="Código DIR3 de la Unidad Tramitadora."
+    ),
+    oficina_contable: str = typer.Option(
+        "", "--oficina-contable", help="Código DIR3 de la Oficina Contable."
+    ),
+    estado: str = typer.Option(
+        "", "--estado", help="Código del estado de las facturas."
+    ),
+    origen: Path = typer.Argument(
+        ...,
+        exists=True,
+        show_default=False,
+        help="Manifiesto CSV o directorio con las facturas a notificar.",
+    ),
+):
+    """Notifica facturas recibidas en otro PGEFe.
+
+    Las facturas a notificar se indican mediante un manifiesto CSV,
+    separado por ';', con las columnas numero_registro, fecha_registro,
+    path_factura, organo_gestor, unidad_tramitadora, oficina_contable,
+    codigo_rcf y estado, o mediante un directorio con los archivos de
+    factura. En este último caso se usa el nombre de cada archivo como
+    número de registro y código RCF, su fecha de modificación como
+    fecha de registro, y deben indicarse las unidades DIR3 y el estado
+    mediante opciones.
+
+    Antes de enviar ninguna factura se comprueba el manifiesto completo
+    y, si alguna fila es errónea, no se notifica ninguna. El número y
+    fecha de registro en FACe de cada factura, o el error producido al
+    notificarla, se guardan en el archivo de resultados.
+    """
+
+    verify_export(results)
+
+    if origen.is_dir():
+        opciones = {
+            "--organo-gestor": organo_gestor,
+            "--unidad-tramitadora": unidad_tramitadora,
+            "--oficina-contable": oficina_contable,
+            "--estado": estado,
+        }
+        for opcion, valor in opciones.items():
+            if not valor:
+                raise typer.BadParameter(
+                    "Obligatorio al notificar un directorio.", param_hint=f"'{opcion}'"
+                )
+        peticiones = leer_directorio(
+            origen, organo_gestor, unidad_tramitadora, oficina_contable, estado
+        )
+    else:
+        try:
+            peticiones = list(leer_manifiesto(origen))
+        except ValueError as exc:
+            err_rprint(f"[error]Error:[/error] {exc}.")
+            raise typer.Exit(4)
+
+    correctas, errores = export_results(
+        notificar_facturas(ctx.obj.face_connection, peticiones, workers), results
+    )
+
+    rprint(
+        f"[info]{correctas}[/info] facturas notificadas y [error]{errores}[/error] errores."
+    )
+
+
+@app.command()
+def cargar(
+    ctx: typer.Context,
+    results: Path = typer.Option(
+        ...,
+        "--results",
+        "-r",
+        show_default=False,
+        help="Archivo CSV donde se guardará el resultado de cada notificación.",
+    ),
+    workers: int = typer.Option(
+        BATCH_WORKERS,
+        "--workers",
+        "-w",
+        min=1,
+        help="Número de notificaciones simultáneas.",
+    ),
+    retry_sent: bool = typer.Option(
+        False,
+        "--retry-sent",
+        help="Reintenta las facturas ante fallos transitorios aunque la petición pudiera haber llegado a FACe.",
+    ),
+    origen: Path = typer.Argument(
+        ...,
+        exists=True,
+        dir_okay=False,
+        show_default=False,
+        help="Archivo CSV o NDJSON con las facturas a cargar.",
+    ),
+):
+    """Carga facturas no electrónicas.
+
+    Notifica a FACe las facturas no electrónicas contenidas en un
+    archivo CSV, separado por ';', o NDJSON (extensión .ndjson o
+    .jsonl). Los datos de emisor, receptor y tercero se indican en el
+    CSV con columnas con el prefijo de la persona (emisor_tipo,
+    emisor_nombre_razon_social, ...) y en NDJSON como objetos anidados.
+
+    Antes de enviar ninguna factura se comprueban todas localmente y,
+    si alguna es errónea, no se carga ninguna. Las facturas se envían
+    agrupadas por Oficina Contable y el número y fecha de registro en
+    FACe de cada una, o el error producido, se guardan en el archivo de
+    resultados.
+    """
+
+    verify_export(results)
+
+    try:
+        grupos, errores = validar_facturas_no_electronicas(origen)
+    except ValueError as exc:
+        err_rprint(f"[error]Error:[/error] {exc}.")
+        raise typer.Exit(4)
+    if errores:
+        for error in errores:
+            err_rprint(f"[error]Error:[/error] {error}.")
+        raise typer.Exit(4)
+
+    retry_policy = None
+    if retry_sent:
+        config = ctx.obj.config
+        retry_policy = RetryPolicy(
+            max_attempts=config.getint("Retry", "max_attempts"),
+            initial_delay=config.getfloat("Retry", "initial_delay"),
+            max_delay=config.getfloat("Retry", "max_delay"),
+        )
+
+    resumen: dict[str, list[int]] = {}
+
+    def contar(resultados):
+        for resultado in resultados:
+            cuenta = resumen.setdefault(resultado.peticion.oficina_contable, [0, 0])
+            cuenta[0 if resultado.correcto else 1] += 1
+            yield resultado
+
+    resultados = notificar_facturas_no_electronicas(
+        ctx.obj.face_connection,
+        (peticion for grupo in grupos.values() for peticion in grupo),
+        workers,
+        retry_policy,
+        idempotent=True if retry_sent else None,
+    )
+    correctas, errores = export_results(contar(resultados), results)
+
+    for oficina_contable, (grupo_correctas, grupo_errores) in resumen.items():
+        rprint(
+            f"[field]Oficina contable:[/field] {oficina_contable}: [info]{grupo_correctas}[/info] correctas y [error]{grupo_errores}[/error] errores"
+        )
+    rprint(
+        f"[info]{correctas}[/info] facturas cargadas y [error]{errores}[/error] errores."
+    )
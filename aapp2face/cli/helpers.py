@@ -5,12 +5,15 @@ Módulo con funciones de apoyo a la CLI
 import csv
 import sys
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 import typer
 from rich.console import Console
 from rich.theme import Theme
 
+from aapp2face.lib.batch import MANIFEST_DELIMITER, RESULT_FIELDS, ResultadoLote
+from aapp2face.lib.profiling import section
+
 custom_theme = Theme(
     {
         "field": "bold blue",
@@ -38,7 +41,8 @@ def rprint(*objects: Any, sep: str = " ", end: str = "\n") -> None:
         Caracter a imprimir al final de la salida. Por defecto "\\n".
     """
 
-    return console.print(*objects, sep=sep, end=end)
+    with section("render"):
+        return console.print(*objects, sep=sep, end=end)
 
 
 def err_rprint(*objects: Any, sep: str = " ", end: str = "\n") -> None:
@@ -54,7 +58,8 @@ def err_rprint(*objects: Any, sep: str = " ", end: str = "\n") -> None:
         Caracter a imprimir al final de la salida. Por defecto "\\n".
     """
 
-    return err_console.print(*objects, sep=sep, end=end)
+    with section("render"):
+        return err_console.print(*objects, sep=sep, end=end)
 
 
 def get_config_path() -> Path:
@@ -113,3 +118,45 @@ def export_data(
         for d in data:
             row = {k: v for k, v in d.items() if k not in exclude_fields}
             writer.writerow(row)
+
+
+def export_results(
+    resultados: Iterable[ResultadoLote], filename: Path
+) -> tuple[int, int]:
+    """Exporta los resultados de un envío masivo según se producen.
+
+    Cada resultado se escribe en el archivo en cuanto está disponible y
+    los errores se muestran además por la consola de errores.
+
+    Parameters
+    ----------
+    resultados : Iterable[ResultadoLote]
+        Resultados del envío.
+    filename : Path
+        Archivo CSV destino de los resultados.
+
+    Returns
+    -------
+    tuple[int, int]
+        número de peticiones correctas y erróneas
+    """
+
+    correctas = errores = 0
+    with open(filename, "x", newline="") as file:
+        writer = csv.DictWriter(
+            file, fieldnames=RESULT_FIELDS, delimiter=MANIFEST_DELIMITER
+        )
+        writer.writeheader()
+        for resultado in resultados:
+            fila = resultado.fila()
+            writer.writerow(fila)
+            if resultado.correcto:
+                correctas += 1
+            else:
+                errores += 1
+                codigo = f" {fila['codigo_error']}" if fila["codigo_error"] else ""
+                err_rprint(
+                    f"[error]Error{codigo}:[/error] {fila['error']} ([data]'{fila['numero_registro']}'[/data])."
+                )
+
+    return correctas, errores
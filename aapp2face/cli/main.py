@@ -2,39 +2,127 @@
 Módulo CLI de AAPP2FACe
 """
 
+import cProfile
 import dataclasses
 import importlib.resources
 import shutil
+import sys
+import time
 from configparser import ConfigParser
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
+import click
 import typer
+from rich.table import Table
+from typer.core import TyperGroup
 
 from aapp2face import (
+    ArchiveStore,
+    CessionDocumentCache,
+    CircuitBreaker,
+    ContentAddressedStore,
+    DirectoryStore,
     FACeConnection,
+    FACeConnectionPool,
     FACeFakeSoapClient,
     FACeSoapClient,
+    FakeDataGenerator,
+    FakeProfile,
+    Metrics,
+    Profiler,
+    RateLimiter,
+    RetryPolicy,
+    SoapLogger,
     __version__,
     exceptions,
 )
+from aapp2face.lib.client import FACeClient
 
 from . import anulaciones, cesiones, facturas
-from .helpers import err_rprint, export_data, get_config_path, rprint, verify_export
+from .helpers import (
+    err_console,
+    err_rprint,
+    export_data,
+    get_config_path,
+    rprint,
+    verify_export,
+)
 
 # Config constants
 CONFIG_FILENAME = "config.ini"
 FACE_URL_PROD = "https://webservice.face.gob.es/facturasrcf2?wsdl"
 FACE_URL_STAGING = "https://se-face-webservice.redsara.es/facturasrcf2?wsdl"
 USE_STAGING = True
+FAST_PARSE = False
 CERT_FILENAME = "./cert.pem"
 KEY_FILENAME = "./key.pem"
 DOWNLOAD_DIR = "./descargas"
+STORAGE_MODE = "directory"
+STORAGE_LAYOUT = "flat"
+STORAGE_HARDLINKS = True
+STORAGE_JOURNAL = False
+STORAGE_INDEX = False
+STORAGE_DURABILITY = "batch"
+STORAGE_SYNC_BATCH = 50
+STORAGE_ARCHIVE_GROUP = "day"
+STORAGE_ARCHIVE_MAX_BYTES = 0
+VALIDATION_SCHEMA_DIR = ""
+VALIDATION_VERIFY_SIGNATURE = True
+VALIDATION_WORKERS = 0
+IDENTITY_MAX_CONCURRENCY = 4
 DEBUG_ENABLED = True
 DEBUG_LOG_DIR = "."
+DEBUG_MAX_BYTES = 10 * 1024 * 1024
+DEBUG_ROTATE_INTERVAL = 0
+DEBUG_BACKUP_COUNT = 5
+DEBUG_COMPRESS = False
+DEBUG_SAMPLE_RATE = 1.0
+DEBUG_ELIDE_THRESHOLD = 1024
+DEBUG_BLOB_DIR = ""
+DEBUG_QUEUE_SIZE = 10000
 FAKE_RESPONSES_DIR = "."
-
-app = typer.Typer(no_args_is_help=True)
+FAKE_PROFILE = ""
+RETRY_MAX_ATTEMPTS = 3
+RETRY_INITIAL_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+RATE_LIMIT_GLOBAL_RATE = 0
+RATE_LIMIT_BURST = 1
+RATE_LIMIT_SHARED_DIR = ""
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RESET_TIMEOUT = 30.0
+METRICS_FILE = ""
+CESSION_CACHE_DIR = ""
+CESSION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class AppGroup(TyperGroup):
+    """Grupo principal de la CLI que anota el nombre completo del
+    comando invocado, incluyendo el subcomando de los grupos, y muestra
+    los errores de FACe no gestionados por el comando."""
+
+    def resolve_command(self, ctx: click.Context, args: list[str]):
+        nombre, comando, resto = super().resolve_command(ctx, args)
+        completo = nombre
+        if isinstance(comando, click.Group) and resto:
+            subcomando = comando.get_command(ctx, resto[0])
+            if subcomando is not None:
+                completo = f"{nombre} {subcomando.name}"
+        ctx.meta["aapp2face.command"] = completo
+        return nombre, comando, resto
+
+    def invoke(self, ctx: click.Context):
+        # Los errores de FACe que no gestiona el propio comando, como los
+        # inyectados por un perfil de simulación, se muestran con el
+        # mismo formato que el resto de errores.
+        try:
+            return super().invoke(ctx)
+        except exceptions.FACeException as exc:
+            err_rprint(f"[error]Error {exc.code}:[/error] {exc.msg}.")
+            raise typer.Exit(4)
+
+
+app = typer.Typer(cls=AppGroup, no_args_is_help=True)
 app.add_typer(facturas.app, name="facturas")
 app.add_typer(anulaciones.app, name="anulaciones")
 app.add_typer(cesiones.app, name="cesiones")
@@ -50,10 +138,14 @@ class AppData:
         config_file: Path,
         config: ConfigParser,
         face_connection: FACeConnection,
+        download_store: DirectoryStore | None = None,
+        face_pool: FACeConnectionPool | None = None,
     ):
         self.face_connection = face_connection
         self.config_file = config_file
         self.config = config
+        self.download_store = download_store
+        self.face_pool = face_pool
 
 
 def get_default_config() -> ConfigParser:
@@ -64,16 +156,58 @@ def get_default_config() -> ConfigParser:
     config["FACe"]["url_prod"] = FACE_URL_PROD
     config["FACe"]["url_staging"] = FACE_URL_STAGING
     config["FACe"]["use_staging"] = str(USE_STAGING)
+    config["FACe"]["fast_parse"] = str(FAST_PARSE)
     config["X509"] = {}
     config["X509"]["cert_file"] = CERT_FILENAME
     config["X509"]["key_file"] = KEY_FILENAME
     config["App"] = {}
     config["App"]["download_dir"] = DOWNLOAD_DIR
+    config["Storage"] = {}
+    config["Storage"]["mode"] = STORAGE_MODE
+    config["Storage"]["layout"] = STORAGE_LAYOUT
+    config["Storage"]["hardlinks"] = str(STORAGE_HARDLINKS)
+    config["Storage"]["journal"] = str(STORAGE_JOURNAL)
+    config["Storage"]["index"] = str(STORAGE_INDEX)
+    config["Storage"]["durability"] = STORAGE_DURABILITY
+    config["Storage"]["sync_batch"] = str(STORAGE_SYNC_BATCH)
+    config["Storage"]["archive_group"] = STORAGE_ARCHIVE_GROUP
+    config["Storage"]["archive_max_bytes"] = str(STORAGE_ARCHIVE_MAX_BYTES)
+    config["Validation"] = {}
+    config["Validation"]["schema_dir"] = VALIDATION_SCHEMA_DIR
+    config["Validation"]["verify_signature"] = str(VALIDATION_VERIFY_SIGNATURE)
+    config["Validation"]["workers"] = str(VALIDATION_WORKERS)
     config["Debug"] = {}
     config["Debug"]["enabled"] = str(DEBUG_ENABLED)
     config["Debug"]["log_dir"] = DEBUG_LOG_DIR
+    config["Debug"]["max_bytes"] = str(DEBUG_MAX_BYTES)
+    config["Debug"]["rotate_interval"] = str(DEBUG_ROTATE_INTERVAL)
+    config["Debug"]["backup_count"] = str(DEBUG_BACKUP_COUNT)
+    config["Debug"]["compress"] = str(DEBUG_COMPRESS)
+    config["Debug"]["sample_rate"] = str(DEBUG_SAMPLE_RATE)
+    config["Debug"]["elide_threshold"] = str(DEBUG_ELIDE_THRESHOLD)
+    config["Debug"]["blob_dir"] = DEBUG_BLOB_DIR
+    config["Debug"]["queue_size"] = str(DEBUG_QUEUE_SIZE)
     config["Fake"] = {}
     config["Fake"]["responses_dir"] = FAKE_RESPONSES_DIR
+    config["Fake"]["profile"] = FAKE_PROFILE
+    config["Retry"] = {}
+    config["Retry"]["max_attempts"] = str(RETRY_MAX_ATTEMPTS)
+    config["Retry"]["initial_delay"] = str(RETRY_INITIAL_DELAY)
+    config["Retry"]["max_delay"] = str(RETRY_MAX_DELAY)
+    config["RateLimit"] = {}
+    config["RateLimit"]["global_rate"] = str(RATE_LIMIT_GLOBAL_RATE)
+    config["RateLimit"]["burst"] = str(RATE_LIMIT_BURST)
+    config["RateLimit"]["shared_dir"] = RATE_LIMIT_SHARED_DIR
+    config["CircuitBreaker"] = {}
+    config["CircuitBreaker"]["failure_threshold"] = str(
+        CIRCUIT_BREAKER_FAILURE_THRESHOLD
+    )
+    config["CircuitBreaker"]["reset_timeout"] = str(CIRCUIT_BREAKER_RESET_TIMEOUT)
+    config["Metrics"] = {}
+    config["Metrics"]["file"] = METRICS_FILE
+    config["CessionCache"] = {}
+    config["CessionCache"]["dir"] = CESSION_CACHE_DIR
+    config["CessionCache"]["max_bytes"] = str(CESSION_CACHE_MAX_BYTES)
 
     return config
 
@@ -238,8 +372,81 @@ def genresp(
         writable=True,
         resolve_path=True,
     ),
+    facturas: int = typer.Option(
+        0,
+        "--facturas",
+        "-n",
+        min=0,
+        help="Genera un juego sintético con el número de facturas indicado.",
+    ),
+    oficinas: int = typer.Option(
+        10, "--oficinas", min=1, help="Número de oficinas contables."
+    ),
+    anexos: int = typer.Option(
+        2, "--anexos", min=0, help="Número máximo de anexos por factura."
+    ),
+    tam_anexo: int = typer.Option(
+        65536, "--tam-anexo", min=0, help="Tamaño en bytes de cada anexo."
+    ),
+    registradas: float = typer.Option(
+        0.5,
+        "--registradas",
+        min=0,
+        max=1,
+        help="Proporción de facturas pendientes de descarga.",
+    ),
+    anulaciones: float = typer.Option(
+        0.05,
+        "--anulaciones",
+        min=0,
+        max=1,
+        help="Proporción de facturas con solicitud de anulación.",
+    ),
+    cesiones: float = typer.Option(
+        0.05,
+        "--cesiones",
+        min=0,
+        max=1,
+        help="Proporción de facturas con cesión de crédito.",
+    ),
+    semilla: Optional[int] = typer.Option(
+        None,
+        "--semilla",
+        show_default=False,
+        help="Semilla para generar juegos sintéticos reproducibles.",
+    ),
 ):
-    """Genera un juego de respuestas de prueba para el modo simulación."""
+    """Genera un juego de respuestas de prueba para el modo simulación.
+
+    Por defecto copia el juego de respuestas de ejemplo. Si se indica un
+    número de facturas, genera en su lugar un juego sintético coherente
+    del volumen indicado.
+    """
+
+    if facturas:
+        generador = FakeDataGenerator(
+            facturas=facturas,
+            oficinas=oficinas,
+            anexos=anexos,
+            tam_anexo=tam_anexo,
+            proporcion_registradas=registradas,
+            proporcion_anulaciones=anulaciones,
+            proporcion_cesiones=cesiones,
+            semilla=semilla,
+        )
+        resumen = generador.generar(dir)
+        rprint(
+            f"[info]{resumen['facturas']}[/info] facturas generadas "
+            f"([info]{resumen['registradas']}[/info] registradas, "
+            f"[info]{resumen['anulaciones']}[/info] anulaciones, "
+            f"[info]{resumen['cesiones']}[/info] cesiones)"
+        )
+        rprint(
+            f"[info]{resumen['archivos']}[/info] archivos, "
+            f"[info]{resumen['bytes']}[/info] bytes"
+        )
+        rprint(f"Juego de respuestas sintético guardado en {dir}")
+        return
 
     origen = importlib.resources.files("aapp2face.cli.resources") / "sim-responses"
     for archivo in origen.glob("*"):
@@ -253,6 +460,192 @@ def genresp(
     rprint(f"Puede encontrar más detalles en {dir}/LEEME.md")
 
 
+def get_rate_limiter(config: ConfigParser) -> RateLimiter | None:
+    """Devuelve el limitador de peticiones configurado.
+
+    Además de las opciones generales, la sección `RateLimit` admite como
+    opción el nombre de cualquier método SOAP de FACe para limitar sus
+    peticiones por segundo de forma individual.
+    """
+
+    section = config["RateLimit"]
+    operation_rates = {
+        option: section.getfloat(option)
+        for option in section
+        if option not in ("global_rate", "burst", "shared_dir")
+    }
+    global_rate = section.getfloat("global_rate")
+    if not global_rate and not any(operation_rates.values()):
+        return None
+
+    shared_dir = None
+    if section["shared_dir"]:
+        shared_dir = Path(section["shared_dir"])
+        shared_dir.mkdir(parents=True, exist_ok=True)
+
+    return RateLimiter(
+        global_rate=global_rate,
+        operation_rates=operation_rates,
+        burst=section.getfloat("burst"),
+        shared_dir=shared_dir,
+    )
+
+
+def get_soap_logger(config: ConfigParser) -> SoapLogger:
+    """Devuelve el registro de peticiones SOAP según la configuración."""
+
+    blob_dir = None
+    if config["Debug"]["blob_dir"]:
+        blob_dir = Path(config["Debug"]["blob_dir"])
+
+    return SoapLogger(
+        Path(config["Debug"]["log_dir"]),
+        max_bytes=config.getint("Debug", "max_bytes"),
+        max_age=config.getfloat("Debug", "rotate_interval"),
+        backup_count=config.getint("Debug", "backup_count"),
+        compress=config.getboolean("Debug", "compress"),
+        sample_rate=config.getfloat("Debug", "sample_rate"),
+        elide_threshold=config.getint("Debug", "elide_threshold"),
+        blob_dir=blob_dir,
+        queue_size=config.getint("Debug", "queue_size"),
+    )
+
+
+def get_download_store(config: ConfigParser) -> DirectoryStore:
+    """Devuelve el almacén de facturas descargadas según la configuración."""
+
+    path = Path(config["App"]["download_dir"])
+    durability = config["Storage"]["durability"]
+    layout = config["Storage"]["layout"]
+    if config["Storage"]["mode"] == "cas":
+        return ContentAddressedStore(
+            path,
+            hardlinks=config.getboolean("Storage", "hardlinks"),
+            durability=durability,
+            layout=layout,
+        )
+    if config["Storage"]["mode"] == "archive":
+        return ArchiveStore(
+            path,
+            group=config["Storage"]["archive_group"],
+            max_bytes=config.getint("Storage", "archive_max_bytes"),
+            durability=durability,
+        )
+    return DirectoryStore(path, durability, layout)
+
+
+def get_cession_cache(config: ConfigParser) -> CessionDocumentCache | None:
+    """Devuelve la caché de documentos de cesión, o None si no se ha
+    configurado su directorio."""
+
+    if not config["CessionCache"]["dir"]:
+        return None
+    return CessionDocumentCache(
+        Path(config["CessionCache"]["dir"]),
+        config.getint("CessionCache", "max_bytes"),
+    )
+
+
+def get_face_pool(
+    config: ConfigParser,
+    create_client: Callable[[str, int], FACeClient],
+    cession_cache: CessionDocumentCache | None = None,
+) -> FACeConnectionPool | None:
+    """Devuelve el conjunto de conexiones con las identidades de las
+    secciones `[X509.<nombre>]` de la configuración, o None si no hay
+    ninguna."""
+
+    secciones = [
+        seccion for seccion in config.sections() if seccion.startswith("X509.")
+    ]
+    if not secciones:
+        return None
+
+    pool = FACeConnectionPool()
+    for seccion in secciones:
+        max_concurrency = config.getint(
+            seccion, "max_concurrency", fallback=IDENTITY_MAX_CONCURRENCY
+        )
+        oficinas = config.get(seccion, "oficinas", fallback="")
+        pool.add(
+            seccion.removeprefix("X509."),
+            FACeConnection(create_client(seccion, max_concurrency), cession_cache),
+            [oficina.strip() for oficina in oficinas.split(",") if oficina.strip()]
+            or None,
+            max_concurrency,
+        )
+    return pool
+
+
+def register_metrics(ctx: typer.Context, metrics: Metrics, path: Path) -> None:
+    """Registra la duración y el resultado del comando invocado y
+    exporta las métricas al terminar."""
+
+    comando = ctx.meta.get("aapp2face.command", ctx.invoked_subcommand or "")
+    inicio = time.perf_counter()
+
+    def export_metrics():
+        exc = sys.exc_info()[1]
+        ok = exc is None or getattr(exc, "exit_code", 1) == 0
+        metrics.record_command(comando, time.perf_counter() - inicio, ok)
+        try:
+            metrics.export(path)
+        except OSError as error:
+            err_rprint(
+                f"[warning]Aviso:[/warning] No se pudieron guardar las métricas en {path}: {error}."
+            )
+
+    ctx.call_on_close(export_metrics)
+
+
+def register_profiler(
+    ctx: typer.Context, profiler: Profiler, dump: Path | None = None
+) -> None:
+    """Activa el perfilado del comando invocado y muestra el resumen de
+    tiempos por fase al terminar."""
+
+    comando = ctx.meta.get("aapp2face.command", ctx.invoked_subcommand or "")
+    cprofile = None
+    if dump:
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    profiler.activate()
+    inicio = time.perf_counter()
+
+    def print_profile():
+        total = time.perf_counter() - inicio
+        profiler.deactivate()
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(dump)
+
+        table = Table(title=f"Perfil de ejecución: {comando}")
+        table.add_column("Fase", style="field")
+        table.add_column("Veces", justify="right")
+        table.add_column("Tiempo (s)", justify="right")
+        table.add_column("%", justify="right")
+        for nombre, (veces, segundos) in profiler.summary().items():
+            porcentaje = 100 * segundos / total if total else 0
+            table.add_row(nombre, str(veces), f"{segundos:.3f}", f"{porcentaje:.1f}")
+        table.add_row("total", "", f"{total:.3f}", "100.0", style="info")
+        err_console.print(table)
+        if cprofile is not None:
+            err_console.print(f"Perfil cProfile guardado en [data]{dump}[/data]")
+
+    ctx.call_on_close(print_profile)
+
+
+def retry_callback(
+    operacion: str, intento: int, exc: BaseException, espera: float
+) -> None:
+    """Callback de aviso de reintento de una operación FACe"""
+
+    err_rprint(
+        f"[warning]Aviso:[/warning] Fallo en {operacion} (intento {intento}): {exc}. "
+        f"Reintentando en {espera:.1f} s."
+    )
+
+
 def version_callback(value: bool):
     """Callback de mostrado de la versión"""
 
@@ -294,6 +687,19 @@ def main(
         resolve_path=True,
         hidden=True,
     ),
+    fake_profile: Optional[Path] = typer.Option(
+        None,
+        "--fake-profile",
+        envvar="AAPP2FACE_FAKE_PROFILE",
+        show_envvar=False,
+        show_default=False,
+        help="Archivo con el perfil de latencia y fallos del modo simulación.",
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        readable=True,
+        hidden=True,
+    ),
     url_prod: Optional[str] = typer.Option(
         None,
         envvar="AAPP2FACE_URL_PROD",
@@ -317,6 +723,15 @@ def main(
         show_default=False,
         help="Fuerza el uso del entorno de pruebas en la peticiones a FACe.",
     ),
+    identity: Optional[str] = typer.Option(
+        None,
+        "--identity",
+        "-i",
+        envvar="AAPP2FACE_IDENTITY",
+        show_envvar=False,
+        show_default=False,
+        help="Usa el certificado de la sección X509.IDENTITY de la configuración.",
+    ),
     cert_file: Optional[Path] = typer.Option(
         None,
         envvar="AAPP2FACE_CERT_FILE",
@@ -352,6 +767,32 @@ def main(
         writable=True,
         resolve_path=True,
     ),
+    metrics_file: Optional[Path] = typer.Option(
+        None,
+        "--metrics-file",
+        envvar="AAPP2FACE_METRICS_FILE",
+        show_envvar=False,
+        show_default=False,
+        help="Archivo donde guardar las métricas de la ejecución (Prometheus o JSON).",
+        dir_okay=False,
+        writable=True,
+        resolve_path=True,
+    ),
+    profile: Optional[bool] = typer.Option(
+        None,
+        "--profile",
+        show_default=False,
+        help="Muestra al terminar el tiempo empleado en cada fase de la ejecución.",
+    ),
+    profile_dump: Optional[Path] = typer.Option(
+        None,
+        "--profile-dump",
+        show_default=False,
+        help="Guarda un perfil cProfile de la ejecución en el archivo indicado.",
+        dir_okay=False,
+        writable=True,
+        resolve_path=True,
+    ),
     version: Optional[bool] = typer.Option(
         None,
         "--version",
@@ -386,6 +827,15 @@ def main(
     if use_staging is not None:
         config["FACe"]["use_staging"] = str(use_staging)
 
+    if identity:
+        if not config.has_section(f"X509.{identity}"):
+            err_rprint(
+                f"[error]Error:[/error] No existe la identidad [data]{identity}[/data] en la configuración."
+            )
+            raise typer.Exit(1)
+        config["X509"]["cert_file"] = config[f"X509.{identity}"]["cert_file"]
+        config["X509"]["key_file"] = config[f"X509.{identity}"]["key_file"]
+
     if cert_file:
         config["X509"]["cert_file"] = str(cert_file)
 
@@ -399,12 +849,77 @@ def main(
         config["Fake"]["responses_dir"] = fake_set
         fake = True
 
+    if fake_profile:
+        config["Fake"]["profile"] = str(fake_profile)
+
+    if metrics_file:
+        config["Metrics"]["file"] = str(metrics_file)
+
+    hooks = []
+    if config["Metrics"]["file"]:
+        metrics = Metrics()
+        register_metrics(ctx, metrics, Path(config["Metrics"]["file"]))
+        hooks.append(metrics)
+
+    if profile or profile_dump:
+        profiler = Profiler()
+        register_profiler(ctx, profiler, profile_dump)
+        hooks.append(profiler)
+
+    retry_policy = RetryPolicy(
+        max_attempts=config.getint("Retry", "max_attempts"),
+        initial_delay=config.getfloat("Retry", "initial_delay"),
+        max_delay=config.getfloat("Retry", "max_delay"),
+        on_retry=retry_callback,
+    )
+    rate_limiter = get_rate_limiter(config)
+    soap_logger = None
+
+    def create_client(section: str, max_connections: int | None = None):
+        # Cada identidad tiene su propio cortocircuito
+        circuit_breaker = None
+        if config.getint("CircuitBreaker", "failure_threshold"):
+            circuit_breaker = CircuitBreaker(
+                failure_threshold=config.getint("CircuitBreaker", "failure_threshold"),
+                reset_timeout=config.getfloat("CircuitBreaker", "reset_timeout"),
+            )
+
+        if fake:
+            profile = None
+            if config["Fake"]["profile"]:
+                profile = FakeProfile.from_file(Path(config["Fake"]["profile"]))
+            return FACeFakeSoapClient(
+                Path(config["Fake"]["responses_dir"]),
+                profile,
+                retry_policy,
+                rate_limiter,
+                circuit_breaker,
+                hooks,
+            )
+
+        nonlocal soap_logger
+        if soap_logger is None:
+            soap_logger = get_soap_logger(config)
+        return FACeSoapClient(
+            url,
+            config[section]["cert_file"],
+            config[section]["key_file"],
+            debug=config.getboolean("Debug", "enabled"),
+            log_path=config["Debug"]["log_dir"],
+            retry_policy=retry_policy,
+            rate_limiter=rate_limiter,
+            circuit_breaker=circuit_breaker,
+            soap_logger=soap_logger,
+            hooks=hooks,
+            fast_parse=config.getboolean("FACe", "fast_parse"),
+            max_connections=max_connections,
+        )
+
     if fake:
         if not ctx.invoked_subcommand in NEUTRAL_COMMANDS:
             err_rprint(
                 f"[warning]Aviso:[/warning] Usando entorno de simulación. Algunos parámetros de configuración serán ignorados."
             )
-        client = FACeFakeSoapClient(Path(config["Fake"]["responses_dir"]))
     else:
         if config.getboolean("FACe", "use_staging"):
             url = config["FACe"]["url_staging"]
@@ -415,15 +930,14 @@ def main(
         else:
             url = config["FACe"]["url_prod"]
 
-        client = FACeSoapClient(
-            url,
-            config["X509"]["cert_file"],
-            config["X509"]["key_file"],
-            debug=config["Debug"]["enabled"],
-            log_path=config["Debug"]["log_dir"],
-        )
-
-    ctx.obj = AppData(config_file, config, FACeConnection(client))
+    cession_cache = get_cession_cache(config)
+    ctx.obj = AppData(
+        config_file,
+        config,
+        FACeConnection(create_client("X509"), cession_cache),
+        get_download_store(config),
+        get_face_pool(config, create_client, cession_cache),
+    )
 
 
 if __name__ == "__main__":
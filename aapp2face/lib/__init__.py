@@ -1,4 +1,16 @@
 from . import exceptions, objects
+from .cache import CessionDocumentCache
+from .fakedata import FakeDataGenerator
+from .fakeprofile import FakeProfile
 from .fakesoap import FACeFakeSoapClient
+from .hooks import CallInfo, ClientHook
 from .main import FACeConnection
+from .metrics import Metrics
+from .pool import FACeConnectionPool
+from .profiling import Profiler
+from .retry import RetryPolicy
 from .soap import FACeSoapClient
+from .soaplog import SoapLogger
+from .storage import ArchiveStore, ContentAddressedStore, DirectoryStore
+from .throttle import CircuitBreaker, RateLimiter
+from .validation import FacturaeValidator
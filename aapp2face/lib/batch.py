@@ -0,0 +1,563 @@
+"""
+Módulo de envío masivo de facturas a FACe
+"""
+
+import csv
+import json
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+
+from .objects import (
+    DatosPersonales,
+    NotificaFactura,
+    PeticionDocumentoCesion,
+    PeticionNotificaFactura,
+    PeticionNotificaFacturaNoElectronica,
+)
+from .retry import RetryPolicy, without_retries
+
+if TYPE_CHECKING:
+    # FACeConnection usa este módulo para sus métodos por lotes
+    from .main import FACeConnection
+
+BATCH_WORKERS = 4
+"""Número de peticiones simultáneas por defecto"""
+
+MANIFEST_DELIMITER = ";"
+"""Separador de campos de los manifiestos y ficheros de resultados"""
+
+RESULT_FIELDS = [
+    "numero_registro",
+    "registro_face",
+    "fecha_hora_registro",
+    "codigo_error",
+    "error",
+]
+"""Columnas de los ficheros de resultados"""
+
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S"
+"""Formato de las fechas de registro y expedición"""
+
+DIR3_PATTERN = re.compile(r"[A-Z0-9]{9}")
+IMPORTE_PATTERN = re.compile(r"-?\d+([.,]\d{1,2})?")
+
+PERSONAS = ("emisor", "receptor", "tercero")
+CAMPOS_PERSONA = [campo.name for campo in fields(DatosPersonales)]
+CAMPOS_NO_ELECTRONICA = [
+    f"{campo.name}_{dato}" if campo.name in PERSONAS else campo.name
+    for campo in fields(PeticionNotificaFacturaNoElectronica)
+    for dato in (CAMPOS_PERSONA if campo.name in PERSONAS else [None])
+]
+"""Columnas de los ficheros de facturas no electrónicas"""
+
+CAMPOS_OBLIGATORIOS = {
+    "numero_registro",
+    "fecha_registro",
+    "emisor_tipo",
+    "emisor_nombre_razon_social",
+    "emisor_documento_nacional",
+    "receptor_tipo",
+    "receptor_nombre_razon_social",
+    "receptor_documento_nacional",
+    "numero",
+    "importe",
+    "fecha_expedicion",
+    "organo_gestor",
+    "unidad_tramitadora",
+    "oficina_contable",
+    "estado",
+}
+
+
+@dataclass(slots=True, frozen=True)
+class ResultadoLote:
+    """Resultado de una petición de un envío masivo.
+
+    Attributes
+    ----------
+    peticion : Any
+        Petición enviada
+    resultado : Any, optional
+        Respuesta de FACe si la petición se ha completado
+    error : Exception, optional
+        Error producido al procesar la petición
+    """
+
+    peticion: Any
+    resultado: Any | None = None
+    error: Exception | None = None
+
+    @property
+    def correcto(self) -> bool:
+        """Indica si la petición se ha completado sin error."""
+
+        return self.error is None
+
+    def fila(self) -> dict[str, str]:
+        """Devuelve el resultado como fila del fichero de resultados."""
+
+        if self.resultado is not None:
+            return {
+                "numero_registro": self.peticion.numero_registro,
+                "registro_face": self.resultado.numero_registro,
+                "fecha_hora_registro": self.resultado.fecha_hora_registro,
+                "codigo_error": "",
+                "error": "",
+            }
+        return {
+            "numero_registro": self.peticion.numero_registro,
+            "registro_face": "",
+            "fecha_hora_registro": "",
+            "codigo_error": getattr(self.error, "code", ""),
+            "error": getattr(self.error, "msg", str(self.error)),
+        }
+
+
+def ejecutar_lote(
+    funcion: Callable[[Any], Any],
+    peticiones: Iterable,
+    max_workers: int = BATCH_WORKERS,
+) -> Iterator[ResultadoLote]:
+    """Procesa peticiones de forma concurrente.
+
+    Como mucho se mantienen en curso el doble de peticiones que hilos,
+    de modo que las peticiones se consumen según avanza el envío y la
+    memoria empleada no depende del tamaño del lote. Los resultados se
+    entregan en el orden de las peticiones, y los errores de cada
+    petición se entregan en su resultado sin interrumpir el resto.
+
+    Parameters
+    ----------
+    funcion : Callable
+        Función que procesa cada petición
+    peticiones : Iterable
+        Peticiones a procesar
+    max_workers : int
+        Número de peticiones simultáneas. Default: BATCH_WORKERS
+
+    Returns
+    -------
+    Iterator[ResultadoLote]
+        resultado de cada petición
+    """
+
+    def procesar(peticion) -> ResultadoLote:
+        # Cualquier error, incluidos los SOAP Fault y los de transporte
+        # de zeep, afecta solo a su petición y no interrumpe el lote
+        try:
+            return ResultadoLote(peticion, funcion(peticion))
+        except Exception as exc:
+            return ResultadoLote(peticion, error=exc)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pendientes: deque[Future] = deque()
+        for peticion in peticiones:
+            if len(pendientes) >= 2 * max_workers:
+                yield pendientes.popleft().result()
+            pendientes.append(executor.submit(procesar, peticion))
+        while pendientes:
+            yield pendientes.popleft().result()
+
+
+def notificar_facturas(
+    face: "FACeConnection",
+    peticiones: Iterable[PeticionNotificaFactura],
+    max_workers: int = BATCH_WORKERS,
+) -> Iterator[ResultadoLote]:
+    """Notifica facturas recibidas en otro PGEFe de forma concurrente.
+
+    Parameters
+    ----------
+    face : FACeConnection
+        Conexión a FACe a usar
+    peticiones : Iterable[PeticionNotificaFactura]
+        Facturas a notificar
+    max_workers : int
+        Número de notificaciones simultáneas. Default: BATCH_WORKERS
+
+    Returns
+    -------
+    Iterator[ResultadoLote]
+        resultado de la notificación de cada factura
+    """
+
+    def notificar(peticion: PeticionNotificaFactura) -> NotificaFactura:
+        return face.notifica_factura(
+            peticion.numero_registro,
+            peticion.fecha_registro,
+            peticion.path_factura,
+            peticion.organo_gestor,
+            peticion.unidad_tramitadora,
+            peticion.oficina_contable,
+            peticion.codigo_rcf,
+            peticion.estado,
+        )
+
+    return ejecutar_lote(notificar, peticiones, max_workers)
+
+
+def leer_manifiesto(path: Path) -> Iterator[PeticionNotificaFactura]:
+    """Lee un manifiesto CSV de facturas a notificar.
+
+    El manifiesto usa ';' como separador y su cabecera debe contener los
+    campos de `PeticionNotificaFactura`. Las rutas relativas de las
+    facturas se resuelven respecto al directorio del manifiesto.
+
+    Parameters
+    ----------
+    path : Path
+        Ruta del manifiesto
+
+    Returns
+    -------
+    Iterator[PeticionNotificaFactura]
+        peticiones de notificación leídas
+
+    Raises
+    ------
+    ValueError
+        Si faltan campos en la cabecera o en alguna fila
+    """
+
+    campos = [campo.name for campo in fields(PeticionNotificaFactura)]
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.DictReader(file, delimiter=MANIFEST_DELIMITER)
+        faltan = set(campos) - set(reader.fieldnames or [])
+        if faltan:
+            raise ValueError(
+                f"Faltan campos en el manifiesto: {', '.join(sorted(faltan))}"
+            )
+        for row in reader:
+            valores = {campo: (row[campo] or "").strip() for campo in campos}
+            vacios = [campo for campo in campos if not valores[campo]]
+            if vacios:
+                raise ValueError(
+                    f"Faltan valores en la línea {reader.line_num} del "
+                    f"manifiesto: {', '.join(vacios)}"
+                )
+            valores["path_factura"] = Path(path).parent.joinpath(
+                valores["path_factura"]
+            )
+            yield PeticionNotificaFactura(**valores)
+
+
+def leer_documentos_cesion(path: Path) -> Iterator[PeticionDocumentoCesion]:
+    """Lee un archivo CSV de documentos de cesión a obtener.
+
+    El archivo usa ';' como separador y su cabecera debe contener las
+    columnas `csv` y `repositorio`.
+
+    Parameters
+    ----------
+    path : Path
+        Ruta del archivo
+
+    Returns
+    -------
+    Iterator[PeticionDocumentoCesion]
+        peticiones de los documentos a obtener
+
+    Raises
+    ------
+    ValueError
+        Si faltan campos en la cabecera o en alguna fila
+    """
+
+    campos = [campo.name for campo in fields(PeticionDocumentoCesion)]
+    with open(path, newline="", encoding="utf-8") as file:
+        reader = csv.DictReader(file, delimiter=MANIFEST_DELIMITER)
+        faltan = set(campos) - set(reader.fieldnames or [])
+        if faltan:
+            raise ValueError(
+                f"Faltan campos en el archivo: {', '.join(sorted(faltan))}"
+            )
+        for row in reader:
+            valores = {campo: (row[campo] or "").strip() for campo in campos}
+            vacios = [campo for campo in campos if not valores[campo]]
+            if vacios:
+                raise ValueError(
+                    f"Faltan valores en la línea {reader.line_num} del "
+                    f"archivo: {', '.join(vacios)}"
+                )
+            yield PeticionDocumentoCesion(**valores)
+
+
+def leer_directorio(
+    path: Path,
+    organo_gestor: str,
+    unidad_tramitadora: str,
+    oficina_contable: str,
+    estado: str,
+) -> Iterator[PeticionNotificaFactura]:
+    """Genera las peticiones de notificación de las facturas de un directorio.
+
+    Cada fichero del directorio se notifica usando su nombre sin
+    extensión como número de registro del PGEFe y código RCF, y su
+    fecha de modificación como fecha de registro.
+
+    Parameters
+    ----------
+    path : Path
+        Directorio con los ficheros de factura
+    organo_gestor : str
+        Código DIR3 del Órgano Gestor
+    unidad_tramitadora : str
+        Código DIR3 de la Unidad Tramitadora
+    oficina_contable : str
+        Código DIR3 de la Oficina Contable
+    estado : str
+        Código del estado de las facturas
+
+    Returns
+    -------
+    Iterator[PeticionNotificaFactura]
+        peticiones de notificación de las facturas
+    """
+
+    for factura in sorted(Path(path).iterdir()):
+        if not factura.is_file():
+            continue
+        fecha = datetime.fromtimestamp(factura.stat().st_mtime)
+        yield PeticionNotificaFactura(
+            factura.stem,
+            fecha.strftime("%Y-%m-%dT%H:%M:%S"),
+            factura,
+            organo_gestor,
+            unidad_tramitadora,
+            oficina_contable,
+            factura.stem,
+            estado,
+        )
+
+
+def _fila_no_electronica(valores: dict) -> PeticionNotificaFacturaNoElectronica:
+    """Construye una petición a partir de una fila con columnas planas."""
+
+    datos = {
+        campo: str(valores.get(campo) or "").strip() for campo in CAMPOS_NO_ELECTRONICA
+    }
+    for persona in PERSONAS:
+        datos[persona] = DatosPersonales(
+            *(datos.pop(f"{persona}_{dato}") for dato in CAMPOS_PERSONA)
+        )
+    return PeticionNotificaFacturaNoElectronica(**datos)
+
+
+def leer_facturas_no_electronicas(
+    path: Path,
+) -> Iterator[tuple[int, PeticionNotificaFacturaNoElectronica]]:
+    """Lee un fichero CSV o NDJSON de facturas no electrónicas.
+
+    Los ficheros con extensión `.ndjson` o `.jsonl` contienen un objeto
+    JSON por línea, cuyos datos de emisor, receptor y tercero pueden
+    indicarse como objetos anidados. El resto se leen como CSV separado
+    por ';' con una columna por cada campo de la petición, usando para
+    los datos personales el prefijo de la persona (`emisor_tipo`,
+    `receptor_documento_nacional`, ...).
+
+    Parameters
+    ----------
+    path : Path
+        Ruta del fichero
+
+    Returns
+    -------
+    Iterator[tuple[int, PeticionNotificaFacturaNoElectronica]]
+        número de línea y petición de cada factura
+
+    Raises
+    ------
+    ValueError
+        Si una línea NDJSON no es un objeto JSON válido
+    """
+
+    path = Path(path)
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.suffix.lower() in (".ndjson", ".jsonl"):
+            for linea, texto in enumerate(file, 1):
+                if not texto.strip():
+                    continue
+                try:
+                    valores = json.loads(texto)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"Línea {linea}: JSON no válido ({exc})") from exc
+                if not isinstance(valores, dict):
+                    raise ValueError(f"Línea {linea}: se esperaba un objeto JSON")
+                for persona in PERSONAS:
+                    anidados = valores.pop(persona, None) or {}
+                    for dato, valor in anidados.items():
+                        valores[f"{persona}_{dato}"] = valor
+                yield linea, _fila_no_electronica(valores)
+        else:
+            reader = csv.DictReader(file, delimiter=MANIFEST_DELIMITER)
+            for row in reader:
+                yield reader.line_num, _fila_no_electronica(row)
+
+
+def validar_factura_no_electronica(
+    peticion: PeticionNotificaFacturaNoElectronica,
+) -> list[str]:
+    """Comprueba localmente los datos de una factura no electrónica.
+
+    Parameters
+    ----------
+    peticion : PeticionNotificaFacturaNoElectronica
+        Petición a comprobar
+
+    Returns
+    -------
+    list[str]
+        descripción de cada error encontrado
+    """
+
+    errores = []
+    valores = {
+        f"{persona}_{dato}": getattr(getattr(peticion, persona), dato)
+        for persona in PERSONAS
+        for dato in CAMPOS_PERSONA
+    }
+    valores.update(
+        (campo, getattr(peticion, campo))
+        for campo in CAMPOS_NO_ELECTRONICA
+        if campo not in valores
+    )
+
+    for campo in CAMPOS_NO_ELECTRONICA:
+        if campo in CAMPOS_OBLIGATORIOS and not valores[campo]:
+            errores.append(f"falta el campo {campo}")
+
+    for campo in ("fecha_registro", "fecha_expedicion"):
+        if valores[campo]:
+            try:
+                datetime.strptime(valores[campo], DATE_FORMAT)
+            except ValueError:
+                errores.append(f"{campo} no tiene el formato 'YYYY-MM-DDThh:mm:ss'")
+
+    for persona in PERSONAS:
+        tipo = valores[f"{persona}_tipo"]
+        if tipo and tipo not in ("F", "J"):
+            errores.append(f"{persona}_tipo debe ser 'F' o 'J'")
+
+    if valores["importe"] and not IMPORTE_PATTERN.fullmatch(valores["importe"]):
+        errores.append("importe no es un importe válido")
+
+    for campo in ("organo_gestor", "unidad_tramitadora", "oficina_contable"):
+        if valores[campo] and not DIR3_PATTERN.fullmatch(valores[campo]):
+            errores.append(f"{campo} no es un código DIR3 válido")
+
+    return errores
+
+
+def validar_facturas_no_electronicas(
+    path: Path,
+) -> tuple[dict[str, list[PeticionNotificaFacturaNoElectronica]], list[str]]:
+    """Comprueba localmente todas las facturas de un fichero y las agrupa
+    por Oficina Contable.
+
+    Además de los datos de cada factura, comprueba que no se repitan
+    números de registro. El fichero se lee una sola vez.
+
+    Parameters
+    ----------
+    path : Path
+        Ruta del fichero CSV o NDJSON
+
+    Returns
+    -------
+    tuple[dict[str, list[PeticionNotificaFacturaNoElectronica]], list[str]]
+        peticiones de cada Oficina Contable, en el orden de lectura, y
+        descripción de cada error encontrado, indicando su línea
+    """
+
+    grupos: dict[str, list] = {}
+    errores = []
+    vistos: dict[str, int] = {}
+    for linea, peticion in leer_facturas_no_electronicas(path):
+        for error in validar_factura_no_electronica(peticion):
+            errores.append(f"Línea {linea}: {error}")
+        if peticion.numero_registro in vistos:
+            errores.append(
+                f"Línea {linea}: número de registro repetido "
+                f"(línea {vistos[peticion.numero_registro]})"
+            )
+        else:
+            vistos[peticion.numero_registro] = linea
+        grupos.setdefault(peticion.oficina_contable, []).append(peticion)
+
+    return grupos, errores
+
+
+def notificar_facturas_no_electronicas(
+    face: "FACeConnection",
+    peticiones: Iterable[PeticionNotificaFacturaNoElectronica],
+    max_workers: int = BATCH_WORKERS,
+    retry_policy: RetryPolicy | None = None,
+    idempotent: bool | None = None,
+) -> Iterator[ResultadoLote]:
+    """Notifica facturas no electrónicas de forma concurrente.
+
+    Con una política de reintentos cada factura se reintenta por
+    separado con ella en lugar de con la del conector.
+    `notificaFacturaNoElectronica` no es idempotente, por lo que por
+    defecto solo se reintentan los fallos que garantizan que la
+    petición no llegó a FACe.
+
+    Parameters
+    ----------
+    face : FACeConnection
+        Conexión a FACe a usar
+    peticiones : Iterable[PeticionNotificaFacturaNoElectronica]
+        Facturas a notificar
+    max_workers : int
+        Número de notificaciones simultáneas. Default: BATCH_WORKERS
+    retry_policy : RetryPolicy, optional
+        Política de reintentos de cada factura. Default: None
+    idempotent : bool, optional
+        Fuerza la consideración de la notificación como idempotente o
+        no al reintentar. Default: None
+
+    Returns
+    -------
+    Iterator[ResultadoLote]
+        resultado de la notificación de cada factura
+    """
+
+    def notificar(peticion: PeticionNotificaFacturaNoElectronica) -> NotificaFactura:
+        return face.notifica_factura_no_electronica(
+            peticion.numero_registro,
+            peticion.fecha_registro,
+            peticion.emisor,
+            peticion.receptor,
+            peticion.tercero,
+            peticion.numero,
+            peticion.serie,
+            peticion.importe,
+            peticion.fecha_expedicion,
+            peticion.organo_gestor,
+            peticion.unidad_tramitadora,
+            peticion.oficina_contable,
+            peticion.codigo_rcf,
+            peticion.estado,
+            peticion.codigo_cnae,
+        )
+
+    def notificar_con_reintentos(
+        peticion: PeticionNotificaFacturaNoElectronica,
+    ) -> NotificaFactura:
+        # La política del lote sustituye a la del conector
+        with without_retries():
+            return retry_policy.ejecutar(
+                "notificaFacturaNoElectronica",
+                notificar,
+                peticion,
+                idempotent=idempotent,
+            )
+
+    if retry_policy is None:
+        return ejecutar_lote(notificar, peticiones, max_workers)
+    return ejecutar_lote(notificar_con_reintentos, peticiones, max_workers)
@@ -0,0 +1,193 @@
+"""
+Módulo de la caché local de documentos de cesión
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .encoding import b64encode_file, write_base64
+from .objects import DocumentoCesion
+
+CACHE_DB_FILENAME = "documentos.sqlite"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+"""Tamaño máximo por defecto de los documentos en caché"""
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS documentos (
+    clave TEXT PRIMARY KEY,
+    csv TEXT NOT NULL,
+    repositorio TEXT NOT NULL,
+    numero_registro TEXT,
+    nombre TEXT,
+    mime TEXT,
+    tamano INTEGER NOT NULL,
+    ultimo_acceso REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documentos_ultimo_acceso ON documentos (ultimo_acceso);
+"""
+
+
+class CessionDocumentCache:
+    """Caché persistente de documentos de cesión.
+
+    Los documentos de cesión son documentos notariales que no cambian una
+    vez emitidos, por lo que se guardan en disco identificados por su CSV
+    y repositorio y se sirven desde la caché en las siguientes consultas,
+    sin llamar a FACe ni al servicio de notarios.
+
+    Cada documento se guarda decodificado en un archivo y sus datos en
+    una base de datos SQLite, que puede compartirse entre hilos y
+    procesos. Cuando el tamaño de los documentos supera `max_bytes` se
+    eliminan los usados hace más tiempo.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = CACHE_MAX_BYTES):
+        """Constructor
+
+        Parameters
+        ----------
+        path : Path
+            Directorio de la caché
+        max_bytes : int
+            Tamaño máximo en bytes de los documentos guardados. Con 0 no
+            se eliminan documentos. Default: CACHE_MAX_BYTES
+        """
+
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(
+            self.path.joinpath(CACHE_DB_FILENAME),
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conexion.row_factory = sqlite3.Row
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.executescript(_ESQUEMA)
+
+    @staticmethod
+    def _clave(csv: str, repositorio: str) -> str:
+        return hashlib.sha256(f"{repositorio}\n{csv}".encode()).hexdigest()
+
+    def obtener(self, csv: str, repositorio: str) -> DocumentoCesion | None:
+        """Devuelve un documento de la caché.
+
+        Parameters
+        ----------
+        csv : str
+            Identificador del documento
+        repositorio : str
+            Repositorio del documento
+
+        Returns
+        -------
+        DocumentoCesion | None
+            documento de la cesión, o None si no está en la caché
+        """
+
+        clave = self._clave(csv, repositorio)
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT numero_registro, nombre, mime FROM documentos WHERE clave = ?",
+                (clave,),
+            ).fetchone()
+        if fila is None:
+            return None
+
+        try:
+            contenido = b64encode_file(self.path.joinpath(clave))
+        except FileNotFoundError:
+            # El archivo se ha eliminado desde otro proceso
+            with self._lock:
+                self._conexion.execute(
+                    "DELETE FROM documentos WHERE clave = ?", (clave,)
+                )
+            return None
+
+        with self._lock:
+            self._conexion.execute(
+                "UPDATE documentos SET ultimo_acceso = ? WHERE clave = ?",
+                (time.time(), clave),
+            )
+        return DocumentoCesion(
+            fila["numero_registro"],
+            contenido,
+            fila["nombre"],
+            fila["mime"],
+        )
+
+    def guardar(self, csv: str, repositorio: str, documento: DocumentoCesion) -> None:
+        """Guarda un documento en la caché.
+
+        Si con él se supera el tamaño máximo de la caché, se eliminan los
+        documentos usados hace más tiempo.
+
+        Parameters
+        ----------
+        csv : str
+            Identificador del documento
+        repositorio : str
+            Repositorio del documento
+        documento : DocumentoCesion
+            Documento de la cesión obtenido de FACe
+        """
+
+        clave = self._clave(csv, repositorio)
+        _, tamano = write_base64(
+            self.path.joinpath(clave), documento.documento, True, durability="none"
+        )
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO documentos VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    clave,
+                    csv,
+                    repositorio,
+                    documento.numero_registro,
+                    documento.nombre,
+                    documento.mime,
+                    tamano,
+                    time.time(),
+                ),
+            )
+            if self.max_bytes:
+                self._purgar()
+
+    def _purgar(self) -> None:
+        """Elimina los documentos usados hace más tiempo hasta no superar
+        el tamaño máximo."""
+
+        (total,) = self._conexion.execute(
+            "SELECT coalesce(sum(tamano), 0) FROM documentos"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        eliminar = []
+        for fila in self._conexion.execute(
+            "SELECT clave, tamano FROM documentos ORDER BY ultimo_acceso"
+        ):
+            eliminar.append(fila["clave"])
+            total -= fila["tamano"]
+            if total <= self.max_bytes:
+                break
+        for clave in eliminar:
+            self._conexion.execute("DELETE FROM documentos WHERE clave = ?", (clave,))
+            self.path.joinpath(clave).unlink(missing_ok=True)
+
+    def tamano(self) -> int:
+        """Devuelve el tamaño en bytes de los documentos en caché."""
+
+        with self._lock:
+            (total,) = self._conexion.execute(
+                "SELECT coalesce(sum(tamano), 0) FROM documentos"
+            ).fetchone()
+        return total
+
+    def close(self) -> None:
+        """Cierra la caché."""
+
+        self._conexion.close()
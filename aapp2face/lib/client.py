@@ -2,15 +2,139 @@
 Módulo definición de la interfaz FACeClient
 """
 
+import time
 from abc import ABC, abstractmethod
+from typing import Any, Callable, Sequence
 
 from . import exceptions as excs
+from .hooks import CallInfo, ClientHook, call_context, summarize_arg
 from .objects import FACeResult, PeticionCambiarEstadoFactura
+from .retry import RetryPolicy, retries_disabled
+from .throttle import CircuitBreaker, RateLimiter
 
 
 class FACeClient(ABC):
     """Interfaz de los conectores FACe."""
 
+    def __init__(
+        self,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: RateLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        hooks: list[ClientHook] | None = None,
+    ):
+        """Constructor
+
+        Parameters
+        ----------
+        retry_policy : RetryPolicy, optional
+            Política de reintentos ante fallos transitorios. Si no se
+            indica, las operaciones no se reintentan. Default: None
+        rate_limiter : RateLimiter, optional
+            Limitador del ritmo de peticiones. Default: None
+        circuit_breaker : CircuitBreaker, optional
+            Cortocircuito ante fallos continuados. Default: None
+        hooks : list[ClientHook], optional
+            Ganchos de instrumentación invocados en cada intento de
+            llamada, como `Metrics`. Default: None
+        """
+
+        self._retry_policy = retry_policy
+        self._rate_limiter = rate_limiter
+        self._circuit_breaker = circuit_breaker
+        self._hooks = list(hooks or [])
+
+    def add_hook(self, hook: ClientHook) -> None:
+        """Añade un gancho de instrumentación al conector."""
+
+        self._hooks.append(hook)
+
+    def _invocar(
+        self,
+        operacion: str,
+        funcion: Callable[..., Any],
+        *args,
+        call_args: Sequence = (),
+    ) -> Any:
+        """Ejecuta la función que realiza una operación FACe.
+
+        Todas las llamadas a FACe de los conectores pasan por este
+        método, que aplica la política de reintentos, el limitador de
+        peticiones y el cortocircuito configurados e invoca los ganchos
+        de instrumentación en cada intento.
+
+        Parameters
+        ----------
+        operacion : str
+            Nombre del método SOAP de FACe
+        funcion : Callable
+            Función que realiza la llamada y verifica su resultado
+        *args
+            Argumentos de la función
+        call_args : Sequence, optional
+            Argumentos de la operación FACe, que se resumen para los
+            ganchos. Default: ()
+        """
+
+        resumen = [summarize_arg(arg) for arg in call_args] if self._hooks else []
+        intentos = 0
+
+        def intento():
+            nonlocal intentos
+            intentos += 1
+            info = CallInfo(operacion, resumen, intentos)
+            return self._intento(info, funcion, *args)
+
+        if self._retry_policy is None or retries_disabled():
+            return intento()
+        return self._retry_policy.ejecutar(operacion, intento)
+
+    def _intento(self, info: CallInfo, funcion: Callable[..., Any], *args) -> Any:
+        """Realiza un intento de la operación FACe indicada."""
+
+        with call_context(info):
+            for hook in self._hooks:
+                hook.before_call(info)
+            # Si el intento es la llamada de prueba del cortocircuito, se
+            # libera aunque se interrumpa sin resultado (p. ej. con Ctrl+C)
+            prueba = False
+            try:
+                try:
+                    if self._circuit_breaker is not None:
+                        prueba = self._circuit_breaker.before_call(info.operacion)
+                    if self._rate_limiter is not None:
+                        info.espera = self._rate_limiter.acquire(info.operacion)
+                except Exception as exc:
+                    info.error = exc
+                    for hook in self._hooks:
+                        hook.on_error(info)
+                    raise
+
+                inicio = time.perf_counter()
+                info.lap()
+                try:
+                    info.resultado = funcion(*args)
+                except Exception as exc:
+                    info.duracion = time.perf_counter() - inicio
+                    info.error = exc
+                    if self._circuit_breaker is not None:
+                        self._circuit_breaker.record_failure(exc)
+                        prueba = False
+                    for hook in self._hooks:
+                        hook.on_error(info)
+                    raise
+
+                info.duracion = time.perf_counter() - inicio
+                if self._circuit_breaker is not None:
+                    self._circuit_breaker.record_success()
+                    prueba = False
+                for hook in self._hooks:
+                    hook.after_call(info)
+                return info.resultado
+            finally:
+                if prueba:
+                    self._circuit_breaker.release()
+
     def _verify_result_header(self, result: FACeResult):
         if result.codigo != "0":
             codigo_error: str = result.codigo
@@ -0,0 +1,209 @@
+"""
+Módulo de codificación en base64 de los ficheros intercambiados con FACe
+y de su escritura en disco
+"""
+
+import binascii
+import errno
+import hashlib
+import mmap
+import os
+import uuid
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .profiling import section
+
+B64_CHUNK_SIZE = 3 * 256 * 1024
+"""Tamaño de los bloques leídos al codificar en base64, múltiplo de 3
+para que cada bloque codificado no necesite relleno"""
+
+WHITESPACE = b" \t\r\n"
+
+
+def b64encode_file(path: Path | str, chunk_size: int = B64_CHUNK_SIZE) -> str:
+    """Codifica en base64 el contenido de un fichero.
+
+    El fichero se proyecta en memoria y se codifica por bloques sobre
+    un búfer del tamaño final, sin cargar antes su contenido completo.
+    El resultado se devuelve como texto, que es lo que espera zeep, para
+    que el búfer se copie una sola vez.
+
+    Parameters
+    ----------
+    path : Path | str
+        Ruta del fichero a codificar
+    chunk_size : int
+        Tamaño de los bloques a codificar. Default: B64_CHUNK_SIZE
+
+    Returns
+    -------
+    str
+        contenido del fichero codificado en base64
+    """
+
+    chunk_size = max(3, chunk_size - chunk_size % 3)
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return ""
+        salida = bytearray(4 * ((size + 2) // 3))
+        posicion = 0
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as datos:
+            for inicio in range(0, size, chunk_size):
+                bloque = binascii.b2a_base64(
+                    datos[inicio : inicio + chunk_size], newline=False
+                )
+                salida[posicion : posicion + len(bloque)] = bloque
+                posicion += len(bloque)
+
+    return salida.decode("ascii")
+
+
+def b64decode_chunks(
+    data: str | bytes, chunk_size: int = 4 * B64_CHUNK_SIZE // 3
+) -> Iterator[bytes]:
+    """Decodifica un contenido en base64 por bloques.
+
+    Los saltos de línea y espacios del contenido se descartan, igual
+    que hace `base64.b64decode`.
+
+    Parameters
+    ----------
+    data : str | bytes
+        Contenido codificado en base64
+    chunk_size : int
+        Número de caracteres a decodificar en cada bloque. Default:
+        4 * B64_CHUNK_SIZE // 3
+
+    Returns
+    -------
+    Iterator[bytes]
+        bloques decodificados
+    """
+
+    pendiente = b""
+    for inicio in range(0, len(data), chunk_size):
+        bloque = data[inicio : inicio + chunk_size]
+        if isinstance(bloque, str):
+            bloque = bloque.encode("ascii")
+        bloque = pendiente + bloque.translate(None, WHITESPACE)
+        corte = len(bloque) - len(bloque) % 4
+        pendiente = bloque[corte:]
+        if corte:
+            yield binascii.a2b_base64(bloque[:corte])
+    if pendiente:
+        yield binascii.a2b_base64(pendiente)
+
+
+def _exists_error(path: Path) -> FileExistsError:
+    return FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(path))
+
+
+def _fsync_dir(path: Path) -> None:
+    """Sincroniza con el disco las entradas de un directorio."""
+
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(
+    path: Path,
+    bloques: Iterable[bytes],
+    force: bool = False,
+    durability: str = "always",
+) -> tuple[str, int]:
+    """Escribe un archivo de forma atómica.
+
+    Los bloques se escriben en un archivo temporal del mismo directorio
+    que se renombra al destino cuando está completo, de modo que ante
+    una interrupción el destino nunca queda a medias.
+
+    Parameters
+    ----------
+    path : Path
+        Archivo destino
+    bloques : Iterable[bytes]
+        Contenido a escribir
+    force : bool
+        Sobrescribe el archivo si existe. En caso contrario lanza una
+        excepción. Default: False
+    durability : str
+        Con "always" el archivo y su directorio se sincronizan con el
+        disco antes de terminar. Con "none" o "batch" la sincronización
+        queda a cargo del sistema o de quien llama. Default: "always"
+
+    Returns
+    -------
+    tuple[str, int]
+        hash SHA-256 y tamaño en bytes del contenido escrito
+    """
+
+    path = Path(path)
+    if not force and path.exists():
+        raise _exists_error(path)
+
+    digest = hashlib.sha256()
+    size = 0
+    bloques = iter(bloques)
+    temporal = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temporal, "xb") as file:
+            while True:
+                with section("base64"):
+                    bloque = next(bloques, None)
+                if bloque is None:
+                    break
+                digest.update(bloque)
+                size += len(bloque)
+                with section("disk"):
+                    file.write(bloque)
+            if durability == "always":
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temporal, path)
+    finally:
+        temporal.unlink(missing_ok=True)
+    if durability == "always":
+        _fsync_dir(path.parent)
+
+    return digest.hexdigest(), size
+
+
+def write_base64(
+    path: Path,
+    contenido: str | bytes,
+    force: bool = False,
+    durability: str = "always",
+) -> tuple[str, int]:
+    """Decodifica un contenido en base64 y lo escribe en un archivo.
+
+    La decodificación se realiza por bloques, escribiendo cada bloque
+    según se obtiene, de modo que no llega a existir en memoria una
+    copia decodificada completa del contenido. La escritura es atómica
+    (ver `write_atomic`).
+
+    Parameters
+    ----------
+    path : Path
+        Archivo destino
+    contenido : str | bytes
+        Contenido codificado en base64
+    force : bool
+        Sobrescribe el archivo si existe. En caso contrario lanza una
+        excepción. Default: False
+    durability : str
+        Nivel de sincronización con el disco. Default: "always"
+
+    Returns
+    -------
+    tuple[str, int]
+        hash SHA-256 y tamaño en bytes del contenido decodificado
+    """
+
+    return write_atomic(path, b64decode_chunks(contenido), force, durability)
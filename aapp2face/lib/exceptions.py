@@ -34,3 +34,30 @@ class AfirmaVerificationException(FACeException):
 
 class FACeManagementException(FACeException):
     """Lanzada por errores asociados a la gestión en FACe."""
+
+
+class CircuitOpenError(Exception):
+    """
+    Lanzada cuando se cancela una llamada a FACe sin realizarla porque
+    el circuito está abierto tras una serie de fallos consecutivos.
+    """
+
+
+class UnknownIdentityError(LookupError):
+    """
+    Lanzada cuando ninguna identidad de un conjunto de conexiones
+    gestiona la oficina contable de una llamada.
+    """
+
+
+class PartialResultsError(Exception):
+    """
+    Lanzada cuando falla una operación dividida en varias peticiones a
+    FACe después de haberse aplicado alguna de ellas. La excepción
+    original se encadena como causa y los resultados de las peticiones
+    ya aplicadas se adjuntan en el atributo `resultados`.
+    """
+
+    def __init__(self, msg: str, resultados: list):
+        super().__init__(msg)
+        self.resultados = resultados
@@ -0,0 +1,594 @@
+"""
+Generador de juegos de respuestas sintéticas para el modo simulación
+"""
+
+import base64
+import datetime
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+from .fakesoap import FILE_RESPONSE_EXTENSION
+
+# Límite de elementos que FACe devuelve en las consultas de nuevas
+# facturas y nuevas solicitudes de anulación.
+LIMITE_NUEVAS = 500
+
+ESTADOS = (
+    (
+        "ordinario",
+        "Registrada",
+        "Registrada",
+        "1200",
+        "La factura ha sido registrada en el registro electrónico REC",
+    ),
+    (
+        "ordinario",
+        "Registrada en RCF",
+        "Registrada en RCF",
+        "1300",
+        "La factura ha sido registrada en RCF",
+    ),
+    (
+        "ordinario",
+        "Verificada en RCF",
+        "Registrada en RCF",
+        "1400",
+        "la factura ha sido verificada en RCF",
+    ),
+    (
+        "ordinario",
+        "Recibida en destino",
+        "Registrada en RCF",
+        "2100",
+        "La Unidad ha recibido la factura",
+    ),
+    (
+        "ordinario",
+        "Conformada",
+        "Registrada en RCF",
+        "2300",
+        "La Unidad Tramitadora ha aceptado el pago de la factura remitida",
+    ),
+    (
+        "ordinario",
+        "Contabilizada la obligación reconocida",
+        "Contabilizada la obligación reconocida",
+        "2400",
+        "Contabilizada la obligación reconocida",
+    ),
+    ("ordinario", "Pagada", "Pagada", "2500", "Factura pagada"),
+    ("ordinario", "Rechazada", "Rechazada", "2600", "La Unidad rechaza la factura"),
+    (
+        "ordinario",
+        "Anulada",
+        "Anulada",
+        "3100",
+        "La Unidad aprueba la propuesta de anulación",
+    ),
+    (
+        "anulación",
+        "No solicitada anulación",
+        "No solicitada anulación",
+        "4100",
+        "No solicitada anulación",
+    ),
+    (
+        "anulación",
+        "Solicitada anulación",
+        "Solicitada anulación",
+        "4200",
+        "Solicitada anulación",
+    ),
+    (
+        "anulación",
+        "Rechazada anulación",
+        "Rechazada anulación",
+        "4400",
+        "Rechazada anulación",
+    ),
+    (
+        "anulación",
+        "Aceptada anulación",
+        "Aceptada anulación",
+        "4300",
+        "Aceptada anulación",
+    ),
+)
+
+DESCRIPCION_ESTADOS = {estado[3]: estado[4] for estado in ESTADOS}
+
+# Recorrido del flujo ordinario a partir del estado 1300. Una factura
+# tramitada avanza por este flujo hasta quedar pagada o rechazada.
+FLUJO_ORDINARIO = ("1300", "1400", "2100", "2300", "2400", "2500")
+
+SOLICITANTE = ("99999999R", "NOMBRE", "APELLIDOS")
+
+CABECERA_PDF = b"%PDF-1.5\n"
+
+PLANTILLA_FACTURAE = """<?xml version="1.0" encoding="UTF-8"?>
+<fe:Facturae xmlns:ds="http://www.w3.org/2000/09/xmldsig#" xmlns:fe="http://www.facturae.es/Facturae/2009/v3.2/Facturae"><FileHeader><SchemaVersion>3.2</SchemaVersion><Modality>I</Modality><InvoiceIssuerType>EM</InvoiceIssuerType><Batch><BatchIdentifier>{proveedor}{numero}</BatchIdentifier><InvoicesCount>1</InvoicesCount><TotalInvoicesAmount><TotalAmount>{importe}</TotalAmount></TotalInvoicesAmount><TotalOutstandingAmount><TotalAmount>{importe}</TotalAmount></TotalOutstandingAmount><TotalExecutableAmount><TotalAmount>{importe}</TotalAmount></TotalExecutableAmount><InvoiceCurrencyCode>EUR</InvoiceCurrencyCode></Batch></FileHeader><Parties><SellerParty><TaxIdentification><PersonTypeCode>J</PersonTypeCode><ResidenceTypeCode>R</ResidenceTypeCode><TaxIdentificationNumber>{proveedor}</TaxIdentificationNumber></TaxIdentification><LegalEntity><CorporateName>{razon_social}</CorporateName><AddressInSpain><Address>Calle Simulada 1</Address><PostCode>28001</PostCode><Town>Madrid</Town><Province>Madrid</Province><CountryCode>ESP</CountryCode></AddressInSpain></LegalEntity></SellerParty><BuyerParty><TaxIdentification><PersonTypeCode>J</PersonTypeCode><ResidenceTypeCode>R</ResidenceTypeCode><TaxIdentificationNumber>S0000000A</TaxIdentificationNumber></TaxIdentification><AdministrativeCentres><AdministrativeCentre><CentreCode>{oficina_contable}</CentreCode><RoleTypeCode>01</RoleTypeCode></AdministrativeCentre><AdministrativeCentre><CentreCode>{organo_gestor}</CentreCode><RoleTypeCode>02</RoleTypeCode></AdministrativeCentre><AdministrativeCentre><CentreCode>{unidad_tramitadora}</CentreCode><RoleTypeCode>03</RoleTypeCode></AdministrativeCentre></AdministrativeCentres><LegalEntity><CorporateName>Organismo Simulado</CorporateName></LegalEntity></BuyerParty></Parties><Invoices><Invoice><InvoiceHeader><InvoiceNumber>{numero}</InvoiceNumber><InvoiceSeriesCode>{serie}</InvoiceSeriesCode><InvoiceDocumentType>FC</InvoiceDocumentType><InvoiceClass>OO</InvoiceClass></InvoiceHeader><InvoiceIssueData><IssueDate>{fecha_expedicion}</IssueDate><InvoiceCurrencyCode>EUR</InvoiceCurrencyCode><TaxCurrencyCode>EUR</TaxCurrencyCode><LanguageName>es</LanguageName></InvoiceIssueData><InvoiceTotals><TotalGrossAmount>{importe}</TotalGrossAmount><InvoiceTotal>{importe}</InvoiceTotal><TotalOutstandingAmount>{importe}</TotalOutstandingAmount><TotalExecutableAmount>{importe}</TotalExecutableAmount></InvoiceTotals><Items>{lineas}</Items></Invoice></Invoices></fe:Facturae>
+"""
+
+PLANTILLA_LINEA = "<InvoiceLine><ItemDescription>Concepto {indice}</ItemDescription><Quantity>1.0</Quantity><UnitOfMeasure>01</UnitOfMeasure><UnitPriceWithoutTax>{importe}</UnitPriceWithoutTax><TotalCost>{importe}</TotalCost><GrossAmount>{importe}</GrossAmount></InvoiceLine>"
+
+
+@dataclass
+class _FacturaSintetica:
+    """Datos mínimos de una factura sintética necesarios para componer
+    las distintas respuestas en las que aparece.
+    """
+
+    numero_registro: str
+    oficina_contable: str
+    organo_gestor: str
+    unidad_tramitadora: str
+    fecha_hora_registro: str
+    tramitacion: str
+    anulacion: str
+    cesion: str | None
+
+
+class FakeDataGenerator:
+    """Generador de juegos de respuestas sintéticas para `FACeFakeSoapClient`.
+
+    Genera, de forma reproducible a partir de una semilla, un juego de
+    respuestas coherente entre sí con el volumen de facturas, oficinas
+    contables, anexos, anulaciones y cesiones que se indique, con el fin
+    de dimensionar memoria, disco y tiempos de ejecución sin necesidad
+    de conectar con FACe.
+
+    El estado de cada factura se genera como una respuesta individual de
+    `consultarListadoFacturas`; `FACeFakeSoapClient` compone con ellas
+    las respuestas a consultas de varias facturas.
+    """
+
+    def __init__(
+        self,
+        facturas: int = 1000,
+        oficinas: int = 10,
+        anexos: int = 2,
+        tam_anexo: int = 65536,
+        lineas_factura: int = 10,
+        anexos_comunes: int = 5,
+        proporcion_registradas: float = 0.5,
+        proporcion_anulaciones: float = 0.05,
+        proporcion_cesiones: float = 0.05,
+        semilla: int | None = None,
+        fecha_inicio: datetime.date = datetime.date(2024, 1, 1),
+    ):
+        """Constructor
+
+        Parameters
+        ----------
+        facturas : int
+            Número total de facturas a generar. Default: 1000
+        oficinas : int
+            Número de oficinas contables entre las que se reparten las
+            facturas. Default: 10
+        anexos : int
+            Número máximo de anexos por factura. Default: 2
+        tam_anexo : int
+            Tamaño en bytes de cada anexo decodificado. Default: 65536
+        lineas_factura : int
+            Número de líneas de detalle de cada factura, que determina
+            el tamaño del archivo Facturae. Default: 10
+        anexos_comunes : int
+            Número de anexos compartidos por varias facturas, como
+            ocurre con condiciones generales o certificados que los
+            proveedores adjuntan repetidamente. Default: 5
+        proporcion_registradas : float
+            Proporción de facturas en estado "Registrada" pendientes de
+            descarga. Default: 0.5
+        proporcion_anulaciones : float
+            Proporción de facturas tramitadas con solicitud de anulación
+            pendiente. Default: 0.05
+        proporcion_cesiones : float
+            Proporción de facturas con cesión de crédito. Default: 0.05
+        semilla : int, optional
+            Semilla del generador aleatorio para obtener juegos
+            reproducibles. Default: None
+        fecha_inicio : datetime.date
+            Fecha de registro de la factura más antigua.
+            Default: 2024-01-01
+        """
+
+        self._facturas = facturas
+        self._oficinas = oficinas
+        self._anexos = anexos
+        self._tam_anexo = tam_anexo
+        self._lineas_factura = lineas_factura
+        self._anexos_comunes = anexos_comunes
+        self._proporcion_registradas = proporcion_registradas
+        self._proporcion_anulaciones = proporcion_anulaciones
+        self._proporcion_cesiones = proporcion_cesiones
+        self._semilla = semilla
+        self._fecha_inicio = fecha_inicio
+
+        # Estado de la generación en curso, reiniciado en cada `generar`
+        self._rng = random.Random(semilla)
+        self._destino = Path()
+        self._resumen: dict[str, int] = {}
+
+    def generar(self, destino: Path) -> dict[str, int]:
+        """Genera el juego de respuestas en el directorio indicado.
+
+        Los archivos existentes en destino con el mismo nombre son
+        sobrescritos.
+
+        Parameters
+        ----------
+        destino : Path
+            Directorio donde se escribirán los archivos de respuesta
+
+        Returns
+        -------
+        dict[str, int]
+            resumen con el número de facturas, anulaciones, cesiones,
+            archivos y bytes generados
+        """
+
+        self._rng = random.Random(self._semilla)
+        self._destino = Path(destino)
+        self._destino.mkdir(parents=True, exist_ok=True)
+        self._resumen = {
+            "facturas": 0,
+            "registradas": 0,
+            "anulaciones": 0,
+            "cesiones": 0,
+            "archivos": 0,
+            "bytes": 0,
+        }
+
+        unidades = self._generar_unidades()
+        comunes = [
+            self._anexo_aleatorio(f"comun_{i + 1}.pdf")
+            for i in range(self._anexos_comunes)
+        ]
+        facturas = self._generar_facturas(unidades)
+
+        self._escribir("consultarEstados", self._respuesta_estados())
+        self._escribir("consultarUnidades", self._respuesta_unidades(unidades))
+        self._escribir_listas(facturas)
+
+        for factura in facturas:
+            self._escribir_factura(factura, comunes)
+
+        return self._resumen
+
+    def _generar_unidades(self) -> list[tuple[str, str, str]]:
+        """Genera las relaciones OG-UT-OC. Cada oficina contable dispone
+        de un órgano gestor y una o varias unidades tramitadoras."""
+
+        unidades = []
+        for indice in range(self._oficinas):
+            oficina = f"P{10 + indice:08d}"
+            for ut in range(1 + indice % 3):
+                unidades.append((oficina, oficina, f"P{10 + indice:05d}{ut:03d}"))
+        return unidades
+
+    def _generar_facturas(
+        self, unidades: list[tuple[str, str, str]]
+    ) -> list[_FacturaSintetica]:
+        """Genera los datos mínimos de todas las facturas."""
+
+        facturas = []
+        segundos_periodo = 365 * 24 * 3600
+        inicio = datetime.datetime.combine(self._fecha_inicio, datetime.time())
+        instantes = sorted(
+            self._rng.randrange(segundos_periodo) for _ in range(self._facturas)
+        )
+        for secuencia, instante in enumerate(instantes):
+            fecha = inicio + datetime.timedelta(seconds=instante)
+            oficina, organo, unidad = self._rng.choice(unidades)
+
+            if self._rng.random() < self._proporcion_registradas:
+                tramitacion = "1200"
+                anulacion = "4100"
+            else:
+                tramitacion = self._rng.choice(FLUJO_ORDINARIO + ("2600",))
+                if self._rng.random() < self._proporcion_anulaciones:
+                    anulacion = "4200"
+                else:
+                    anulacion = self._rng.choice(("4100", "4100", "4100", "4400"))
+
+            cesion = None
+            if self._rng.random() < self._proporcion_cesiones:
+                cesion = self._rng.choice(("6100", "6200", "6300"))
+
+            facturas.append(
+                _FacturaSintetica(
+                    f"{fecha.year}{secuencia + 1:08d}",
+                    oficina,
+                    organo,
+                    unidad,
+                    fecha.strftime("%Y-%m-%d %H:%M:%S"),
+                    tramitacion,
+                    anulacion,
+                    cesion,
+                )
+            )
+        return facturas
+
+    def _escribir(self, filename_prefix: str, data: dict) -> None:
+        """Escribe un archivo de respuesta en formato `FACeFakeSoapClient`."""
+
+        file = self._destino.joinpath(f"{filename_prefix}.{FILE_RESPONSE_EXTENSION}")
+        contenido = json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+        with open(file, "wb") as f:
+            f.write(contenido)
+        self._resumen["archivos"] += 1
+        self._resumen["bytes"] += len(contenido)
+
+    def _resultado(self, codigo: str = "0", descripcion: str = "Correcto") -> dict:
+        """Devuelve la cabecera de resultado de una respuesta FACe."""
+
+        return {
+            "codigo": codigo,
+            "descripcion": descripcion,
+            "codigoSeguimiento": None,
+        }
+
+    def _anexo_aleatorio(self, nombre: str) -> dict:
+        """Genera un anexo PDF con contenido aleatorio."""
+
+        contenido = CABECERA_PDF + self._rng.randbytes(
+            max(self._tam_anexo - len(CABECERA_PDF), 0)
+        )
+        return {
+            "anexo": base64.b64encode(contenido).decode("ascii"),
+            "nombre": nombre,
+            "mime": "application/pdf",
+        }
+
+    def _respuesta_estados(self) -> dict:
+        estados = [
+            {
+                "flujo": flujo,
+                "nombre": nombre,
+                "nombrePublico": nombre_publico,
+                "codigo": codigo,
+                "descripcion": descripcion,
+            }
+            for flujo, nombre, nombre_publico, codigo, descripcion in ESTADOS
+        ]
+        return {"resultado": self._resultado(), "estados": {"Estado": estados}}
+
+    def _respuesta_unidades(self, unidades: list[tuple[str, str, str]]) -> dict:
+        relaciones = [
+            {
+                "organoGestor": {"nombre": f"Órgano Gestor {og}", "codigo": og},
+                "unidadTramitadora": {
+                    "nombre": f"Unidad Tramitadora {ut}",
+                    "codigo": ut,
+                },
+                "oficinaContable": {"nombre": f"Oficina Contable {oc}", "codigo": oc},
+            }
+            for oc, og, ut in unidades
+        ]
+        return {"resultado": self._resultado(), "relaciones": {"OGUTOC": relaciones}}
+
+    def _escribir_listas(self, facturas: list[_FacturaSintetica]) -> None:
+        """Escribe las respuestas de nuevas facturas y nuevas anulaciones,
+        tanto para el RCF como para cada oficina contable. Al igual que
+        FACe, cada lista se limita a `LIMITE_NUEVAS` elementos.
+        """
+
+        nuevas: dict[str, list[dict]] = {"": []}
+        anulaciones: dict[str, list[dict]] = {"": []}
+        oficinas = {factura.oficina_contable for factura in facturas}
+        for oficina in oficinas:
+            nuevas[oficina] = []
+            anulaciones[oficina] = []
+
+        for factura in facturas:
+            if factura.tramitacion == "1200":
+                self._resumen["registradas"] += 1
+                item = {
+                    "numeroRegistro": factura.numero_registro,
+                    "oficinaContable": factura.oficina_contable,
+                    "organoGestor": factura.organo_gestor,
+                    "unidadTramitadora": factura.unidad_tramitadora,
+                    "fechaHoraRegistro": factura.fecha_hora_registro,
+                }
+                for clave in ("", factura.oficina_contable):
+                    if len(nuevas[clave]) < LIMITE_NUEVAS:
+                        nuevas[clave].append(item)
+            if factura.anulacion == "4200":
+                self._resumen["anulaciones"] += 1
+                item = {
+                    "numeroRegistro": factura.numero_registro,
+                    "oficinaContable": factura.oficina_contable,
+                    "organoGestor": factura.organo_gestor,
+                    "unidadTramitadora": factura.unidad_tramitadora,
+                    "fechaHoraSolicitudAnulacion": factura.fecha_hora_registro,
+                    "motivo": "Factura duplicada",
+                }
+                for clave in ("", factura.oficina_contable):
+                    if len(anulaciones[clave]) < LIMITE_NUEVAS:
+                        anulaciones[clave].append(item)
+
+        for oficina, items in nuevas.items():
+            self._escribir(
+                f"solicitarNuevasFacturas.{oficina}".rstrip("."),
+                {
+                    "resultado": self._resultado(),
+                    "facturas": {"solicitarNuevasFacturas": items} if items else None,
+                },
+            )
+        for oficina, items in anulaciones.items():
+            self._escribir(
+                f"solicitarNuevasAnulaciones.{oficina}".rstrip("."),
+                {
+                    "resultado": self._resultado(),
+                    "facturas": (
+                        {"solicitarNuevasAnulaciones": items} if items else None
+                    ),
+                },
+            )
+
+    def _escribir_factura(
+        self, factura: _FacturaSintetica, comunes: list[dict]
+    ) -> None:
+        """Escribe todas las respuestas asociadas a una factura."""
+
+        self._resumen["facturas"] += 1
+        numero_registro = factura.numero_registro
+        oficina = factura.oficina_contable
+        proveedor = f"B{self._rng.randrange(100):08d}"
+        numero = f"{int(numero_registro[4:]):06d}"
+        serie = factura.fecha_hora_registro[:4]
+        importe = f"{self._rng.uniform(10, 25000):.2f}"
+
+        # Descarga de la factura. Solo las facturas en estado "Registrada"
+        # pueden descargarse, al igual que ocurre en FACe.
+        if factura.tramitacion == "1200":
+            lineas = "".join(
+                PLANTILLA_LINEA.format(indice=indice + 1, importe=importe)
+                for indice in range(self._lineas_factura)
+            )
+            facturae = PLANTILLA_FACTURAE.format(
+                proveedor=proveedor,
+                razon_social=f"Proveedor Simulado {proveedor}",
+                numero=numero,
+                serie=serie,
+                importe=importe,
+                fecha_expedicion=factura.fecha_hora_registro[:10],
+                oficina_contable=oficina,
+                organo_gestor=factura.organo_gestor,
+                unidad_tramitadora=factura.unidad_tramitadora,
+                lineas=lineas,
+            )
+            # Aproximadamente la mitad de los anexos son compartidos
+            num_anexos = self._rng.randint(0, self._anexos)
+            num_comunes = min(
+                sum(self._rng.random() < 0.5 for _ in range(num_anexos)),
+                len(comunes),
+            )
+            anexos = self._rng.sample(comunes, num_comunes)
+            for indice in range(num_anexos - num_comunes):
+                anexos.append(self._anexo_aleatorio(f"anexo_{indice + 1}.pdf"))
+            descarga = {
+                "resultado": self._resultado(),
+                "factura": {
+                    "numero": numero,
+                    "serie": serie,
+                    "importe": importe,
+                    "proveedor": proveedor,
+                    "nombre": f"factura-{numero_registro}.xml",
+                    "factura": base64.b64encode(facturae.encode("utf-8")).decode(
+                        "ascii"
+                    ),
+                    "mime": "application/xml",
+                    "anexos": {"AnexoFile": anexos},
+                },
+            }
+        else:
+            descarga = {
+                "resultado": self._resultado(
+                    "502",
+                    "La factura ya ha sido recibida en destino por el RCF, no se puede descargar",
+                ),
+                "factura": None,
+            }
+        self._escribir(f"descargarFactura.{numero_registro}", descarga)
+
+        self._escribir(
+            f"confirmarDescargaFactura.{oficina}.{numero_registro}",
+            {
+                "resultado": self._resultado(),
+                "factura": {
+                    "numeroRegistro": numero_registro,
+                    "oficinaContable": oficina,
+                    "codigo": "1300",
+                },
+            },
+        )
+
+        cambio = {
+            "resultado": self._resultado(),
+            "factura": {"numeroRegistro": numero_registro, "codigo": None},
+        }
+        self._escribir(f"cambiarEstadoFactura.{oficina}.{numero_registro}", cambio)
+        self._escribir(
+            f"gestionarSolicitudAnulacionFactura.{oficina}.{numero_registro}", cambio
+        )
+
+        self._escribir(
+            f"consultarListadoFacturas.{numero_registro}",
+            {
+                "resultado": self._resultado(),
+                "facturas": {
+                    "consultarListadoFacturas": [
+                        {
+                            "codigo": "0",
+                            "descripcion": "Correcto",
+                            "factura": {
+                                "numeroRegistro": numero_registro,
+                                "tramitacion": {
+                                    "codigo": factura.tramitacion,
+                                    "descripcion": DESCRIPCION_ESTADOS[
+                                        factura.tramitacion
+                                    ],
+                                    "motivo": None,
+                                },
+                                "anulacion": {
+                                    "codigo": factura.anulacion,
+                                    "descripcion": DESCRIPCION_ESTADOS[
+                                        factura.anulacion
+                                    ],
+                                    "motivo": None,
+                                },
+                            },
+                        }
+                    ]
+                },
+            },
+        )
+
+        codigo_rcf = None
+        if factura.tramitacion != "1200":
+            codigo_rcf = f"{numero_registro[4:]}/F/{numero_registro[:4]}"
+        rcf = {"resultado": self._resultado(), "codigoRCF": codigo_rcf}
+        self._escribir(f"consultarCodigoRCF.{numero_registro}", rcf)
+        self._escribir(f"cambiarCodigoRCF.{numero_registro}", rcf)
+
+        if factura.cesion is not None:
+            self._resumen["cesiones"] += 1
+            self._escribir(
+                f"consultarEstadoCesion.{numero_registro}",
+                {
+                    "resultado": self._resultado(),
+                    "cesion": {
+                        "numeroRegistro": numero_registro,
+                        "estado": factura.cesion,
+                        "comentario": None,
+                    },
+                },
+            )
+            self._escribir(
+                f"gestionarCesion.{numero_registro}",
+                {
+                    "resultado": self._resultado(),
+                    "cesion": {
+                        "numeroRegistro": numero_registro,
+                        "codigo": factura.cesion,
+                        "comentario": None,
+                    },
+                },
+            )
+            documento = self._anexo_aleatorio(f"cesion-{numero_registro}.pdf")
+            self._escribir(
+                f"obtenerDocumentoCesion.CSV{numero_registro}.CGN."
+                + ".".join(SOLICITANTE),
+                {
+                    "resultado": self._resultado(),
+                    "documento": {
+                        "numeroRegistro": numero_registro,
+                        "documento": documento["anexo"],
+                        "nombre": documento["nombre"],
+                        "mime": documento["mime"],
+                    },
+                },
+            )
@@ -0,0 +1,217 @@
+"""
+Perfiles de latencia e inyección de fallos para conexiones simuladas
+"""
+
+import json
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from .objects import FACeResult
+
+DESCRIPCION_ERRORES = {
+    "001": "Error no determinado (simulado)",
+    "1": "Error en la verificación de seguridad SOAP (simulado)",
+    "2": "Error en la verificación con Afirma (simulado)",
+}
+
+
+class FakeProfile:
+    """Perfil de comportamiento para `FACeFakeSoapClient`.
+
+    Permite configurar por operación la latencia de las respuestas, su
+    variabilidad, la limitación de peticiones por unidad de tiempo y la
+    probabilidad de que se produzcan errores o agotamientos de tiempo de
+    espera, de forma que puedan evaluarse offline estrategias de
+    concurrencia, reintentos y tiempos de espera.
+
+    El perfil se define mediante un diccionario, normalmente cargado
+    desde un archivo JSON, con la siguiente estructura::
+
+        {
+            "semilla": 1,
+            "defecto": {
+                "latencia": {"distribucion": "normal", "media": 0.3, "desviacion": 0.1},
+                "jitter": 0.05,
+                "errores": {"001": 0.01, "101": 0.001, "timeout": 0.005},
+                "timeout": 30,
+                "limite": {"peticiones": 10, "periodo": 1, "codigo": "001"}
+            },
+            "operaciones": {
+                "descargarFactura": {
+                    "latencia": {"distribucion": "lognormal", "mediana": 1.2, "sigma": 0.5}
+                }
+            }
+        }
+
+    Las claves de `operaciones` son los nombres de los métodos SOAP de
+    FACe y sus valores sustituyen clave a clave a los de `defecto`.
+
+    Las distribuciones de latencia admitidas son `fija` (`valor`),
+    `uniforme` (`minimo`, `maximo`), `normal` (`media`, `desviacion`),
+    `lognormal` (`mediana`, `sigma`) y `exponencial` (`media`), todas
+    ellas en segundos.
+
+    En `errores` se indica la probabilidad de cada código de error FACe
+    a simular. El código especial `timeout` simula que la petición no
+    obtiene respuesta: se espera el tiempo indicado en `timeout` y se
+    lanza `TimeoutError`.
+
+    Si se define `limite`, las peticiones que excedan el número indicado
+    dentro del periodo fallan con el código de error `codigo` o, si este
+    no se indica, esperan hasta disponer de turno.
+    """
+
+    def __init__(self, profile: dict):
+        """Constructor
+
+        Parameters
+        ----------
+        profile : dict
+            Definición del perfil
+        """
+
+        self._defecto = profile.get("defecto", {})
+        self._operaciones = profile.get("operaciones", {})
+        self._rng = random.Random(profile.get("semilla"))
+        self._lock = threading.Lock()
+        self._peticiones: dict[str, deque] = {}
+
+    @classmethod
+    def from_file(cls, path: Path) -> "FakeProfile":
+        """Crea un perfil a partir de un archivo JSON.
+
+        Parameters
+        ----------
+        path : Path
+            Ruta del archivo con la definición del perfil
+        """
+
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _config(self, operacion: str) -> dict:
+        """Devuelve la configuración efectiva de una operación."""
+
+        config = dict(self._defecto)
+        config.update(self._operaciones.get(operacion, {}))
+        return config
+
+    def _latencia(self, config: dict) -> float:
+        """Obtiene una muestra de la latencia configurada."""
+
+        latencia = config.get("latencia")
+        segundos = 0.0
+        with self._lock:
+            if latencia is not None:
+                distribucion = latencia.get("distribucion", "fija")
+                if distribucion == "fija":
+                    segundos = latencia["valor"]
+                elif distribucion == "uniforme":
+                    segundos = self._rng.uniform(latencia["minimo"], latencia["maximo"])
+                elif distribucion == "normal":
+                    segundos = self._rng.gauss(
+                        latencia["media"], latencia["desviacion"]
+                    )
+                elif distribucion == "lognormal":
+                    segundos = latencia["mediana"] * self._rng.lognormvariate(
+                        0, latencia["sigma"]
+                    )
+                elif distribucion == "exponencial":
+                    segundos = self._rng.expovariate(1 / latencia["media"])
+                else:
+                    raise ValueError(
+                        f"Distribución de latencia desconocida: {distribucion}"
+                    )
+            jitter = config.get("jitter", 0)
+            if jitter:
+                segundos += self._rng.uniform(-jitter, jitter)
+        return max(segundos, 0.0)
+
+    def _error(self, config: dict) -> str | None:
+        """Sortea si la petición debe fallar y con qué código."""
+
+        with self._lock:
+            sorteo = self._rng.random()
+        acumulado = 0.0
+        for codigo, probabilidad in config.get("errores", {}).items():
+            acumulado += probabilidad
+            if sorteo < acumulado:
+                return codigo
+        return None
+
+    def _esperar_turno(self, operacion: str, config: dict) -> str | None:
+        """Aplica la limitación de peticiones de la operación.
+
+        Returns
+        -------
+        str | None
+            código de error a simular si la petición excede el límite y
+            el perfil indica que debe rechazarse
+        """
+
+        limite = config.get("limite")
+        if limite is None:
+            return None
+
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                peticiones = self._peticiones.setdefault(operacion, deque())
+                while peticiones and ahora - peticiones[0] >= limite["periodo"]:
+                    peticiones.popleft()
+                if len(peticiones) < limite["peticiones"]:
+                    peticiones.append(ahora)
+                    return None
+                if limite.get("codigo"):
+                    return limite["codigo"]
+                espera = limite["periodo"] - (ahora - peticiones[0])
+            time.sleep(espera)
+
+    def simular(self, operacion: str) -> FACeResult | None:
+        """Aplica el perfil a una petición de la operación indicada.
+
+        Espera el tiempo de latencia sorteado y, si corresponde simular
+        un error, devuelve la cabecera de resultado con el código de
+        error para que sea tratada como una respuesta de FACe.
+
+        Parameters
+        ----------
+        operacion : str
+            Nombre del método SOAP de FACe
+
+        Returns
+        -------
+        FACeResult | None
+            cabecera de resultado con el error a simular o None si la
+            petición debe completarse normalmente
+
+        Raises
+        ------
+        TimeoutError
+            Si se simula que la petición no obtiene respuesta.
+        """
+
+        config = self._config(operacion)
+
+        codigo = self._esperar_turno(operacion, config)
+        if codigo is None:
+            codigo = self._error(config)
+
+        if codigo == "timeout":
+            time.sleep(config.get("timeout", 0))
+            raise TimeoutError(
+                f"Tiempo de espera agotado en la petición {operacion} (simulado)"
+            )
+
+        time.sleep(self._latencia(config))
+
+        if codigo is None:
+            return None
+
+        descripcion = DESCRIPCION_ERRORES.get(
+            codigo, DESCRIPCION_ERRORES.get(codigo[0], "Error de gestión (simulado)")
+        )
+        return FACeResult(codigo, descripcion, None)
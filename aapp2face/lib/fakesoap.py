@@ -7,11 +7,15 @@ from pathlib import Path
 
 from . import exceptions
 from .client import FACeClient
+from .fakeprofile import FakeProfile
+from .hooks import ClientHook, current_call
 from .objects import (
     FACeResult,
     PeticionCambiarEstadoFactura,
     PeticionSolicitudAnulacionListadoFactura,
 )
+from .retry import RetryPolicy
+from .throttle import CircuitBreaker, RateLimiter
 
 FILE_RESPONSE_EXTENSION = "json"
 
@@ -19,22 +23,45 @@ FILE_RESPONSE_EXTENSION = "json"
 class FACeFakeSoapClient(FACeClient):
     """Clase del conector FACe para simulación a partir de archivos preconfigurados."""
 
-    def __init__(self, responses_path: Path):
+    def __init__(
+        self,
+        responses_path: Path,
+        profile: FakeProfile | None = None,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: RateLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        hooks: list[ClientHook] | None = None,
+    ):
         """Constructor
 
         Parameters
         ----------
         responses_path : Path
             Ruta de los archivos respuesta preconfigurados
+        profile : FakeProfile, optional
+            Perfil de latencia e inyección de fallos a aplicar a las
+            respuestas. Default: None
+        retry_policy : RetryPolicy, optional
+            Política de reintentos ante fallos transitorios. Default: None
+        rate_limiter : RateLimiter, optional
+            Limitador del ritmo de peticiones. Default: None
+        circuit_breaker : CircuitBreaker, optional
+            Cortocircuito ante fallos continuados. Default: None
+        hooks : list[ClientHook], optional
+            Ganchos de instrumentación de las llamadas. Default: None
         """
 
-        super().__init__()
+        super().__init__(retry_policy, rate_limiter, circuit_breaker, hooks)
         self._responses_path = responses_path
+        self._profile = profile
         self._set_suffix = f".{FILE_RESPONSE_EXTENSION}"
 
     def _import_response(self, filename_prefix: str) -> dict:
         """Importa un archivo preconfigurado que simula respuesta FACe
 
+        La importación se realiza a través de `_invocar`, de modo que
+        recibe el mismo tratamiento que una llamada real a FACe.
+
         Parameters
         ----------
         filename_prefix : str
@@ -48,7 +75,43 @@ class FACeFakeSoapClient(FACeClient):
             Si el archivo a importar no existe.
         """
 
-        file = Path(self._responses_path).joinpath(filename_prefix + self._set_suffix)
+        operacion = filename_prefix.split(".")[0]
+        return self._invocar(
+            operacion,
+            self._load_response,
+            filename_prefix,
+            call_args=filename_prefix.split(".")[1:],
+        )
+
+    def _load_response(self, filename_prefix: str) -> dict:
+        """Carga un archivo preconfigurado que simula respuesta FACe
+
+        Parameters
+        ----------
+        filename_prefix : str
+            Prefijo del archivo a importar. Normalmente será el nombre del
+            método FACe a simular seguido de los parámetros separados por
+            puntos.
+        """
+
+        self._simular_perfil(filename_prefix.split(".")[0])
+        return self._read_response(filename_prefix)
+
+    def _simular_perfil(self, operacion: str) -> None:
+        """Aplica el perfil de latencia e inyección de fallos, si lo hay."""
+
+        if self._profile is not None:
+            simulado = self._profile.simular(operacion)
+            if simulado is not None:
+                self._verify_result_header(simulado)
+
+    def _response_file(self, filename_prefix: str) -> Path:
+        return Path(self._responses_path).joinpath(filename_prefix + self._set_suffix)
+
+    def _read_response(self, filename_prefix: str) -> dict:
+        """Lee un archivo preconfigurado y verifica su cabecera de resultado."""
+
+        file = self._response_file(filename_prefix)
 
         if not file.exists():
             raise exceptions.FACeManagementException(
@@ -56,9 +119,17 @@ class FACeFakeSoapClient(FACeClient):
                 f"No existe archivo con respuesta para simular la petición ([data]'{filename_prefix + self._set_suffix}'[/data])",
             )
 
+        info = current_call()
+        if info is not None:
+            info.add_phase("network", info.lap())
+            info.recibidos += file.stat().st_size
+
         with open(file, "r", encoding="utf-8") as f:
             data = json.load(f)
 
+        if info is not None:
+            info.add_phase("deserialize", info.lap())
+
         result_header = FACeResult(
             data["resultado"]["codigo"],
             data["resultado"]["descripcion"],
@@ -109,11 +180,63 @@ class FACeFakeSoapClient(FACeClient):
         return self._import_response(f"consultarListadoFacturas.{numero_registro}")
 
     def consultar_listado_facturas(self, numeros_registro: list[str]):
-        """Simula una llamada al método `consultarListadoFacturas` en FACe."""
+        """Simula una llamada al método `consultarListadoFacturas` en FACe.
 
-        str_numeros_registro = ".".join(numeros_registro)
+        Si no existe un archivo para el listado completo, la respuesta se
+        compone con las respuestas de cada factura por separado, como las
+        que genera `FakeDataGenerator`. Las facturas sin respuesta se
+        devuelven con el error 511, igual que en FACe.
+        """
+
+        filename_prefix = f"consultarListadoFacturas.{'.'.join(numeros_registro)}"
+        if len(numeros_registro) > 1:
+            try:
+                existe = self._response_file(filename_prefix).is_file()
+            except OSError:
+                # Nombre de archivo demasiado largo para el sistema
+                existe = False
+            if not existe:
+                return self._invocar(
+                    "consultarListadoFacturas",
+                    self._load_listado,
+                    numeros_registro,
+                    call_args=[numeros_registro],
+                )
+
+        return self._import_response(filename_prefix)
 
-        return self._import_response(f"consultarListadoFacturas.{str_numeros_registro}")
+    def _load_listado(self, numeros_registro: list[str]) -> dict:
+        """Compone la respuesta de `consultarListadoFacturas` con las
+        respuestas de cada factura."""
+
+        self._simular_perfil("consultarListadoFacturas")
+        facturas = []
+        for numero_registro in numeros_registro:
+            filename_prefix = f"consultarListadoFacturas.{numero_registro}"
+            if self._response_file(filename_prefix).is_file():
+                data = self._read_response(filename_prefix)
+                facturas.extend(data["facturas"]["consultarListadoFacturas"])
+            else:
+                facturas.append(
+                    {
+                        "codigo": "511",
+                        "descripcion": "La factura no existe o no tiene permisos",
+                        "factura": {
+                            "numeroRegistro": numero_registro,
+                            "tramitacion": None,
+                            "anulacion": None,
+                        },
+                    }
+                )
+
+        return {
+            "resultado": {
+                "codigo": "0",
+                "descripcion": "Correcto",
+                "codigoSeguimiento": None,
+            },
+            "facturas": {"consultarListadoFacturas": facturas},
+        }
 
     def cambiar_estado_factura(
         self, oficina_contable: str, numero_registro: str, codigo: str, comentario: str
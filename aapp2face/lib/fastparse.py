@@ -0,0 +1,218 @@
+"""
+Módulo de interpretación rápida de respuestas SOAP de listados
+
+Interpreta directamente con `lxml.etree.iterparse` las respuestas de los
+métodos que devuelven listados de hasta 500 facturas, construyendo los
+objetos de resultado sin pasar por el grafo de objetos genérico de
+zeep.
+"""
+
+import io
+from dataclasses import dataclass
+from typing import Callable
+
+from lxml import etree
+from zeep.exceptions import DTDForbidden, Fault
+
+from .objects import (
+    ConsultarEstadoFactura,
+    ConsultarFactura,
+    FACeItemResult,
+    FACeResult,
+    NuevaFactura,
+    intern_text,
+)
+
+XSI_NIL = "{http://www.w3.org/2001/XMLSchema-instance}nil"
+SOAP_FAULT = "{http://schemas.xmlsoap.org/soap/envelope/}Fault"
+
+
+@dataclass(slots=True)
+class ParsedResult:
+    """Respuesta de FACe ya convertida en objetos de resultado.
+
+    Attributes
+    ----------
+    resultado : FACeResult
+        Cabecera de resultado de la respuesta
+    items : list
+        Elementos del listado devueltos por FACe
+    """
+
+    resultado: FACeResult
+    items: list
+
+
+def _localname(element: etree._Element) -> str:
+    return etree.QName(element).localname
+
+
+def _children(element: etree._Element) -> dict[str, etree._Element]:
+    return {_localname(child): child for child in element if isinstance(child.tag, str)}
+
+
+def _text(element: etree._Element | None) -> str | None:
+    if element is None or element.get(XSI_NIL) in ("true", "1"):
+        return None
+    return element.text
+
+
+def _estado(element: etree._Element | None) -> ConsultarEstadoFactura | None:
+    if element is None or element.get(XSI_NIL) in ("true", "1"):
+        return None
+    hijos = _children(element)
+    return ConsultarEstadoFactura.compartido(
+        _text(hijos.get("codigo")),
+        _text(hijos.get("descripcion")),
+        _text(hijos.get("motivo")),
+    )
+
+
+def _consultar_factura(hijos: dict) -> ConsultarFactura | FACeItemResult:
+    factura = _children(hijos["factura"])
+    numero_registro = _text(factura.get("numeroRegistro"))
+    codigo = _text(hijos["codigo"])
+    if codigo == "0":
+        return ConsultarFactura(
+            numero_registro,
+            _estado(factura.get("tramitacion")),
+            _estado(factura.get("anulacion")),
+        )
+    return FACeItemResult(
+        intern_text(codigo), intern_text(_text(hijos["descripcion"])), numero_registro
+    )
+
+
+def _nueva_factura(hijos: dict) -> NuevaFactura:
+    return NuevaFactura(
+        _text(hijos["numeroRegistro"]),
+        intern_text(_text(hijos["oficinaContable"])),
+        intern_text(_text(hijos["organoGestor"])),
+        intern_text(_text(hijos["unidadTramitadora"])),
+        _text(hijos["fechaHoraRegistro"]),
+    )
+
+
+def _fault(element: etree._Element) -> Fault:
+    """Construye la excepción de un SOAP Fault del mismo modo que zeep."""
+
+    def texto(nombre: str) -> str | None:
+        hijo = element.find(nombre)
+        return hijo.text if hijo is not None else None
+
+    return Fault(
+        message=texto("faultstring"),
+        code=texto("faultcode"),
+        actor=texto("faultactor"),
+        detail=element.find("detail"),
+    )
+
+
+def _parse(
+    content: bytes, campos: set[str], construir: Callable[[dict], object]
+) -> ParsedResult:
+    """Recorre la respuesta construyendo un objeto por cada elemento del
+    listado, identificado por contener los campos indicados.
+
+    Si la respuesta es un SOAP Fault lanza `zeep.exceptions.Fault`. Las
+    respuestas con DTD se rechazan con `zeep.exceptions.DTDForbidden`
+    y las entidades no se resuelven nunca.
+    """
+
+    resultado = None
+    items = []
+    comprobado = False
+    for _, element in etree.iterparse(
+        io.BytesIO(content),
+        events=("end",),
+        resolve_entities=False,
+        no_network=True,
+    ):
+        if not comprobado:
+            # La DTD precede al elemento raíz: basta con el primer evento
+            docinfo = element.getroottree().docinfo
+            if docinfo.doctype:
+                raise DTDForbidden(
+                    docinfo.doctype, docinfo.system_url, docinfo.public_id
+                )
+            comprobado = True
+        if element.tag == SOAP_FAULT:
+            raise _fault(element)
+        nombre = _localname(element)
+        if nombre == "resultado" and resultado is None:
+            hijos = _children(element)
+            resultado = FACeResult(
+                _text(hijos.get("codigo")),
+                _text(hijos.get("descripcion")),
+                _text(hijos.get("codigoSeguimiento")),
+            )
+            element.clear()
+            continue
+        if len(element) < len(campos):
+            continue
+        hijos = _children(element)
+        if campos <= hijos.keys():
+            items.append(construir(hijos))
+            # Libera los elementos ya procesados
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    if resultado is None:
+        raise ValueError("La respuesta SOAP no contiene cabecera de resultado")
+    return ParsedResult(resultado, items)
+
+
+def parse_consultar_listado_facturas(content: bytes) -> ParsedResult:
+    """Interpreta la respuesta SOAP de `consultarListadoFacturas`.
+
+    Parameters
+    ----------
+    content : bytes
+        Sobre SOAP de la respuesta
+
+    Returns
+    -------
+    ParsedResult
+        cabecera de resultado y lista de `ConsultarFactura` o
+        `FACeItemResult`
+
+    Raises
+    ------
+    zeep.exceptions.Fault
+        Si la respuesta es un SOAP Fault.
+    """
+
+    return _parse(content, {"codigo", "descripcion", "factura"}, _consultar_factura)
+
+
+def parse_solicitar_nuevas_facturas(content: bytes) -> ParsedResult:
+    """Interpreta la respuesta SOAP de `solicitarNuevasFacturas`.
+
+    Parameters
+    ----------
+    content : bytes
+        Sobre SOAP de la respuesta
+
+    Returns
+    -------
+    ParsedResult
+        cabecera de resultado y lista de `NuevaFactura`
+
+    Raises
+    ------
+    zeep.exceptions.Fault
+        Si la respuesta es un SOAP Fault.
+    """
+
+    return _parse(
+        content,
+        {
+            "numeroRegistro",
+            "oficinaContable",
+            "organoGestor",
+            "unidadTramitadora",
+            "fechaHoraRegistro",
+        },
+        _nueva_factura,
+    )
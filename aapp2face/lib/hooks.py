@@ -0,0 +1,120 @@
+"""
+Módulo de ganchos de instrumentación de las llamadas a FACe
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+ARG_SUMMARY_LENGTH = 64
+
+_local = threading.local()
+
+
+def summarize_arg(arg: Any) -> str:
+    """Devuelve una representación breve de un argumento de llamada.
+
+    Las cadenas largas se recortan indicando su longitud, de modo que
+    las facturas en base64 u otros contenidos grandes no se copien en
+    las trazas.
+    """
+
+    if isinstance(arg, (list, tuple)):
+        return f"[{len(arg)} elementos]"
+    if isinstance(arg, dict):
+        return "{" + ", ".join(str(clave) for clave in arg) + "}"
+    texto = str(arg)
+    if len(texto) > ARG_SUMMARY_LENGTH:
+        return f"{texto[:ARG_SUMMARY_LENGTH]}... ({len(texto)} caracteres)"
+    return texto
+
+
+@dataclass
+class CallInfo:
+    """Información de un intento de llamada a FACe.
+
+    Las fases registradas por los conectores son `serialize`, `sign`,
+    `network` y `deserialize`. En el conector de simulación la fase
+    `network` corresponde a la latencia simulada.
+    """
+
+    operacion: str
+    args: list[str]
+    intento: int = 1
+    inicio: float = field(default_factory=time.time)
+    duracion: float = 0.0
+    espera: float = 0.0
+    fases: dict[str, float] = field(default_factory=dict)
+    enviados: int = 0
+    recibidos: int = 0
+    resultado: Any = None
+    error: BaseException | None = None
+    _vuelta: float = field(default_factory=time.perf_counter, repr=False)
+
+    def add_phase(self, nombre: str, segundos: float) -> None:
+        """Acumula tiempo en una fase de la llamada."""
+
+        self.fases[nombre] = self.fases.get(nombre, 0.0) + segundos
+
+    def lap(self) -> float:
+        """Devuelve los segundos transcurridos desde la vuelta anterior."""
+
+        ahora = time.perf_counter()
+        segundos, self._vuelta = ahora - self._vuelta, ahora
+        return segundos
+
+
+class ClientHook:
+    """Interfaz de los ganchos de instrumentación de `FACeClient`.
+
+    Los ganchos reciben la información de cada intento de llamada a
+    FACe antes de realizarla, tras completarla con éxito y si falla.
+    Las excepciones producidas por un gancho se propagan al llamante.
+    """
+
+    def before_call(self, info: CallInfo) -> None:
+        """Se invoca antes de realizar la llamada."""
+
+    def after_call(self, info: CallInfo) -> None:
+        """Se invoca tras completar la llamada con éxito."""
+
+    def on_error(self, info: CallInfo) -> None:
+        """Se invoca si la llamada falla, con la excepción en `info.error`."""
+
+
+def current_call() -> CallInfo | None:
+    """Devuelve la llamada a FACe en curso en el hilo actual."""
+
+    return getattr(_local, "call", None)
+
+
+@contextmanager
+def call_context(info: CallInfo):
+    """Establece la llamada en curso en el hilo actual."""
+
+    anterior = current_call()
+    _local.call = info
+    try:
+        yield info
+    finally:
+        _local.call = anterior
+
+
+@contextmanager
+def phase(nombre: str):
+    """Mide el tiempo de un bloque como fase de la llamada en curso.
+
+    Si no hay ninguna llamada en curso el bloque se ejecuta sin medir.
+    """
+
+    info = current_call()
+    if info is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        info.add_phase(nombre, time.perf_counter() - inicio)
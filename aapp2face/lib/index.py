@@ -0,0 +1,318 @@
+"""
+Módulo del índice local de facturas descargadas
+"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+from lxml import etree
+
+from .encoding import b64decode_chunks
+from .objects import DescargaFactura, NuevaFactura
+
+INDEX_DB_FILENAME = ".facturas.sqlite"
+
+# Caracteres base64 decodificados en cada bloque al leer la cabecera de
+# las facturas, que suele ocupar los primeros kilobytes del documento
+FACTURAE_CHUNK_SIZE = 16 * 1024
+
+INDEX_FIELDS = [
+    "numero_registro",
+    "numero",
+    "serie",
+    "importe",
+    "proveedor",
+    "nombre_proveedor",
+    "fecha_expedicion",
+    "fecha_registro",
+    "oficina_contable",
+    "organo_gestor",
+    "unidad_tramitadora",
+    "nombre",
+    "fecha_descarga",
+]
+"""Columnas del índice"""
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS facturas (
+    numero_registro TEXT PRIMARY KEY,
+    numero TEXT,
+    serie TEXT,
+    importe TEXT,
+    proveedor TEXT,
+    nombre_proveedor TEXT,
+    fecha_expedicion TEXT,
+    fecha_registro TEXT,
+    oficina_contable TEXT,
+    organo_gestor TEXT,
+    unidad_tramitadora TEXT,
+    nombre TEXT,
+    fecha_descarga TEXT
+);
+CREATE INDEX IF NOT EXISTS facturas_proveedor ON facturas (proveedor);
+CREATE INDEX IF NOT EXISTS facturas_fecha_expedicion ON facturas (fecha_expedicion);
+CREATE VIRTUAL TABLE IF NOT EXISTS facturas_fts USING fts5 (
+    numero, serie, proveedor, nombre_proveedor,
+    content='facturas', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS facturas_ai AFTER INSERT ON facturas BEGIN
+    INSERT INTO facturas_fts (rowid, numero, serie, proveedor, nombre_proveedor)
+    VALUES (new.rowid, new.numero, new.serie, new.proveedor, new.nombre_proveedor);
+END;
+CREATE TRIGGER IF NOT EXISTS facturas_ad AFTER DELETE ON facturas BEGIN
+    INSERT INTO facturas_fts (facturas_fts, rowid, numero, serie, proveedor, nombre_proveedor)
+    VALUES ('delete', old.rowid, old.numero, old.serie, old.proveedor, old.nombre_proveedor);
+END;
+CREATE TRIGGER IF NOT EXISTS facturas_au AFTER UPDATE ON facturas BEGIN
+    INSERT INTO facturas_fts (facturas_fts, rowid, numero, serie, proveedor, nombre_proveedor)
+    VALUES ('delete', old.rowid, old.numero, old.serie, old.proveedor, old.nombre_proveedor);
+    INSERT INTO facturas_fts (rowid, numero, serie, proveedor, nombre_proveedor)
+    VALUES (new.rowid, new.numero, new.serie, new.proveedor, new.nombre_proveedor);
+END;
+"""
+
+
+def _texto(elemento: etree._Element, ruta: str) -> str | None:
+    encontrado = elemento.find(ruta)
+    if encontrado is None or not encontrado.text:
+        return None
+    return encontrado.text.strip()
+
+
+def _nombre_vendedor(vendedor: etree._Element) -> str | None:
+    nombre = _texto(vendedor, "LegalEntity/CorporateName")
+    if nombre is None:
+        partes = [
+            _texto(vendedor, f"Individual/{campo}")
+            for campo in ("Name", "FirstSurname", "SecondSurname")
+        ]
+        nombre = " ".join(parte for parte in partes if parte) or None
+    return nombre
+
+
+def datos_facturae(contenido: bytes | Iterable[bytes]) -> dict[str, str | None]:
+    """Extrae los datos del proveedor y la fecha de expedición de una
+    factura en formato Facturae.
+
+    Solo se interpreta la cabecera del documento: la lectura termina al
+    llegar a los datos de expedición de la primera factura, sin procesar
+    las líneas, los anexos ni la firma.
+
+    Parameters
+    ----------
+    contenido : bytes | Iterable[bytes]
+        Documento de la factura, completo o por bloques
+
+    Returns
+    -------
+    dict[str, str | None]
+        `nombre_proveedor` y `fecha_expedicion`, o un diccionario vacío
+        si el documento no es una factura Facturae
+    """
+
+    if isinstance(contenido, bytes):
+        contenido = [contenido]
+    parser = etree.XMLPullParser(
+        events=("end",), resolve_entities=False, no_network=True, huge_tree=True
+    )
+    vendedor = None
+    try:
+        for bloque in contenido:
+            parser.feed(bloque)
+            for _, elemento in parser.read_events():
+                if not isinstance(elemento.tag, str):
+                    continue
+                padre = elemento.getparent()
+                if padre is None:
+                    continue
+                ruta = (etree.QName(padre).localname, etree.QName(elemento).localname)
+                if ruta == ("Parties", "SellerParty"):
+                    vendedor = elemento
+                elif ruta == ("Invoice", "InvoiceIssueData"):
+                    if vendedor is None:
+                        return {}
+                    return {
+                        "nombre_proveedor": _nombre_vendedor(vendedor),
+                        "fecha_expedicion": _texto(elemento, "IssueDate"),
+                    }
+    except etree.XMLSyntaxError:
+        pass
+    return {}
+
+
+class InvoiceIndex:
+    """Índice local de las facturas descargadas.
+
+    Las facturas se guardan en una base de datos SQLite con un índice de
+    texto completo sobre su número, serie y proveedor, de modo que se
+    puede comprobar si una factura ya se ha descargado sin consultar a
+    FACe ni recorrer el directorio de descargas. La base de datos no se
+    abre ni se crea hasta el primer uso del índice.
+    """
+
+    def __init__(self, path: Path):
+        """Constructor
+
+        Parameters
+        ----------
+        path : Path
+            Archivo de la base de datos del índice
+        """
+
+        self.path = Path(path)
+        self._conexion_abierta: sqlite3.Connection | None = None
+
+    @property
+    def _conexion(self) -> sqlite3.Connection:
+        """Conexión con la base de datos, que se abre, creándola si no
+        existe, en el primer uso del índice."""
+
+        if self._conexion_abierta is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conexion = sqlite3.connect(self.path)
+            conexion.row_factory = sqlite3.Row
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.executescript(_ESQUEMA)
+            self._conexion_abierta = conexion
+        return self._conexion_abierta
+
+    def indexar(
+        self,
+        numero_registro: str,
+        factura: DescargaFactura,
+        nueva_factura: NuevaFactura | None = None,
+    ) -> None:
+        """Añade o actualiza una factura en el índice.
+
+        Los cambios no se guardan hasta llamar a `commit`.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        factura : DescargaFactura
+            Factura descargada, de cuyo documento se extraen además los
+            datos del proveedor y la fecha de expedición
+        nueva_factura : NuevaFactura | None
+            Datos de registro de la factura, si se conocen. Default:
+            None
+        """
+
+        registro = {
+            "numero_registro": numero_registro,
+            "numero": factura.numero,
+            "serie": factura.serie,
+            "importe": factura.importe,
+            "proveedor": factura.proveedor,
+            "nombre_proveedor": None,
+            "fecha_expedicion": None,
+            "fecha_registro": None,
+            "oficina_contable": None,
+            "organo_gestor": None,
+            "unidad_tramitadora": None,
+            "nombre": factura.nombre,
+            "fecha_descarga": datetime.now().isoformat(timespec="seconds"),
+        }
+        if nueva_factura is not None:
+            registro["fecha_registro"] = nueva_factura.fecha_hora_registro
+            registro["oficina_contable"] = nueva_factura.oficina_contable
+            registro["organo_gestor"] = nueva_factura.organo_gestor
+            registro["unidad_tramitadora"] = nueva_factura.unidad_tramitadora
+        registro.update(
+            datos_facturae(b64decode_chunks(factura.factura, FACTURAE_CHUNK_SIZE))
+        )
+
+        columnas = ", ".join(INDEX_FIELDS)
+        valores = ", ".join(f":{campo}" for campo in INDEX_FIELDS)
+        # Los datos de registro desconocidos no sustituyen a los indexados
+        actualizacion = ", ".join(
+            f"{campo} = coalesce(excluded.{campo}, {campo})"
+            for campo in INDEX_FIELDS[1:]
+        )
+        self._conexion.execute(
+            f"INSERT INTO facturas ({columnas}) VALUES ({valores}) "
+            f"ON CONFLICT (numero_registro) DO UPDATE SET {actualizacion}",
+            registro,
+        )
+
+    def commit(self) -> None:
+        """Guarda los cambios realizados en el índice."""
+
+        if self._conexion_abierta is not None:
+            self._conexion_abierta.commit()
+
+    def buscar(
+        self,
+        texto: str | None = None,
+        proveedor: str | None = None,
+        numero: str | None = None,
+        oficina_contable: str | None = None,
+        desde: str | None = None,
+        hasta: str | None = None,
+    ) -> list[dict]:
+        """Busca facturas en el índice.
+
+        Parameters
+        ----------
+        texto : str | None
+            Texto a buscar en el número, serie, NIF o nombre del
+            proveedor, con la sintaxis de consulta de FTS5 de SQLite.
+            Default: None
+        proveedor : str | None
+            NIF del proveedor o parte de su nombre. Default: None
+        numero : str | None
+            Número de la factura. Default: None
+        oficina_contable : str | None
+            Código DIR3 de la oficina contable. Default: None
+        desde : str | None
+            Fecha de expedición mínima, con formato `AAAA-MM-DD`.
+            Default: None
+        hasta : str | None
+            Fecha de expedición máxima, con formato `AAAA-MM-DD`.
+            Default: None
+
+        Returns
+        -------
+        list[dict]
+            facturas encontradas, ordenadas por fecha de expedición
+        """
+
+        condiciones = []
+        parametros = []
+        if texto:
+            condiciones.append(
+                "rowid IN (SELECT rowid FROM facturas_fts WHERE facturas_fts MATCH ?)"
+            )
+            parametros.append(texto)
+        if proveedor:
+            condiciones.append("(proveedor = ? OR nombre_proveedor LIKE ?)")
+            parametros.extend([proveedor, f"%{proveedor}%"])
+        if numero:
+            condiciones.append("numero = ?")
+            parametros.append(numero)
+        if oficina_contable:
+            condiciones.append("oficina_contable = ?")
+            parametros.append(oficina_contable)
+        if desde:
+            condiciones.append("fecha_expedicion >= ?")
+            parametros.append(desde)
+        if hasta:
+            condiciones.append("fecha_expedicion <= ?")
+            parametros.append(hasta)
+
+        consulta = f"SELECT {', '.join(INDEX_FIELDS)} FROM facturas"
+        if condiciones:
+            consulta += " WHERE " + " AND ".join(condiciones)
+        consulta += " ORDER BY fecha_expedicion, numero_registro"
+        return [dict(fila) for fila in self._conexion.execute(consulta, parametros)]
+
+    def close(self) -> None:
+        """Guarda los cambios y cierra el índice."""
+
+        if self._conexion_abierta is not None:
+            self._conexion_abierta.commit()
+            self._conexion_abierta.close()
+            self._conexion_abierta = None
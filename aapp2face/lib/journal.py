@@ -0,0 +1,217 @@
+"""
+Módulo del diario de descargas para reanudar descargas interrumpidas
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from .storage import DirectoryStore, StoredFile
+
+JOURNAL_FILENAME = ".descargas.jsonl"
+
+
+class DownloadJournal:
+    """Diario de las descargas de facturas.
+
+    Antes de guardar los archivos de una factura se anota su inicio y,
+    cuando todos se han escrito, su fin junto con la ruta, hash y
+    tamaño de cada archivo y los datos de la factura. Cada anotación se
+    añade al final del diario y se sincroniza con el disco antes de
+    continuar, de modo que tras una interrupción se conoce qué facturas
+    se completaron y cuáles quedaron a medias.
+    """
+
+    def __init__(self, path: Path, store: DirectoryStore | None = None):
+        """Constructor
+
+        Parameters
+        ----------
+        path : Path
+            Directorio de las descargas, en el que se guarda el diario
+        store : DirectoryStore | None
+            Almacén de las descargas, usado para comprobar que los
+            archivos de una factura siguen intactos. Por defecto se
+            comprueban como archivos del directorio. Default: None
+        """
+
+        self.path = Path(path)
+        self.store = store if store is not None else DirectoryStore(self.path)
+        self.file = self.path.joinpath(JOURNAL_FILENAME)
+        self._lock = threading.Lock()
+        self._handle = None
+        self._iniciadas: set[str] = set()
+        self._completadas: dict[str, dict] = {}
+        self._cargar()
+
+    def _cargar(self) -> None:
+        if not self.file.exists():
+            return
+        with open(self.file, encoding="utf-8") as file:
+            for linea in file:
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    # Anotación truncada por una interrupción
+                    continue
+                numero_registro = registro["numero_registro"]
+                if registro["evento"] == "inicio":
+                    self._iniciadas.add(numero_registro)
+                    self._completadas.pop(numero_registro, None)
+                elif registro["evento"] == "fin":
+                    self._iniciadas.discard(numero_registro)
+                    self._completadas[numero_registro] = registro
+
+    def _anotar(self, registro: dict, sync: bool = True) -> None:
+        linea = json.dumps(registro, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._handle is None:
+                self.path.mkdir(parents=True, exist_ok=True)
+                # Permanece abierto entre anotaciones y se cierra en `close`
+                # pylint: disable-next=consider-using-with
+                self._handle = open(self.file, "a", encoding="utf-8")
+            self._handle.write(linea)
+            self._handle.flush()
+            if sync:
+                os.fsync(self._handle.fileno())
+
+    def sync(self) -> None:
+        """Sincroniza con el disco las anotaciones realizadas."""
+
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+
+    def interrumpida(self, numero_registro: str) -> bool:
+        """Indica si la descarga de una factura se inició pero no terminó.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        """
+
+        return numero_registro in self._iniciadas
+
+    def anotada(self, numero_registro: str) -> bool:
+        """Indica si la descarga de una factura figura en el diario, haya
+        terminado o no.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        """
+
+        return (
+            numero_registro in self._iniciadas or numero_registro in self._completadas
+        )
+
+    def completada(self, numero_registro: str, verify_hash: bool = False) -> bool:
+        """Indica si una factura se descargó por completo y sus archivos
+        siguen intactos.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        verify_hash : bool
+            Comprueba el hash de cada archivo además de su tamaño.
+            Default: False
+        """
+
+        registro = self._completadas.get(numero_registro)
+        if registro is None:
+            return False
+        return all(
+            self.store.verificar(
+                StoredFile(
+                    self.path.joinpath(archivo["path"]),
+                    archivo["sha256"],
+                    archivo["size"],
+                ),
+                verify_hash,
+            )
+            for archivo in registro["archivos"]
+        )
+
+    def datos(self, numero_registro: str) -> dict:
+        """Devuelve los datos anotados de una factura completada.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        """
+
+        return self._completadas[numero_registro]["datos"]
+
+    def inicio(self, numero_registro: str) -> None:
+        """Anota el inicio del guardado de los archivos de una factura.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        """
+
+        self._anotar({"evento": "inicio", "numero_registro": numero_registro})
+        self._iniciadas.add(numero_registro)
+
+    def fin(
+        self,
+        numero_registro: str,
+        archivos: list[StoredFile],
+        datos: dict,
+        sync: bool = True,
+    ) -> None:
+        """Anota el fin del guardado de los archivos de una factura.
+
+        Los archivos deben estar ya sincronizados con el disco, ya que
+        una factura anotada como completada no vuelve a descargarse.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        archivos : list[StoredFile]
+            Archivos guardados de la factura
+        datos : dict
+            Datos de la factura a conservar
+        sync : bool
+            Sincroniza la anotación con el disco. Si no se hace, debe
+            llamarse después a `sync`. Default: True
+        """
+
+        registro = {
+            "evento": "fin",
+            "numero_registro": numero_registro,
+            "archivos": [
+                {
+                    "path": os.path.relpath(archivo.path, self.path),
+                    "sha256": archivo.sha256,
+                    "size": archivo.size,
+                }
+                for archivo in archivos
+            ],
+            "datos": datos,
+        }
+        self._anotar(registro, sync)
+        self._iniciadas.discard(numero_registro)
+        self._completadas[numero_registro] = registro
+
+    def close(self) -> None:
+        """Cierra el diario."""
+
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def __enter__(self) -> "DownloadJournal":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -2,9 +2,17 @@
 Módulo principal de la librería AAPP2FACe
 """
 
-import base64
-
+import dataclasses
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from . import exceptions as excs
+from .batch import BATCH_WORKERS, ResultadoLote, ejecutar_lote
+from .cache import CessionDocumentCache
 from .client import FACeClient
+from .encoding import b64encode_file
+from .fastparse import ParsedResult
 from .objects import (
     AnexoFactura,
     CambiarEstadoFactura,
@@ -24,25 +32,48 @@ from .objects import (
     NuevaAnulacion,
     NuevaFactura,
     PeticionCambiarEstadoFactura,
+    PeticionDocumentoCesion,
     PeticionSolicitudAnulacionListadoFactura,
     Relacion,
     UnidadDir3,
+    intern_text,
 )
+from .profiling import section
+
+CONSULTAR_LISTADO_MAX = 500
+"""Número máximo de facturas por consulta de listado de facturas"""
+
+CAMBIAR_ESTADO_LISTADO_MAX = 100
+"""Número máximo de facturas por petición de cambio de estado de
+listados de facturas"""
+
+
+def _lotes(elementos: Iterable, tamano: int) -> Iterator[list]:
+    """Divide los elementos en listas de como máximo `tamano` elementos."""
+
+    iterador = iter(elementos)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
 
 
 class FACeConnection:
     """Clase principal de conexión a FACe."""
 
-    def __init__(self, client: FACeClient):
+    def __init__(
+        self, client: FACeClient, cession_cache: CessionDocumentCache | None = None
+    ):
         """Constructor
 
         Parameters
         ----------
         client : FACeClient
             Conector a usar
+        cession_cache : CessionDocumentCache, optional
+            Caché de los documentos de cesión obtenidos. Default: None
         """
 
         self._client = client
+        self._cession_cache = cession_cache
 
     def consultar_estados(self) -> list[Estado]:
         """Obtiene los estados que maneja FACe para la gestión de una factura.
@@ -64,11 +95,11 @@ class FACeConnection:
             for estado in response["estados"]["Estado"]:
                 result.append(
                     Estado(
-                        estado["flujo"],
+                        intern_text(estado["flujo"]),
                         estado["nombre"],
-                        estado["nombrePublico"],
-                        estado["codigo"],
-                        estado["descripcion"],
+                        intern_text(estado["nombrePublico"]),
+                        intern_text(estado["codigo"]),
+                        intern_text(estado["descripcion"]),
                     )
                 )
         return result
@@ -85,8 +116,23 @@ class FACeConnection:
             lista de relaciones OG-UT-OC asociadas al RCF
         """
 
+        return list(self.iter_consultar_unidades())
+
+    def iter_consultar_unidades(self) -> Iterator[Relacion]:
+        """Obtiene las relaciones OG-UT-OC asociadas al RCF de forma
+        incremental.
+
+        Versión de `consultar_unidades` que entrega cada relación según
+        se construye. La petición a FACe se realiza al comenzar la
+        iteración.
+
+        Returns
+        -------
+        Iterator[Relacion]
+            relaciones OG-UT-OC asociadas al RCF
+        """
+
         response = self._client.consultar_unidades()
-        result: list[Relacion] = []
         if response["relaciones"] is not None:
             for relacion in response["relaciones"]["OGUTOC"]:
                 organo_gestor = UnidadDir3(
@@ -101,10 +147,7 @@ class FACeConnection:
                     relacion["oficinaContable"]["nombre"],
                     relacion["oficinaContable"]["codigo"],
                 )
-                result.append(
-                    Relacion(organo_gestor, unidad_tramitadora, oficina_contable)
-                )
-        return result
+                yield Relacion(organo_gestor, unidad_tramitadora, oficina_contable)
 
     def solicitar_nuevas_facturas(
         self, oficina_contable: str = ""
@@ -130,22 +173,43 @@ class FACeConnection:
             lista de facturas que se encuentran en estado "Registrada"
         """
 
+        return list(self.iter_solicitar_nuevas_facturas(oficina_contable))
+
+    def iter_solicitar_nuevas_facturas(
+        self, oficina_contable: str = ""
+    ) -> Iterator[NuevaFactura]:
+        """Obtiene las facturas en estado "Registrada" de forma incremental.
+
+        Versión de `solicitar_nuevas_facturas` que entrega cada factura
+        según se construye. La petición a FACe se realiza al comenzar la
+        iteración.
+
+        Parameters
+        ----------
+        oficina_contable : str
+            Código DIR3 de la Oficina Contable. Si no se pasa valor
+            retornará las facturas del RCF
+
+        Returns
+        -------
+        Iterator[NuevaFactura]
+            facturas que se encuentran en estado "Registrada"
+        """
+
         response = self._client.solicitar_nuevas_facturas(oficina_contable)
-        result: list[NuevaFactura] = []
+        if isinstance(response, ParsedResult):
+            yield from response.items
+            return
         if response["facturas"] is not None:
             for factura in response["facturas"]["solicitarNuevasFacturas"]:
-                result.append(
-                    NuevaFactura(
-                        factura["numeroRegistro"],
-                        factura["oficinaContable"],
-                        factura["organoGestor"],
-                        factura["unidadTramitadora"],
-                        factura["fechaHoraRegistro"],
-                    )
+                yield NuevaFactura(
+                    factura["numeroRegistro"],
+                    intern_text(factura["oficinaContable"]),
+                    intern_text(factura["organoGestor"]),
+                    intern_text(factura["unidadTramitadora"]),
+                    factura["fechaHoraRegistro"],
                 )
 
-        return result
-
     def descargar_factura(self, numero_registro: str) -> DescargaFactura:
         """Descarga una factura.
 
@@ -218,8 +282,8 @@ class FACeConnection:
 
         return ConfirmaDescargaFactura(
             response["factura"]["numeroRegistro"],
-            response["factura"]["oficinaContable"],
-            response["factura"]["codigo"],
+            intern_text(response["factura"]["oficinaContable"]),
+            intern_text(response["factura"]["codigo"]),
         )
 
     def consultar_factura(self, numero_registro: str) -> ConsultarFactura:
@@ -240,13 +304,13 @@ class FACeConnection:
         response = self._client.consultar_factura(numero_registro)
         factura = response["factura"]
 
-        tramitacion = ConsultarEstadoFactura(
+        tramitacion = ConsultarEstadoFactura.compartido(
             factura["tramitacion"]["codigo"],
             factura["tramitacion"]["descripcion"],
             factura["tramitacion"]["motivo"],
         )
 
-        anulacion = ConsultarEstadoFactura(
+        anulacion = ConsultarEstadoFactura.compartido(
             factura["anulacion"]["codigo"],
             factura["anulacion"]["descripcion"],
             factura["anulacion"]["motivo"],
@@ -261,7 +325,8 @@ class FACeConnection:
     ) -> list[ConsultarFactura | FACeItemResult]:
         """Consulta el estado de varias facturas.
 
-        El servicio web limita a un máximo de 500 facturas la consulta.
+        El servicio web limita a un máximo de 500 facturas la consulta,
+        por lo que listados mayores se dividen en varias peticiones.
 
         Parameters
         ----------
@@ -275,39 +340,65 @@ class FACeConnection:
             lista con el estado de cada factura o incidencia al consultar
         """
 
+        return list(self.iter_consultar_listado_facturas(numeros_registro))
+
+    def iter_consultar_listado_facturas(
+        self, numeros_registro: Iterable[str]
+    ) -> Iterator[ConsultarFactura | FACeItemResult]:
+        """Consulta el estado de varias facturas de forma incremental.
+
+        Versión de `consultar_listado_facturas` que entrega el estado de
+        cada factura según se construye. Los números de registro se
+        consumen en lotes de 500, realizando cada petición a FACe cuando
+        se han entregado los resultados del lote anterior.
+
+        Parameters
+        ----------
+        numeros_registro : Iterable[str]
+            Números de registro, en el REC, de las facturas para las
+            que se quiere consultar su estado
+
+        Returns
+        -------
+        Iterator[ConsultarFactura | FACeItemResult]
+            estado de cada factura o incidencia al consultar
+        """
+
+        for lote in _lotes(numeros_registro, CONSULTAR_LISTADO_MAX):
+            yield from self._consultar_listado_facturas(lote)
+
+    def _consultar_listado_facturas(
+        self, numeros_registro: list[str]
+    ) -> Iterator[ConsultarFactura | FACeItemResult]:
         response = self._client.consultar_listado_facturas(numeros_registro)
-        result: list[ConsultarFactura | FACeItemResult] = []
+        if isinstance(response, ParsedResult):
+            yield from response.items
+            return
         if response["facturas"] is not None:
             for factura in response["facturas"]["consultarListadoFacturas"]:
                 if factura["codigo"] == "0":
-                    tramitacion = ConsultarEstadoFactura(
+                    tramitacion = ConsultarEstadoFactura.compartido(
                         factura["factura"]["tramitacion"]["codigo"],
                         factura["factura"]["tramitacion"]["descripcion"],
                         factura["factura"]["tramitacion"]["motivo"],
                     )
 
-                    anulacion = ConsultarEstadoFactura(
+                    anulacion = ConsultarEstadoFactura.compartido(
                         factura["factura"]["anulacion"]["codigo"],
                         factura["factura"]["anulacion"]["descripcion"],
                         factura["factura"]["anulacion"]["motivo"],
                     )
 
-                    result.append(
-                        ConsultarFactura(
-                            factura["factura"]["numeroRegistro"], tramitacion, anulacion
-                        )
+                    yield ConsultarFactura(
+                        factura["factura"]["numeroRegistro"], tramitacion, anulacion
                     )
                 else:
-                    result.append(
-                        FACeItemResult(
-                            factura["codigo"],
-                            factura["descripcion"],
-                            factura["factura"]["numeroRegistro"],
-                        )
+                    yield FACeItemResult(
+                        intern_text(factura["codigo"]),
+                        intern_text(factura["descripcion"]),
+                        factura["factura"]["numeroRegistro"],
                     )
 
-        return result
-
     def cambiar_estado_factura(
         self, oficina_contable: str, numero_registro: str, codigo: str, comentario: str
     ) -> CambiarEstadoFactura:
@@ -344,7 +435,7 @@ class FACeConnection:
 
         return CambiarEstadoFactura(
             response["factura"]["numeroRegistro"],
-            response["factura"]["codigo"],
+            intern_text(response["factura"]["codigo"]),
         )
 
     def cambiar_estado_listado_facturas(
@@ -356,7 +447,15 @@ class FACeConnection:
         operación son las mismas aplicadas al método
         `cambiar_estado_factura`.
 
-        El servicio web limita a un máximo de 100 facturas la petición.
+        El servicio web limita a un máximo de 100 facturas la petición,
+        por lo que listados mayores se dividen en varias peticiones. El
+        cambio de estado no es idempotente: si falla una petición
+        después de haberse aplicado en FACe alguna de las anteriores, se
+        lanza `PartialResultsError` con sus resultados en el atributo
+        `resultados` y la excepción original como causa. Las facturas de
+        la petición fallida y de las siguientes no aparecen en ellos.
+        Para procesar cada resultado según se obtiene puede usarse
+        `iter_cambiar_estado_listado_facturas`.
 
         Parameters
         ----------
@@ -367,31 +466,67 @@ class FACeConnection:
         -------
         list[CambiarEstadoFactura | FACeItemResult]
             lista con el cambio de estado de cada factura o incidencia al cambiar
+
+        Raises
+        ------
+        PartialResultsError
+            Si falla una petición después de haberse aplicado alguna de
+            las anteriores.
         """
 
-        response = self._client.cambiar_estado_listado_facturas(facturas)
+        resultados = []
+        try:
+            for resultado in self.iter_cambiar_estado_listado_facturas(facturas):
+                resultados.append(resultado)
+        except Exception as exc:
+            if not resultados:
+                raise
+            raise excs.PartialResultsError(
+                f"Cambio de estado interrumpido tras {len(resultados)} "
+                f"facturas: {exc}",
+                resultados,
+            ) from exc
+        return resultados
+
+    def iter_cambiar_estado_listado_facturas(
+        self, facturas: Iterable[PeticionCambiarEstadoFactura]
+    ) -> Iterator[CambiarEstadoFactura | FACeItemResult]:
+        """Cambia el estado de varias facturas de forma incremental.
+
+        Versión de `cambiar_estado_listado_facturas` que entrega el
+        resultado de cada factura según se construye. Las peticiones se
+        consumen en lotes de 100, enviando cada lote a FACe cuando se han
+        entregado los resultados del anterior, por lo que si falla un lote
+        ya se han entregado los resultados de los lotes aplicados.
+
+        Parameters
+        ----------
+        facturas : Iterable[PeticionCambiarEstadoFactura]
+            Peticiones con los datos de las facturas a cambiar
+
+        Returns
+        -------
+        Iterator[CambiarEstadoFactura | FACeItemResult]
+            cambio de estado de cada factura o incidencia al cambiar
+        """
 
-        result: list[CambiarEstadoFactura | FACeItemResult] = []
-        if response["facturas"]["cambiarEstadoListadoFacturas"] is not None:
+        for lote in _lotes(facturas, CAMBIAR_ESTADO_LISTADO_MAX):
+            response = self._client.cambiar_estado_listado_facturas(lote)
+            if response["facturas"]["cambiarEstadoListadoFacturas"] is None:
+                continue
             for factura in response["facturas"]["cambiarEstadoListadoFacturas"]:
                 if factura["codigo"] == "0":
-                    result.append(
-                        CambiarEstadoFactura(
-                            factura["factura"]["numeroRegistro"],
-                            factura["factura"]["codigo"],
-                        )
+                    yield CambiarEstadoFactura(
+                        factura["factura"]["numeroRegistro"],
+                        intern_text(factura["factura"]["codigo"]),
                     )
                 else:
-                    result.append(
-                        FACeItemResult(
-                            factura["codigo"],
-                            factura["descripcion"],
-                            factura["factura"]["numeroRegistro"],
-                        )
+                    yield FACeItemResult(
+                        intern_text(factura["codigo"]),
+                        intern_text(factura["descripcion"]),
+                        factura["factura"]["numeroRegistro"],
                     )
 
-        return result
-
     def consultar_codigo_rcf(self, numero_registro: str) -> str:
         """Obtiene el código RCF de una factura registrado en FACe.
 
@@ -465,23 +600,42 @@ class FACeConnection:
             lista de facturas que se encuentran en estado "Solicitada anulación"
         """
 
+        return list(self.iter_solicitar_nuevas_anulaciones(oficina_contable))
+
+    def iter_solicitar_nuevas_anulaciones(
+        self, oficina_contable: str = ""
+    ) -> Iterator[NuevaAnulacion]:
+        """Obtiene las facturas en estado "Solicitada anulación" de forma
+        incremental.
+
+        Versión de `solicitar_nuevas_anulaciones` que entrega cada
+        factura según se construye. La petición a FACe se realiza al
+        comenzar la iteración.
+
+        Parameters
+        ----------
+        oficina_contable : str
+            Código DIR3 de la Oficina Contable. Si no se pasa valor
+            retornará las facturas del RCF
+
+        Returns
+        -------
+        Iterator[NuevaAnulacion]
+            facturas que se encuentran en estado "Solicitada anulación"
+        """
+
         response = self._client.solicitar_nuevas_anulaciones(oficina_contable)
-        result: list[NuevaAnulacion] = []
         if response["facturas"] is not None:
             for factura in response["facturas"]["solicitarNuevasAnulaciones"]:
-                result.append(
-                    NuevaAnulacion(
-                        factura["numeroRegistro"],
-                        factura["oficinaContable"],
-                        factura["organoGestor"],
-                        factura["unidadTramitadora"],
-                        factura["fechaHoraSolicitudAnulacion"],
-                        factura["motivo"],
-                    )
+                yield NuevaAnulacion(
+                    factura["numeroRegistro"],
+                    intern_text(factura["oficinaContable"]),
+                    intern_text(factura["organoGestor"]),
+                    intern_text(factura["unidadTramitadora"]),
+                    factura["fechaHoraSolicitudAnulacion"],
+                    factura["motivo"],
                 )
 
-        return result
-
     def gestionar_solicitud_anulacion_factura(
         self, oficina_contable: str, numero_registro: str, codigo: str, comentario: str
     ) -> GestionarSolicitudAnulacionFactura:
@@ -512,7 +666,7 @@ class FACeConnection:
 
         return GestionarSolicitudAnulacionFactura(
             response["factura"]["numeroRegistro"],
-            response["factura"]["codigo"],
+            intern_text(response["factura"]["codigo"]),
         )
 
     def gestionar_solicitud_anulacion_listado_facturas(
@@ -548,14 +702,14 @@ class FACeConnection:
                     result.append(
                         GestionarSolicitudAnulacionFactura(
                             factura["factura"]["numeroRegistro"],
-                            factura["factura"]["codigo"],
+                            intern_text(factura["factura"]["codigo"]),
                         )
                     )
                 else:
                     result.append(
                         FACeItemResult(
-                            factura["codigo"],
-                            factura["descripcion"],
+                            intern_text(factura["codigo"]),
+                            intern_text(factura["descripcion"]),
                             factura["factura"]["numeroRegistro"],
                         )
                     )
@@ -581,7 +735,7 @@ class FACeConnection:
 
         result = EstadoCesion(
             response["cesion"]["numeroRegistro"],
-            response["cesion"]["estado"],
+            intern_text(response["cesion"]["estado"]),
             response["cesion"]["comentario"],
         )
 
@@ -593,7 +747,8 @@ class FACeConnection:
         """Obtiene el documento de la cesión de una factura.
 
         Este método permite obtener el documento de la cesión conectando
-        al servicio de notarios.
+        al servicio de notarios. Si la conexión tiene caché de documentos
+        de cesión, los documentos ya obtenidos se devuelven desde ella.
 
         Parameters
         ----------
@@ -610,6 +765,11 @@ class FACeConnection:
             estructura de datos que contiene el documento de la cesión
         """
 
+        if self._cession_cache is not None:
+            documento = self._cession_cache.obtener(csv, repositorio)
+            if documento is not None:
+                return documento
+
         dict_solicitante = {
             "nif": solicitante.nif,
             "nombre": solicitante.nombre,
@@ -626,9 +786,85 @@ class FACeConnection:
             response["documento"]["nombre"],
             response["documento"]["mime"],
         )
+        if self._cession_cache is not None:
+            self._cession_cache.guardar(csv, repositorio, result)
 
         return result
 
+    def consultar_estado_cesiones(
+        self, numeros_registro: Iterable[str], max_workers: int = BATCH_WORKERS
+    ) -> Iterator[ResultadoLote]:
+        """Obtiene el estado de la cesión de varias facturas de forma
+        concurrente.
+
+        Las consultas se realizan según se consumen los resultados, con
+        como mucho `max_workers` consultas simultáneas.
+
+        Parameters
+        ----------
+        numeros_registro : Iterable[str]
+            Números de registro, en el REC, de las facturas para las que
+            quiere consultarse el estado de la cesión
+        max_workers : int
+            Número de consultas simultáneas. Default: BATCH_WORKERS
+
+        Returns
+        -------
+        Iterator[ResultadoLote]
+            resultado de cada consulta, con su número de registro como
+            petición y un `EstadoCesion` como resultado
+        """
+
+        return ejecutar_lote(
+            self.consultar_estado_cesion, numeros_registro, max_workers
+        )
+
+    def obtener_documentos_cesion(
+        self,
+        documentos: Iterable[PeticionDocumentoCesion],
+        solicitante: DatosSolicitante,
+        path: Path | None = None,
+        force: bool = False,
+        max_workers: int = BATCH_WORKERS,
+    ) -> Iterator[ResultadoLote]:
+        """Obtiene varios documentos de cesión de forma concurrente.
+
+        Si se indica `path`, cada documento se guarda en disco en cuanto
+        se recibe y se descarta su contenido del resultado, de modo que
+        la memoria empleada no depende del número de documentos.
+
+        Parameters
+        ----------
+        documentos : Iterable[PeticionDocumentoCesion]
+            Identificador y repositorio de cada documento
+        solicitante : DatosSolicitante
+            Datos del solicitante (nif, nombre, apellidos)
+        path : Path | None
+            Directorio donde se guardan los documentos. Default: None
+        force : bool
+            Sobrescribe los archivos si existen. Default: False
+        max_workers : int
+            Número de peticiones simultáneas. Default: BATCH_WORKERS
+
+        Returns
+        -------
+        Iterator[ResultadoLote]
+            resultado de cada petición, con un `DocumentoCesion` como
+            resultado. Si un archivo ya existe y no se sobrescribe, el
+            error es un `FileExistsError`
+        """
+
+        def obtener(peticion: PeticionDocumentoCesion) -> DocumentoCesion:
+            documento = self.obtener_documento_cesion(
+                peticion.csv, peticion.repositorio, solicitante
+            )
+            if path is None:
+                return documento
+            documento.guardar(path, force)
+            return dataclasses.replace(documento, documento="")
+
+        return ejecutar_lote(obtener, documentos, max_workers)
+
     def gestionar_cesion(
         self, numero_registro: str, codigo: str, comentario: str
     ) -> GestionarCesion:
@@ -654,7 +890,7 @@ class FACeConnection:
 
         return GestionarCesion(
             response["cesion"]["numeroRegistro"],
-            response["cesion"]["codigo"],
+            intern_text(response["cesion"]["codigo"]),
             response["cesion"]["comentario"],
         )
 
@@ -703,8 +939,8 @@ class FACeConnection:
             en FACe
         """
 
-        with open(path_factura, "rb") as file:
-            factura = base64.b64encode(file.read())
+        with section("base64"):
+            factura = b64encode_file(path_factura)
 
         response = self._client.notifica_factura(
             numero_registro,
@@ -0,0 +1,320 @@
+"""
+Módulo de métricas de las operaciones con FACe
+"""
+
+import bisect
+import json
+import math
+import os
+import threading
+from pathlib import Path
+
+from . import exceptions as excs
+from .hooks import CallInfo, ClientHook
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = tuple(1024 * 4**i for i in range(10))
+
+METRICS = {
+    "aapp2face_face_calls_total": (
+        "counter",
+        "Llamadas realizadas a FACe por operación y resultado.",
+    ),
+    "aapp2face_face_call_duration_seconds": (
+        "histogram",
+        "Duración de las llamadas a FACe.",
+    ),
+    "aapp2face_face_errors_total": (
+        "counter",
+        "Errores en las llamadas a FACe por clase de excepción y código.",
+    ),
+    "aapp2face_face_throttle_seconds_total": (
+        "counter",
+        "Tiempo esperado por el limitador de peticiones.",
+    ),
+    "aapp2face_face_request_bytes": (
+        "histogram",
+        "Tamaño de las peticiones enviadas a FACe.",
+    ),
+    "aapp2face_face_response_bytes": (
+        "histogram",
+        "Tamaño de las respuestas recibidas de FACe.",
+    ),
+    "aapp2face_cli_commands_total": (
+        "counter",
+        "Comandos ejecutados por resultado.",
+    ),
+    "aapp2face_cli_command_duration_seconds": (
+        "histogram",
+        "Duración de los comandos.",
+    ),
+}
+
+
+class Histogram:
+    """Histograma de observaciones con intervalos acumulados."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        """Constructor
+
+        Parameters
+        ----------
+        buckets : tuple[float, ...]
+            Límites superiores de los intervalos, en orden creciente
+        """
+
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Devuelve los recuentos acumulados de cada intervalo."""
+
+        acumulado = 0
+        result = []
+        for limite, cuenta in zip(self.buckets + (math.inf,), self.counts):
+            acumulado += cuenta
+            result.append((limite, acumulado))
+        return result
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict[str, str], extra: str = "") -> str:
+    partes = [f'{clave}="{_escape(valor)}"' for clave, valor in labels.items()]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _format_float(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metrics(ClientHook):
+    """Registro de métricas de las operaciones con FACe.
+
+    Recoge contadores e histogramas etiquetados, es seguro para su uso
+    desde varios hilos y puede exportarse en el formato de texto de
+    Prometheus o como instantánea JSON. Se añade a los conectores como
+    gancho de instrumentación para registrar cada intento de llamada.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, Histogram]] = {}
+
+    @staticmethod
+    def _key(labels: dict[str, str]) -> tuple:
+        return tuple(sorted(labels.items()))
+
+    def inc(self, name: str, labels: dict[str, str], value: float = 1) -> None:
+        """Incrementa un contador.
+
+        Parameters
+        ----------
+        name : str
+            Nombre de la métrica
+        labels : dict[str, str]
+            Etiquetas de la serie
+        value : float
+            Incremento. Default: 1
+        """
+
+        key = self._key(labels)
+        with self._lock:
+            serie = self._counters.setdefault(name, {})
+            serie[key] = serie.get(key, 0) + value
+
+    def observe(
+        self,
+        name: str,
+        labels: dict[str, str],
+        value: float,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        """Añade una observación a un histograma.
+
+        Parameters
+        ----------
+        name : str
+            Nombre de la métrica
+        labels : dict[str, str]
+            Etiquetas de la serie
+        value : float
+            Valor observado
+        buckets : tuple[float, ...]
+            Límites de los intervalos si el histograma no existe.
+            Default: LATENCY_BUCKETS
+        """
+
+        key = self._key(labels)
+        with self._lock:
+            serie = self._histograms.setdefault(name, {})
+            if key not in serie:
+                serie[key] = Histogram(buckets)
+            serie[key].observe(value)
+
+    def record_call(
+        self,
+        operacion: str,
+        duracion: float,
+        exc: BaseException | None = None,
+        espera: float = 0.0,
+    ) -> None:
+        """Registra un intento de llamada a FACe.
+
+        Parameters
+        ----------
+        operacion : str
+            Nombre del método SOAP de FACe
+        duracion : float
+            Duración de la llamada en segundos
+        exc : BaseException, optional
+            Excepción producida en la llamada, si la hubo
+        espera : float
+            Segundos esperados por el limitador de peticiones
+        """
+
+        labels = {"operation": operacion}
+        self.observe("aapp2face_face_call_duration_seconds", labels, duracion)
+        self.inc(
+            "aapp2face_face_calls_total",
+            {**labels, "result": "ok" if exc is None else "error"},
+        )
+        if espera:
+            self.inc("aapp2face_face_throttle_seconds_total", labels, espera)
+        if exc is not None:
+            codigo = exc.code if isinstance(exc, excs.FACeException) else ""
+            self.inc(
+                "aapp2face_face_errors_total",
+                {**labels, "exception": type(exc).__name__, "code": codigo},
+            )
+
+    def record_payload(self, operacion: str, enviados: int, recibidos: int) -> None:
+        """Registra el tamaño de una petición y su respuesta.
+
+        Parameters
+        ----------
+        operacion : str
+            Nombre del método SOAP de FACe
+        enviados : int
+            Bytes enviados
+        recibidos : int
+            Bytes recibidos
+        """
+
+        labels = {"operation": operacion}
+        self.observe("aapp2face_face_request_bytes", labels, enviados, SIZE_BUCKETS)
+        self.observe("aapp2face_face_response_bytes", labels, recibidos, SIZE_BUCKETS)
+
+    def after_call(self, info: CallInfo) -> None:
+        self.record_call(info.operacion, info.duracion, espera=info.espera)
+        if info.enviados or info.recibidos:
+            self.record_payload(info.operacion, info.enviados, info.recibidos)
+
+    def on_error(self, info: CallInfo) -> None:
+        self.record_call(info.operacion, info.duracion, info.error, info.espera)
+        if info.enviados or info.recibidos:
+            self.record_payload(info.operacion, info.enviados, info.recibidos)
+
+    def record_command(self, comando: str, duracion: float, ok: bool) -> None:
+        """Registra la ejecución de un comando de la CLI.
+
+        Parameters
+        ----------
+        comando : str
+            Nombre del comando
+        duracion : float
+            Duración del comando en segundos
+        ok : bool
+            Indica si el comando terminó correctamente
+        """
+
+        labels = {"command": comando}
+        self.observe("aapp2face_cli_command_duration_seconds", labels, duracion)
+        self.inc(
+            "aapp2face_cli_commands_total",
+            {**labels, "result": "ok" if ok else "error"},
+        )
+
+    def snapshot(self) -> dict:
+        """Devuelve una instantánea de las métricas serializable a JSON."""
+
+        with self._lock:
+            result = {}
+            for name, serie in self._counters.items():
+                result[name] = [
+                    {"labels": dict(key), "value": value}
+                    for key, value in serie.items()
+                ]
+            for name, serie in self._histograms.items():
+                result[name] = [
+                    {
+                        "labels": dict(key),
+                        "count": hist.count,
+                        "sum": hist.sum,
+                        "buckets": {
+                            _format_float(limite): cuenta
+                            for limite, cuenta in hist.cumulative()
+                        },
+                    }
+                    for key, hist in serie.items()
+                ]
+        return result
+
+    def to_prometheus(self) -> str:
+        """Devuelve las métricas en el formato de texto de Prometheus."""
+
+        lineas = []
+        with self._lock:
+            for name in sorted({*self._counters, *self._histograms}):
+                tipo, ayuda = METRICS.get(name, ("untyped", name))
+                lineas.append(f"# HELP {name} {ayuda}")
+                lineas.append(f"# TYPE {name} {tipo}")
+                for key, value in sorted(self._counters.get(name, {}).items()):
+                    lineas.append(f"{name}{_labels(dict(key))} {_format_float(value)}")
+                for key, hist in sorted(self._histograms.get(name, {}).items()):
+                    labels = dict(key)
+                    for limite, cuenta in hist.cumulative():
+                        le = f'le="{_format_float(limite)}"'
+                        lineas.append(f"{name}_bucket{_labels(labels, le)} {cuenta}")
+                    lineas.append(
+                        f"{name}_sum{_labels(labels)} {_format_float(hist.sum)}"
+                    )
+                    lineas.append(f"{name}_count{_labels(labels)} {hist.count}")
+        return "\n".join(lineas) + "\n"
+
+    def export(self, path: Path) -> None:
+        """Guarda las métricas en un archivo.
+
+        El formato es JSON si el archivo tiene extensión `.json` y el
+        formato de texto de Prometheus en otro caso. El archivo se
+        reemplaza de forma atómica, como requiere el recolector de
+        archivos de texto de Prometheus.
+
+        Parameters
+        ----------
+        path : Path
+            Ruta del archivo a generar
+        """
+
+        path = Path(path)
+        if path.suffix == ".json":
+            contenido = json.dumps(self.snapshot(), indent=2)
+        else:
+            contenido = self.to_prometheus()
+        temporal = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temporal.write_text(contenido, encoding="utf-8")
+        os.replace(temporal, path)
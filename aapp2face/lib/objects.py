@@ -1,13 +1,29 @@
 """
 Módulo de clases para estructuras de datos.
+
+Todas las clases usan `__slots__`, por lo que sus instancias no admiten
+atributos adicionales. Las clases de resultados devueltas por
+`FACeConnection` son además inmutables: para obtener una copia
+modificada debe usarse `dataclasses.replace`, y las subclases que las
+extiendan deben declararse también con `@dataclass(frozen=True)`.
 """
 
-import base64
+import functools
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 
+from .encoding import write_base64
+
+
+def intern_text(value: str | None) -> str | None:
+    """Interna cadenas que se repiten en muchas respuestas, como códigos,
+    descripciones de estados u oficinas, para compartir una única copia."""
+
+    return sys.intern(value) if isinstance(value, str) else value
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class FACeResult:
     """Clase para resultados devueltos por FACe.
 
@@ -27,7 +43,7 @@ class FACeResult:
     codigo_seguimiento: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Estado:
     """Clase para respuesta FACe con datos de cada uno de los estados que maneja
 
@@ -52,7 +68,7 @@ class Estado:
     descripcion: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class UnidadDir3:
     """Clase para respuesta FACe con datos de una unidad DIR3
 
@@ -68,7 +84,7 @@ class UnidadDir3:
     codigo: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Relacion:
     """Clase para respuesta FACe con datos de una relación OG-UT-OC
 
@@ -87,7 +103,7 @@ class Relacion:
     oficina_contable: UnidadDir3
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class NuevaFactura:
     """Clase para respuestas FACe al consultar nuevas facturas.
 
@@ -112,7 +128,7 @@ class NuevaFactura:
     fecha_hora_registro: str
 
 
-@dataclass
+@dataclass(slots=True)
 class AnexoFactura:
     """Clase para respuesta FACe con anexo a una factura
 
@@ -141,16 +157,10 @@ class AnexoFactura:
             Sobrescribe el archivo si existe. En caso contrario lanza
             una excepción. Por defecto False
         """
-        decoded_data = base64.b64decode(self.anexo)
-        if force:
-            mode = "wb"
-        else:
-            mode = "xb"
-        with open(Path(path, self.nombre), mode) as file:
-            file.write(decoded_data)
+        write_base64(Path(path, self.nombre), self.anexo, force)
 
 
-@dataclass
+@dataclass(slots=True)
 class DescargaFactura:
     """Clase para respuesta FACe con una factura descargada
 
@@ -194,16 +204,10 @@ class DescargaFactura:
             Sobrescribe el archivo si existe. En caso contrario lanza
             una excepción. Por defecto False
         """
-        decoded_data = base64.b64decode(self.factura)
-        if force:
-            mode = "wb"
-        else:
-            mode = "xb"
-        with open(Path(path, self.nombre), mode) as file:
-            file.write(decoded_data)
+        write_base64(Path(path, self.nombre), self.factura, force)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ConfirmaDescargaFactura:
     """Clase para respuesta FACe al confirmar descarga de una factura.
 
@@ -222,7 +226,7 @@ class ConfirmaDescargaFactura:
     codigo: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ConsultarEstadoFactura:
     """Clase para estado de una factura en FACe dentro de un flujo de tramitación.
 
@@ -240,8 +244,22 @@ class ConsultarEstadoFactura:
     descripcion: str
     motivo: str
 
+    @classmethod
+    @functools.lru_cache(maxsize=1024)
+    def compartido(
+        cls, codigo: str, descripcion: str, motivo: str | None
+    ) -> "ConsultarEstadoFactura":
+        """Devuelve una instancia compartida del estado indicado.
+
+        Los estados son inmutables y se repiten en la mayoría de
+        facturas, por lo que las consultas masivas reutilizan la misma
+        instancia.
+        """
+
+        return cls(intern_text(codigo), intern_text(descripcion), intern_text(motivo))
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class ConsultarFactura:
     """Clase para respuesta FACe al consultar estado de una factura.
 
@@ -260,7 +278,7 @@ class ConsultarFactura:
     anulacion: ConsultarEstadoFactura
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class FACeItemResult:
     """Clase para resultados por elemento en arrays devueltos por FACe.
 
@@ -280,7 +298,7 @@ class FACeItemResult:
     id: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CambiarEstadoFactura:
     """Clase para respuesta FACe al cambiar estado de una factura.
 
@@ -296,7 +314,7 @@ class CambiarEstadoFactura:
     codigo: str
 
 
-@dataclass
+@dataclass(slots=True)
 class PeticionCambiarEstadoFactura:
     """Clase para peticiones FACe al cambiar estado de un listado de facturas.
 
@@ -318,7 +336,7 @@ class PeticionCambiarEstadoFactura:
     comentario: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class NuevaAnulacion:
     """Clase para respuestas FACe al consultar las solicitudes de anulación.
 
@@ -346,7 +364,7 @@ class NuevaAnulacion:
     motivo: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GestionarSolicitudAnulacionFactura:
     """Clase para respuesta FACe al gestionar solicitud anulación de una factura.
 
@@ -362,7 +380,7 @@ class GestionarSolicitudAnulacionFactura:
     codigo: str
 
 
-@dataclass
+@dataclass(slots=True)
 class PeticionSolicitudAnulacionListadoFactura:
     """Clase para peticiones FACe al gestionar la solicitud de anulación de un listado de facturas.
 
@@ -385,7 +403,7 @@ class PeticionSolicitudAnulacionListadoFactura:
     comentario: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EstadoCesion:
     """Clase para repuesta FACe al consultar el estado de una cesión de crédito.
 
@@ -404,7 +422,7 @@ class EstadoCesion:
     comentario: str
 
 
-@dataclass
+@dataclass(slots=True)
 class DatosSolicitante:
     """Clase para datos solicitante en peticiones FACe para obtener documento de cesión.
 
@@ -423,7 +441,23 @@ class DatosSolicitante:
     apellidos: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class PeticionDocumentoCesion:
+    """Clase para peticiones FACe al obtener varios documentos de cesión.
+
+    Attributes
+    ----------
+    csv : str
+        Identificador del documento.
+    repositorio : str
+        Repositorio desde el que se obtiene el documento.
+    """
+
+    csv: str
+    repositorio: str
+
+
+@dataclass(slots=True)
 class DocumentoCesion:
     """Clase para respuesta FACe con el documento de una cesión de crédito
 
@@ -455,16 +489,10 @@ class DocumentoCesion:
             Sobrescribe el archivo si existe. En caso contrario lanza
             una excepción. Por defecto False
         """
-        decoded_data = base64.b64decode(self.documento)
-        if force:
-            mode = "wb"
-        else:
-            mode = "xb"
-        with open(Path(path, self.nombre), mode) as file:
-            file.write(decoded_data)
+        write_base64(Path(path, self.nombre), self.documento, force)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GestionarCesion:
     """Clase para respuesta FACe al gestionar una cesión de crédito.
 
@@ -483,7 +511,7 @@ class GestionarCesion:
     comentario: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class NotificaFactura:
     """Clase para respuesta FACe al notificar una factura recibida en otro PGEFe.
 
@@ -499,7 +527,41 @@ class NotificaFactura:
     fecha_hora_registro: str
 
 
-@dataclass
+@dataclass(slots=True)
+class PeticionNotificaFactura:
+    """Clase para peticiones de notificación de facturas recibidas en otro PGEFe.
+
+    Attributes
+    ----------
+    numero_registro : str
+        Número de registro del PGEFe
+    fecha_registro : str
+        Fecha de registro del PGEFe en formato 'YYYY-MM-DDThh:mm:ss'
+    path_factura : Path
+        Ruta local del fichero con la factura en formato facturae
+    organo_gestor : str
+        Código DIR3 del Órgano Gestor
+    unidad_tramitadora : str
+        Código DIR3 de la Unidad Tramitadora
+    oficina_contable : str
+        Código DIR3 de la Oficina Contable
+    codigo_rcf : str
+        Código asignado dentro del RCF
+    estado : str
+        Código del estado de la factura
+    """
+
+    numero_registro: str
+    fecha_registro: str
+    path_factura: Path
+    organo_gestor: str
+    unidad_tramitadora: str
+    oficina_contable: str
+    codigo_rcf: str
+    estado: str
+
+
+@dataclass(slots=True)
 class DatosPersonales:
     """Clase para petición FACe al notificar una factura no electrónica.
 
@@ -522,3 +584,58 @@ class DatosPersonales:
     apellido1: str
     apellido2: str
     documento_nacional: str
+
+
+@dataclass(slots=True)
+class PeticionNotificaFacturaNoElectronica:
+    """Clase para peticiones de notificación de facturas no electrónicas.
+
+    Attributes
+    ----------
+    numero_registro : str
+        Número de registro del PGEFe
+    fecha_registro : str
+        Fecha de registro del PGEFe en formato 'YYYY-MM-DDThh:mm:ss'
+    emisor : DatosPersonales
+        Datos del emisor
+    receptor : DatosPersonales
+        Datos del receptor
+    tercero : DatosPersonales
+        Datos del tercero
+    numero : str
+        Número de la factura
+    serie : str
+        Serie de la factura
+    importe : str
+        Importe de la factura
+    fecha_expedicion : str
+        Fecha de expedición de la factura en formato 'YYYY-MM-DDThh:mm:ss'
+    organo_gestor : str
+        Código DIR3 del Órgano Gestor
+    unidad_tramitadora : str
+        Código DIR3 de la Unidad Tramitadora
+    oficina_contable : str
+        Código DIR3 de la Oficina Contable
+    codigo_rcf : str
+        Código asignado dentro del RCF
+    estado : str
+        Código del estado de la factura
+    codigo_cnae : str
+        Código de CNAE de la factura
+    """
+
+    numero_registro: str
+    fecha_registro: str
+    emisor: DatosPersonales
+    receptor: DatosPersonales
+    tercero: DatosPersonales
+    numero: str
+    serie: str
+    importe: str
+    fecha_expedicion: str
+    organo_gestor: str
+    unidad_tramitadora: str
+    oficina_contable: str
+    codigo_rcf: str
+    estado: str
+    codigo_cnae: str
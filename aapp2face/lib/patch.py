@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 from zeep.wsse import utils
 from zeep.wsse.signature import BinarySignature
 
+from .hooks import phase
+
 
 class BinarySignatureTimestamp(BinarySignature):
     def apply(self, envelope, headers):
@@ -25,7 +27,8 @@ class BinarySignatureTimestamp(BinarySignature):
 
         security.append(timestamp)
 
-        super().apply(envelope, headers)
+        with phase("sign"):
+            super().apply(envelope, headers)
         return envelope, headers
 
     def verify(self, envelope):
@@ -0,0 +1,227 @@
+"""
+Módulo del conjunto de conexiones a FACe con varias identidades
+"""
+
+import threading
+from typing import Any, Callable, Iterable, Iterator
+
+from .batch import BATCH_WORKERS, ResultadoLote, ejecutar_lote
+from .exceptions import UnknownIdentityError
+from .main import FACeConnection
+
+
+class FACeConnectionPool:
+    """Conjunto de conexiones a FACe con distintas identidades.
+
+    Cada identidad es una conexión firmada con su propio certificado,
+    normalmente uno por RCF, y limita el número de llamadas simultáneas
+    que realiza. Las llamadas se dirigen a una identidad por su nombre
+    o por la oficina contable que gestiona, de modo que un mismo proceso
+    puede trabajar a la vez con todas las identidades.
+
+    Si no se indican las oficinas contables de una identidad, se
+    obtienen de FACe con `consultar_unidades` la primera vez que se
+    necesitan.
+    """
+
+    def __init__(self):
+        """Constructor"""
+
+        self._conexiones: dict[str, FACeConnection] = {}
+        self._limites: dict[str, threading.BoundedSemaphore] = {}
+        self._concurrencia: dict[str, int] = {}
+        self._oficinas: dict[str, frozenset[str] | None] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        nombre: str,
+        conexion: FACeConnection,
+        oficinas: Iterable[str] | None = None,
+        max_concurrency: int = BATCH_WORKERS,
+    ) -> None:
+        """Añade una identidad al conjunto.
+
+        Parameters
+        ----------
+        nombre : str
+            Nombre de la identidad
+        conexion : FACeConnection
+            Conexión a FACe con el certificado de la identidad
+        oficinas : Iterable[str], optional
+            Códigos DIR3 de las oficinas contables que gestiona. Si no
+            se indican se consultan a FACe. Default: None
+        max_concurrency : int
+            Número máximo de llamadas simultáneas de la identidad.
+            Default: BATCH_WORKERS
+        """
+
+        if nombre in self._conexiones:
+            raise ValueError(f"La identidad {nombre} ya existe")
+        self._conexiones[nombre] = conexion
+        self._limites[nombre] = threading.BoundedSemaphore(max_concurrency)
+        self._concurrencia[nombre] = max_concurrency
+        self._oficinas[nombre] = None if oficinas is None else frozenset(oficinas)
+
+    @property
+    def nombres(self) -> list[str]:
+        """Nombres de las identidades del conjunto."""
+
+        return list(self._conexiones)
+
+    @property
+    def max_concurrency(self) -> int:
+        """Número máximo de llamadas simultáneas del conjunto."""
+
+        return sum(self._concurrencia.values())
+
+    def conexion(self, nombre: str) -> FACeConnection:
+        """Devuelve la conexión de una identidad.
+
+        Las llamadas realizadas directamente con la conexión no están
+        sujetas al límite de llamadas simultáneas de la identidad.
+
+        Parameters
+        ----------
+        nombre : str
+            Nombre de la identidad
+        """
+
+        return self._conexiones[nombre]
+
+    def oficinas(self, nombre: str) -> frozenset[str]:
+        """Devuelve las oficinas contables que gestiona una identidad.
+
+        Parameters
+        ----------
+        nombre : str
+            Nombre de la identidad
+        """
+
+        with self._lock:
+            oficinas = self._oficinas[nombre]
+        if oficinas is None:
+            relaciones = self.llamar(nombre, "consultar_unidades")
+            oficinas = frozenset(
+                relacion.oficina_contable.codigo for relacion in relaciones
+            )
+            with self._lock:
+                self._oficinas[nombre] = oficinas
+        return oficinas
+
+    def identidad(self, oficina_contable: str) -> str:
+        """Devuelve el nombre de la identidad que gestiona una oficina
+        contable.
+
+        Parameters
+        ----------
+        oficina_contable : str
+            Código DIR3 de la oficina contable
+
+        Raises
+        ------
+        UnknownIdentityError
+            Si ninguna identidad gestiona la oficina contable
+        """
+
+        for nombre in self._conexiones:
+            if oficina_contable in self.oficinas(nombre):
+                return nombre
+        raise UnknownIdentityError(
+            f"Ninguna identidad gestiona la oficina contable {oficina_contable}"
+        )
+
+    def llamar(self, nombre: str, metodo: str, *args, **kwargs) -> Any:
+        """Llama a un método de `FACeConnection` con una identidad.
+
+        Si la identidad ya tiene en curso el número máximo de llamadas
+        simultáneas, se espera a que termine alguna.
+
+        Parameters
+        ----------
+        nombre : str
+            Nombre de la identidad
+        metodo : str
+            Nombre del método de `FACeConnection`
+        *args, **kwargs
+            Argumentos del método
+        """
+
+        conexion = self._conexiones[nombre]
+        with self._limites[nombre]:
+            return getattr(conexion, metodo)(*args, **kwargs)
+
+    def llamar_oficina(
+        self, oficina_contable: str, metodo: str, *args, **kwargs
+    ) -> Any:
+        """Llama a un método de `FACeConnection` con la identidad que
+        gestiona una oficina contable.
+
+        Parameters
+        ----------
+        oficina_contable : str
+            Código DIR3 de la oficina contable
+        metodo : str
+            Nombre del método de `FACeConnection`
+        *args, **kwargs
+            Argumentos del método
+        """
+
+        return self.llamar(self.identidad(oficina_contable), metodo, *args, **kwargs)
+
+    def en_todas(self, metodo: str, *args, **kwargs) -> Iterator[ResultadoLote]:
+        """Llama a un método de `FACeConnection` con todas las
+        identidades a la vez.
+
+        Parameters
+        ----------
+        metodo : str
+            Nombre del método de `FACeConnection`
+        *args, **kwargs
+            Argumentos del método
+
+        Returns
+        -------
+        Iterator[ResultadoLote]
+            resultado de cada identidad, con su nombre como petición
+        """
+
+        return ejecutar_lote(
+            lambda nombre: self.llamar(nombre, metodo, *args, **kwargs),
+            self.nombres,
+            max(1, len(self._conexiones)),
+        )
+
+    def ejecutar_lote(
+        self,
+        funcion: Callable[[FACeConnection, Any], Any],
+        peticiones: Iterable,
+        max_workers: int | None = None,
+    ) -> Iterator[ResultadoLote]:
+        """Procesa peticiones de forma concurrente, cada una con la
+        identidad que gestiona su oficina contable.
+
+        Parameters
+        ----------
+        funcion : Callable
+            Función que procesa cada petición con la conexión indicada
+        peticiones : Iterable
+            Peticiones a procesar, con un atributo `oficina_contable`
+        max_workers : int, optional
+            Número de peticiones simultáneas. Por defecto, la suma de
+            los límites de todas las identidades. Default: None
+
+        Returns
+        -------
+        Iterator[ResultadoLote]
+            resultado de cada petición, en el orden de las peticiones
+        """
+
+        def procesar(peticion):
+            nombre = self.identidad(peticion.oficina_contable)
+            with self._limites[nombre]:
+                return funcion(self._conexiones[nombre], peticion)
+
+        return ejecutar_lote(
+            procesar, peticiones, max_workers or max(1, self.max_concurrency)
+        )
@@ -0,0 +1,103 @@
+"""
+Módulo de perfilado del tiempo de ejecución por fases
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from .hooks import CallInfo, ClientHook
+
+_active = None
+
+
+class Profiler(ClientHook):
+    """Acumulador del tiempo empleado en cada fase de la ejecución.
+
+    Recoge el tiempo de las secciones medidas con `section` mientras
+    está activo y, añadido como gancho a un conector, las fases de cada
+    llamada a FACe y la espera del limitador de peticiones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fases: dict[str, list] = {}
+
+    def add(self, nombre: str, segundos: float, veces: int = 1) -> None:
+        """Acumula tiempo en una fase.
+
+        Parameters
+        ----------
+        nombre : str
+            Nombre de la fase
+        segundos : float
+            Tiempo empleado
+        veces : int
+            Número de ejecuciones de la fase. Default: 1
+        """
+
+        with self._lock:
+            fase = self._fases.setdefault(nombre, [0, 0.0])
+            fase[0] += veces
+            fase[1] += segundos
+
+    @contextmanager
+    def measure(self, nombre: str):
+        """Mide el tiempo de un bloque como fase."""
+
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(nombre, time.perf_counter() - inicio)
+
+    def _add_call(self, info: CallInfo) -> None:
+        for nombre, segundos in info.fases.items():
+            self.add(nombre, segundos)
+        if info.espera:
+            self.add("throttle", info.espera)
+
+    def after_call(self, info: CallInfo) -> None:
+        self._add_call(info)
+
+    def on_error(self, info: CallInfo) -> None:
+        self._add_call(info)
+
+    def summary(self) -> dict[str, tuple[int, float]]:
+        """Devuelve el número de ejecuciones y el tiempo total de cada
+        fase, ordenadas de mayor a menor tiempo."""
+
+        with self._lock:
+            fases = {nombre: tuple(valor) for nombre, valor in self._fases.items()}
+        return dict(sorted(fases.items(), key=lambda item: item[1][1], reverse=True))
+
+    def activate(self) -> None:
+        """Establece el perfilador como activo para las secciones medidas."""
+
+        global _active
+        _active = self
+
+    def deactivate(self) -> None:
+        """Desactiva el perfilador si es el activo."""
+
+        global _active
+        if _active is self:
+            _active = None
+
+
+def get_profiler() -> Profiler | None:
+    """Devuelve el perfilador activo."""
+
+    return _active
+
+
+@contextmanager
+def section(nombre: str):
+    """Mide el tiempo de un bloque en el perfilador activo, si existe."""
+
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.measure(nombre):
+        yield
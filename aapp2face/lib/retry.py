@@ -0,0 +1,256 @@
+"""
+Módulo de la política de reintentos ante fallos transitorios de FACe
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable
+
+import requests
+import zeep.exceptions
+from urllib3.exceptions import NewConnectionError
+
+from . import exceptions as excs
+
+# Operaciones que modifican el estado de las facturas en FACe. Repetirlas
+# tras un fallo del que no se conoce si FACe llegó a procesar la petición
+# podría aplicar dos veces el cambio, por lo que solo se reintentan ante
+# errores que garantizan que la petición no llegó a enviarse.
+NON_IDEMPOTENT_OPERATIONS = frozenset(
+    {
+        "confirmarDescargaFactura",
+        "cambiarEstadoFactura",
+        "cambiarEstadoListadoFacturas",
+        "cambiarCodigoRCF",
+        "gestionarSolicitudAnulacionFactura",
+        "gestionarSolicitudAnulacionListadoFacturas",
+        "gestionarCesion",
+        "notificaFactura",
+        "notificaFacturaNoElectronica",
+    }
+)
+
+# Errores transitorios: el mismo intento puede tener éxito más tarde.
+TRANSIENT_EXCEPTIONS = (
+    excs.UndefinedError,
+    TimeoutError,
+    ConnectionError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+_local = threading.local()
+
+# Códigos de estado HTTP de respuestas no SOAP que indican una
+# indisponibilidad temporal del servicio o de un proxy intermedio.
+TRANSIENT_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+# Errores transitorios que garantizan que la petición no llegó a FACe.
+NOT_SENT_EXCEPTIONS = (
+    ConnectionRefusedError,
+    NewConnectionError,
+    requests.exceptions.ConnectTimeout,
+)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Indica si una excepción corresponde a un fallo transitorio.
+
+    Parameters
+    ----------
+    exc : BaseException
+        Excepción a clasificar
+    """
+
+    if isinstance(exc, zeep.exceptions.TransportError):
+        return exc.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(exc, TRANSIENT_EXCEPTIONS)
+
+
+def is_not_sent(exc: BaseException) -> bool:
+    """Indica si una excepción garantiza que la petición no llegó a FACe.
+
+    `requests` envuelve los errores al establecer la conexión, como una
+    conexión rechazada o un nombre que no se resuelve, en
+    `requests.exceptions.ConnectionError`, por lo que se examina el
+    error original.
+
+    Parameters
+    ----------
+    exc : BaseException
+        Excepción a clasificar
+    """
+
+    if isinstance(exc, requests.exceptions.ConnectionError) and exc.args:
+        causa = exc.args[0]
+        exc = getattr(causa, "reason", causa)
+    return isinstance(exc, NOT_SENT_EXCEPTIONS)
+
+
+def retries_disabled() -> bool:
+    """Indica si los reintentos de los conectores están desactivados en
+    el hilo actual."""
+
+    return getattr(_local, "disabled", False)
+
+
+@contextmanager
+def without_retries():
+    """Desactiva en el hilo actual la política de reintentos de los
+    conectores.
+
+    Se usa cuando la operación se reintenta con una política propia,
+    para que los intentos de ambas no se multipliquen.
+    """
+
+    anterior = retries_disabled()
+    _local.disabled = True
+    try:
+        yield
+    finally:
+        _local.disabled = anterior
+
+
+class RetryPolicy:
+    """Política de reintentos con espera exponencial y jitter.
+
+    Ante un fallo transitorio (código de error 001 de FACe, errores de
+    conexión, agotamiento del tiempo de espera o respuestas HTTP 429,
+    502, 503 y 504) la operación se repite
+    hasta `max_attempts` veces, esperando entre intentos un tiempo que
+    crece exponencialmente hasta `max_delay`. Con jitter activado la
+    espera se sortea entre cero y ese valor, para evitar que varios
+    procesos reintenten a la vez.
+
+    Las operaciones que modifican el estado en FACe no son idempotentes
+    y solo se reintentan si el error garantiza que la petición no llegó
+    a enviarse.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        initial_delay: float = 0.5,
+        max_delay: float = 30.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        non_idempotent: frozenset[str] = NON_IDEMPOTENT_OPERATIONS,
+        on_retry: Callable[[str, int, BaseException, float], None] | None = None,
+    ):
+        """Constructor
+
+        Parameters
+        ----------
+        max_attempts : int
+            Número máximo de intentos, incluido el primero. Default: 3
+        initial_delay : float
+            Espera en segundos antes del primer reintento. Default: 0.5
+        max_delay : float
+            Espera máxima en segundos entre intentos. Default: 30.0
+        multiplier : float
+            Factor de crecimiento de la espera entre intentos. Default: 2.0
+        jitter : bool
+            Sortea la espera entre cero y el valor calculado. Default: True
+        non_idempotent : frozenset[str]
+            Nombres de los métodos SOAP que no deben repetirse si no se
+            sabe si FACe llegó a procesarlos.
+            Default: NON_IDEMPOTENT_OPERATIONS
+        on_retry : Callable, optional
+            Función a la que se notifica cada reintento con el nombre de
+            la operación, el número del intento fallido, la excepción y
+            la espera antes del siguiente intento. Default: None
+        """
+
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.non_idempotent = non_idempotent
+        self.on_retry = on_retry
+
+    def delay(self, attempt: int) -> float:
+        """Devuelve la espera en segundos tras el intento fallido indicado.
+
+        Parameters
+        ----------
+        attempt : int
+            Número del intento fallido, empezando en 1
+        """
+
+        espera = min(
+            self.max_delay, self.initial_delay * self.multiplier ** (attempt - 1)
+        )
+        if self.jitter:
+            espera = random.uniform(0, espera)
+        return espera
+
+    def is_retryable(
+        self, operacion: str, exc: BaseException, idempotent: bool | None = None
+    ) -> bool:
+        """Indica si una operación fallida puede reintentarse.
+
+        Parameters
+        ----------
+        operacion : str
+            Nombre del método SOAP de FACe
+        exc : BaseException
+            Excepción producida
+        idempotent : bool, optional
+            Fuerza la consideración de la operación como idempotente o
+            no. Si no se indica, se determina a partir del nombre de la
+            operación. Default: None
+        """
+
+        if idempotent is None:
+            idempotent = operacion not in self.non_idempotent
+        if idempotent:
+            return is_transient(exc)
+        return is_not_sent(exc)
+
+    def ejecutar(
+        self,
+        operacion: str,
+        funcion: Callable[..., Any],
+        *args,
+        idempotent: bool | None = None,
+        **kwargs,
+    ) -> Any:
+        """Ejecuta una función aplicando la política de reintentos.
+
+        Parameters
+        ----------
+        operacion : str
+            Nombre del método SOAP de FACe que realiza la función
+        funcion : Callable
+            Función a ejecutar
+        *args
+            Argumentos posicionales de la función
+        idempotent : bool, optional
+            Fuerza la consideración de la operación como idempotente o
+            no. Default: None
+        **kwargs
+            Argumentos con nombre de la función
+
+        Returns
+        -------
+        Any
+            valor devuelto por la función
+        """
+
+        intento = 1
+        while True:
+            try:
+                return funcion(*args, **kwargs)
+            except Exception as exc:
+                if intento >= self.max_attempts or not self.is_retryable(
+                    operacion, exc, idempotent
+                ):
+                    raise
+                espera = self.delay(intento)
+                if self.on_retry is not None:
+                    self.on_retry(operacion, intento, exc, espera)
+                time.sleep(espera)
+                intento += 1
@@ -2,27 +2,109 @@
 Implementación de la interfaz FACeClient para conexiones reales
 """
 
-import datetime
+import threading
 from pathlib import Path
+from typing import Callable
 
 import zeep
 from lxml import etree
-from zeep.plugins import HistoryPlugin
+from requests.adapters import HTTPAdapter
+from zeep.plugins import Plugin
+from zeep.transports import Transport
 
 from .client import FACeClient
+from .fastparse import (
+    ParsedResult,
+    parse_consultar_listado_facturas,
+    parse_solicitar_nuevas_facturas,
+)
+from .hooks import ClientHook, current_call
 from .objects import (
     FACeResult,
     PeticionCambiarEstadoFactura,
     PeticionSolicitudAnulacionListadoFactura,
 )
 from .patch import BinarySignatureTimestamp
+from .profiling import section
+from .retry import RetryPolicy
+from .soaplog import SoapLogger
+from .throttle import CircuitBreaker, RateLimiter
+
+
+class _InstrumentedTransport(Transport):
+    """Transporte de zeep que anota en la llamada en curso el tamaño de
+    la petición y la respuesta y el tiempo de las fases de serialización
+    y de red."""
+
+    def post(self, address, message, headers):
+        info = current_call()
+        if info is None:
+            return super().post(address, message, headers)
+        info.add_phase("serialize", info.lap() - info.fases.get("sign", 0.0))
+        response = super().post(address, message, headers)
+        info.add_phase("network", info.lap())
+        info.enviados = len(message)
+        info.recibidos = len(response.content)
+        return response
+
+
+class _CallHistoryPlugin(Plugin):
+    """Plugin de zeep que guarda los sobres SOAP de la última llamada de
+    cada hilo, de modo que las llamadas simultáneas desde varios hilos no
+    mezclan sus peticiones y respuestas en el registro."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def egress(self, envelope, http_headers, operation, binding_options):
+        self._local.sent = envelope
+        self._local.received = None
+        return envelope, http_headers
+
+    def ingress(self, envelope, http_headers, operation):
+        self._local.received = envelope
+        return envelope, http_headers
+
+    @property
+    def last_sent(self) -> etree._Element | None:
+        """Sobre de la última petición enviada por el hilo actual."""
+
+        return getattr(self._local, "sent", None)
+
+    @property
+    def last_received(self) -> etree._Element | None:
+        """Sobre de la última respuesta recibida por el hilo actual."""
+
+        return getattr(self._local, "received", None)
 
 
 class FACeSoapClient(FACeClient):
-    """Clase del conector FACe usando SOAP."""
+    """Clase del conector FACe usando SOAP.
+
+    Una misma instancia puede usarse a la vez desde varios hilos. El WSDL
+    se carga una sola vez, en la primera llamada, y todas las llamadas
+    comparten el cliente de zeep y el conjunto de conexiones HTTP con
+    FACe, cuyo tamaño se fija con `max_connections`. Los sobres SOAP que
+    se guardan en el registro de depuración y las opciones de cada
+    llamada se mantienen por hilo, y el limitador de peticiones, el
+    cortocircuito y los ganchos indicados deben ser también seguros entre
+    hilos, como lo son `RateLimiter`, `CircuitBreaker` y `Metrics`.
+    """
 
     def __init__(
-        self, wsdl: str, cert: str, key: str, debug: bool = False, log_path: str = "."
+        self,
+        wsdl: str,
+        cert: str,
+        key: str,
+        debug: bool = False,
+        log_path: str = ".",
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: RateLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        hooks: list[ClientHook] | None = None,
+        soap_logger: SoapLogger | None = None,
+        fast_parse: bool = False,
+        max_connections: int | None = None,
     ):
         """Constructor
 
@@ -38,74 +120,109 @@ class FACeSoapClient(FACeClient):
             Flag que indica se se guarda registro de peticiones. Default: False
         log_path : str
             Ruta donde se ubicará el registro de peticiones. Default: "."
+        retry_policy : RetryPolicy, optional
+            Política de reintentos ante fallos transitorios. Default: None
+        rate_limiter : RateLimiter, optional
+            Limitador del ritmo de peticiones. Default: None
+        circuit_breaker : CircuitBreaker, optional
+            Cortocircuito ante fallos continuados. Default: None
+        hooks : list[ClientHook], optional
+            Ganchos de instrumentación de las llamadas. Default: None
+        soap_logger : SoapLogger, optional
+            Registro de peticiones a usar si `debug` está activo. Si no
+            se indica se crea uno en `log_path` con la configuración por
+            defecto. Default: None
+        fast_parse : bool
+            Interpreta directamente con lxml las respuestas de
+            `consultarListadoFacturas` y `solicitarNuevasFacturas`,
+            devolviendo un `ParsedResult` en lugar del objeto de zeep.
+            Default: False
+        max_connections : int, optional
+            Número máximo de conexiones HTTP abiertas con FACe que se
+            mantienen para su reutilización. Por defecto se usa el de
+            requests. Default: None
         """
 
+        super().__init__(retry_policy, rate_limiter, circuit_breaker, hooks)
         self._wsdl = wsdl
         self._cert = cert
         self._key = key
         self._debug = debug
         self._log_path = log_path
+        self._soap_logger = None
+        if debug:
+            self._soap_logger = soap_logger or SoapLogger(Path(log_path))
+        self._fast_parse = fast_parse
+        self._max_connections = max_connections
         self._connected = False
+        self._connect_lock = threading.Lock()
 
     def _connect(self) -> None:
-        """Crea la conexión SOAP con FACe"""
-
-        if not self._connected:
+        """Crea la conexión SOAP con FACe una sola vez, aunque se llame a
+        la vez desde varios hilos"""
+
+        if self._connected:
+            return
+        with self._connect_lock:
+            if self._connected:
+                return
             if not Path(self._cert).is_file():
                 raise FileNotFoundError(f"El fichero del certificado no existe.")
             if not Path(self._key).is_file():
                 raise FileNotFoundError(
                     f"El fichero con clave privada del certificado no existe."
                 )
-            self._history = HistoryPlugin()
+            self._history = _CallHistoryPlugin()
             wsse = BinarySignatureTimestamp(self._key, self._cert)
-            self._face = zeep.Client(self._wsdl, plugins=[self._history], wsse=wsse)
-
-    def _log_soap(self):
-        """Escribe la petición y la respuesta SOAP en un archivo de registro"""
-
-        file = Path(self._log_path).joinpath("soap.log")
-
-        with open(file, "a") as f:
-            fecha_hora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            f.write(f"{fecha_hora} *** PETICIÓN ***\n\n")
-            f.write(
-                etree.tostring(
-                    self._history.last_sent["envelope"],
-                    encoding="unicode",
-                    pretty_print=True,
+            transport = _InstrumentedTransport()
+            if self._max_connections:
+                adapter = HTTPAdapter(pool_maxsize=self._max_connections)
+                transport.session.mount("https://", adapter)
+                transport.session.mount("http://", adapter)
+            with section("wsdl"):
+                self._face = zeep.Client(
+                    self._wsdl,
+                    plugins=[self._history],
+                    wsse=wsse,
+                    transport=transport,
                 )
-            )
-            f.write("\n")
-
-            fecha_hora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            f.write(f"{fecha_hora} *** RESPUESTA ***\n\n")
-            f.write(
-                etree.tostring(
-                    self._history.last_received["envelope"],
-                    encoding="unicode",
-                    pretty_print=True,
-                )
-            )
-            f.write("\n")
-
-    def _log_response(self, nombre_metodo, args, result):
-        """Escribe datos en claro de petición y respuesta en un archivo de registro"""
-
-        file = Path(self._log_path).joinpath("responses.log")
+            self._connected = True
+
+    def _log(
+        self, nombre_metodo: str, args: list, result, received: bytes | None = None
+    ) -> None:
+        """Encola la petición y la respuesta SOAP en el registro de depuración"""
+
+        if not self._soap_logger.sample():
+            return
+        if received is None:
+            envelope = self._history.last_received
+        else:
+            try:
+                envelope = etree.fromstring(received)
+            except etree.XMLSyntaxError:
+                envelope = None
+        self._soap_logger.log(
+            nombre_metodo,
+            args,
+            result,
+            self._history.last_sent,
+            envelope,
+            self._wsdl,
+        )
 
-        with open(file, "a") as f:
-            fecha_hora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            args_str = " ".join([str(elem) for elem in args])
-            f.write(
-                f"{fecha_hora} *** RESPUESTA A MÉTODO {nombre_metodo} (ARGS: {args_str}) ***\n"
-            )
-            f.write(f"*** USING: {self._wsdl} ***\n")
-            f.write(str(result))
-            f.write("\n\n")
+    def _llamar_metodo_soap(
+        self,
+        nombre_metodo: str,
+        *args,
+        array_type: str = "",
+        parser: Callable[[bytes], ParsedResult] | None = None,
+    ):
+        """Llama al método SOAP indicado con los argumentos suministrados.
 
-    def _llamar_metodo_soap(self, nombre_metodo: str, *args, array_type: str = ""):
-        """Llama al método SOAP indicado con los argumentos suministrados."""
+        Si se indica `parser`, la respuesta se interpreta con él en lugar
+        de con zeep.
+        """
 
         # Asegura la conexión de forma lazy
         self._connect()
@@ -116,16 +233,45 @@ class FACeSoapClient(FACeClient):
             args = list(args)
             args[0] = array(args[0])
 
-        # Llamada al método especificado
+        return self._invocar(
+            nombre_metodo,
+            self._enviar_peticion,
+            nombre_metodo,
+            args,
+            parser,
+            call_args=args,
+        )
+
+    def _enviar_peticion(
+        self,
+        nombre_metodo: str,
+        args: list,
+        parser: Callable[[bytes], ParsedResult] | None = None,
+    ):
+        """Envía la petición SOAP y verifica la cabecera de resultado.
+
+        Los errores de comunicación se propagan al llamante para que la
+        política de reintentos pueda clasificarlos.
+        """
+
+        soap_method = getattr(self._face.service, nombre_metodo)
+        if parser is not None:
+            return self._enviar_peticion_rapida(
+                soap_method, nombre_metodo, args, parser
+            )
+
         try:
-            soap_method = getattr(self._face.service, nombre_metodo)
             result = soap_method(*args)
-            if self._debug:
-                self._log_response(nombre_metodo, args, result)
-        except Exception as e:
-            print("Error:", str(e))
-        if self._debug:
-            self._log_soap()
+        except Exception as exc:
+            # Los sobres de las llamadas fallidas también se registran
+            if self._soap_logger is not None:
+                self._log(nombre_metodo, args, exc)
+            raise
+        info = current_call()
+        if info is not None:
+            info.add_phase("deserialize", info.lap())
+        if self._soap_logger is not None:
+            self._log(nombre_metodo, args, result)
 
         # Gestión de excepciones FACe
         result_header = FACeResult(
@@ -137,6 +283,53 @@ class FACeSoapClient(FACeClient):
 
         return result
 
+    def _enviar_peticion_rapida(
+        self,
+        soap_method,
+        nombre_metodo: str,
+        args: list,
+        parser: Callable[[bytes], ParsedResult],
+    ) -> ParsedResult:
+        """Envía la petición SOAP e interpreta la respuesta con lxml.
+
+        zeep solo serializa y firma la petición; la respuesta se recibe
+        sin procesar y se convierte directamente en objetos de resultado.
+        Los errores se lanzan como en la interpretación con zeep: los
+        SOAP Fault como `zeep.exceptions.Fault` y las respuestas HTTP de
+        error que no son SOAP como `zeep.exceptions.TransportError`.
+        """
+
+        with self._face.settings(raw_response=True):
+            response = soap_method(*args)
+        try:
+            result = parser(response.content)
+        except (etree.XMLSyntaxError, ValueError) as exc:
+            if response.status_code == 200:
+                if self._soap_logger is not None:
+                    self._log(nombre_metodo, args, exc, response.content)
+                raise
+            error = zeep.exceptions.TransportError(
+                f"Server returned HTTP status {response.status_code}",
+                status_code=response.status_code,
+                content=response.content,
+            )
+            if self._soap_logger is not None:
+                self._log(nombre_metodo, args, error, response.content)
+            raise error from exc
+        except Exception as exc:
+            if self._soap_logger is not None:
+                self._log(nombre_metodo, args, exc, response.content)
+            raise
+        info = current_call()
+        if info is not None:
+            info.add_phase("deserialize", info.lap())
+        if self._soap_logger is not None:
+            self._log(nombre_metodo, args, result, response.content)
+
+        self._verify_result_header(result.resultado)
+
+        return result
+
     def consultar_estados(self):
         """Devuelve la respuesta del método SOAP `consultarEstados`.
 
@@ -173,7 +366,11 @@ class FACeSoapClient(FACeClient):
             retornará un listado de las facturas del RCF.
         """
 
-        return self._llamar_metodo_soap("solicitarNuevasFacturas", oficina_contable)
+        return self._llamar_metodo_soap(
+            "solicitarNuevasFacturas",
+            oficina_contable,
+            parser=parse_solicitar_nuevas_facturas if self._fast_parse else None,
+        )
 
     def descargar_factura(self, numero_registro: str):
         """Devuelve la respuesta del método SOAP `descargarFactura`.
@@ -257,6 +454,7 @@ class FACeSoapClient(FACeClient):
             "consultarListadoFacturas",
             numeros_registro,
             array_type="ns0:ArrayOfConsultarListadoFacturasRequest",
+            parser=parse_consultar_listado_facturas if self._fast_parse else None,
         )
 
     def cambiar_estado_factura(
@@ -0,0 +1,485 @@
+"""
+Módulo de registro en segundo plano de peticiones y respuestas SOAP
+"""
+
+import atexit
+import base64
+import binascii
+import datetime
+import gzip
+import hashlib
+import pprint
+import queue
+import random
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from lxml import etree
+from zeep.helpers import serialize_object
+
+SOAP_LOG_FILENAME = "soap.log"
+RESPONSES_LOG_FILENAME = "responses.log"
+ELIDE_THRESHOLD = 1024
+
+
+class _Omitido(str):
+    """Descripción de un contenido sustituido que se representa sin comillas."""
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+class PayloadElider:
+    """Sustituye los contenidos binarios de gran tamaño de los registros.
+
+    Los nodos de texto y valores que superan `threshold` caracteres o
+    bytes se sustituyen por su tamaño y su hash SHA-256, calculado sobre
+    los datos decodificados si están en base64. Si se indica
+    `blob_dir`, los datos se guardan además en ese directorio con su
+    hash como nombre, de modo que el registro sigue siendo auditable.
+    """
+
+    def __init__(self, threshold: int = ELIDE_THRESHOLD, blob_dir: Path | None = None):
+        """Constructor
+
+        Parameters
+        ----------
+        threshold : int
+            Tamaño a partir del cual se sustituye un contenido. Si es 0
+            no se sustituye ninguno. Default: 1024
+        blob_dir : Path, optional
+            Directorio donde guardar los contenidos sustituidos.
+            Default: None
+        queue_size : int
+            Número máximo de registros pendientes de escribir. Si es 0 la
+            cola no tiene límite. Default: 10000
+        """
+
+        self.threshold = threshold
+        self.blob_dir = Path(blob_dir) if blob_dir else None
+
+    def _is_large(self, value) -> bool:
+        return (
+            self.threshold > 0
+            and isinstance(value, (str, bytes))
+            and len(value) >= self.threshold
+        )
+
+    def _spill(self, digest: str, data: bytes) -> None:
+        path = self.blob_dir.joinpath(digest[:2], digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+
+    def summary(self, value: str | bytes) -> str:
+        """Devuelve la descripción de un contenido sustituido.
+
+        Parameters
+        ----------
+        value : str | bytes
+            Contenido binario o codificado en base64
+
+        Returns
+        -------
+        str
+            descripción con el tamaño y el hash del contenido
+        """
+
+        if isinstance(value, str):
+            try:
+                data = base64.b64decode("".join(value.split()), validate=True)
+                tipo = "base64"
+            except (binascii.Error, ValueError):
+                data = value.encode("utf-8")
+                tipo = "texto"
+        else:
+            data = value
+            tipo = "binario"
+        digest = hashlib.sha256(data).hexdigest()
+        if self.blob_dir is not None:
+            self._spill(digest, data)
+        return f"[{tipo} omitido: {len(data)} bytes, sha256={digest}]"
+
+    def envelope(self, envelope: etree._Element) -> str:
+        """Serializa un sobre SOAP sustituyendo los contenidos grandes.
+
+        El sobre se modifica temporalmente y se restaura tras
+        serializarlo, evitando copiar árboles de gran tamaño.
+        """
+
+        sustituidos = []
+        for elemento in envelope.iter():
+            if self._is_large(elemento.text):
+                sustituidos.append((elemento, elemento.text))
+                elemento.text = self.summary(elemento.text)
+        try:
+            return etree.tostring(envelope, encoding="unicode", pretty_print=True)
+        finally:
+            for elemento, texto in sustituidos:
+                elemento.text = texto
+
+    def _reduce(self, value):
+        if isinstance(value, dict):
+            return {clave: self._reduce(valor) for clave, valor in value.items()}
+        if isinstance(value, list):
+            return [self._reduce(valor) for valor in value]
+        if self._is_large(value):
+            return _Omitido(self.summary(value))
+        return value
+
+    def result(self, result) -> str:
+        """Representa una respuesta de zeep sustituyendo los contenidos grandes."""
+
+        if self.threshold <= 0:
+            return str(result)
+        return pprint.pformat(
+            self._reduce(serialize_object(result, dict)), sort_dicts=False
+        )
+
+
+class RotatingFile:
+    """Archivo de registro con rotación por tamaño y antigüedad.
+
+    Cuando el archivo supera `max_bytes` o lleva abierto más de
+    `max_age` segundos, se renombra añadiendo el sufijo `.1`,
+    desplazando los anteriores, y se conservan como máximo
+    `backup_count` archivos rotados, opcionalmente comprimidos con gzip.
+
+    No es seguro para uso concurrente: está pensado para ser usado
+    únicamente desde el hilo escritor de `SoapLogger`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = 0,
+        max_age: float = 0,
+        backup_count: int = 5,
+        compress: bool = False,
+    ):
+        """Constructor
+
+        Parameters
+        ----------
+        path : Path
+            Ruta del archivo de registro
+        max_bytes : int
+            Tamaño a partir del cual se rota el archivo. Si es 0 no se
+            rota por tamaño. Default: 0
+        max_age : float
+            Segundos a partir de los cuales se rota el archivo. Si es 0
+            no se rota por antigüedad. Default: 0
+        backup_count : int
+            Número de archivos rotados a conservar. Default: 5
+        compress : bool
+            Comprime con gzip los archivos rotados. Default: False
+        """
+
+        self._path = Path(path)
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._backup_count = backup_count
+        self._compress = compress
+        self._file = None
+        self._opened_at = 0.0
+
+    def _rotated(self, index: int) -> Path:
+        suffix = f".{index}.gz" if self._compress else f".{index}"
+        return self._path.with_name(self._path.name + suffix)
+
+    def _open(self) -> None:
+        # Permanece abierto entre escrituras y se cierra en `close` o al rotar
+        # pylint: disable-next=consider-using-with
+        self._file = open(self._path, "a", encoding="utf-8")
+        self._opened_at = time.monotonic()
+
+    def _should_rotate(self) -> bool:
+        if self._max_bytes and self._file.tell() >= self._max_bytes:
+            return True
+        if self._max_age and time.monotonic() - self._opened_at >= self._max_age:
+            return True
+        return False
+
+    def rotate(self) -> None:
+        """Rota el archivo de registro."""
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if not self._path.exists():
+            return
+        if self._backup_count <= 0:
+            self._path.unlink()
+            return
+
+        self._rotated(self._backup_count).unlink(missing_ok=True)
+        for index in range(self._backup_count - 1, 0, -1):
+            if self._rotated(index).exists():
+                self._rotated(index).rename(self._rotated(index + 1))
+        if self._compress:
+            with open(self._path, "rb") as origen, gzip.open(
+                self._rotated(1), "wb"
+            ) as destino:
+                shutil.copyfileobj(origen, destino)
+            self._path.unlink()
+        else:
+            self._path.rename(self._rotated(1))
+
+    def write(self, text: str) -> None:
+        """Escribe texto en el archivo, rotándolo si es necesario."""
+
+        if self._file is None:
+            self._open()
+        elif self._should_rotate():
+            self.rotate()
+            self._open()
+        self._file.write(text)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SoapLogger:
+    """Registro de peticiones y respuestas SOAP en segundo plano.
+
+    Las peticiones se encolan sin apenas coste para el llamante y un
+    hilo escritor se encarga de darles formato y escribirlas por lotes
+    en los archivos `soap.log`, con los sobres SOAP, y `responses.log`,
+    con la respuesta interpretada. Los archivos se rotan según los
+    límites indicados y puede registrarse solo una muestra de las
+    peticiones.
+
+    La cola tiene un tamaño máximo para que un disco lento no acumule
+    registros sin límite en memoria. Con la cola llena los nuevos
+    registros se descartan, sin detener las llamadas a FACe, y su número
+    se anota en `soap.log` y puede consultarse en `dropped`.
+    """
+
+    def __init__(
+        self,
+        log_path: Path,
+        max_bytes: int = 10 * 1024 * 1024,
+        max_age: float = 0,
+        backup_count: int = 5,
+        compress: bool = False,
+        sample_rate: float = 1.0,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        elide_threshold: int = ELIDE_THRESHOLD,
+        blob_dir: Path | None = None,
+        queue_size: int = 10000,
+    ):
+        """Constructor
+
+        Parameters
+        ----------
+        log_path : Path
+            Ruta donde se ubicarán los archivos de registro
+        max_bytes : int
+            Tamaño a partir del cual se rotan los archivos. Si es 0 no se
+            rotan por tamaño. Default: 10 MiB
+        max_age : float
+            Segundos a partir de los cuales se rotan los archivos. Si es
+            0 no se rotan por antigüedad. Default: 0
+        backup_count : int
+            Número de archivos rotados a conservar. Default: 5
+        compress : bool
+            Comprime con gzip los archivos rotados. Default: False
+        sample_rate : float
+            Proporción de peticiones a registrar. Default: 1.0
+        batch_size : int
+            Número máximo de registros escritos en cada lote.
+            Default: 100
+        flush_interval : float
+            Segundos máximos que un registro permanece sin escribirse.
+            Default: 1.0
+        elide_threshold : int
+            Tamaño a partir del cual los contenidos binarios se sustituyen
+            por su tamaño y hash. Si es 0 se registran completos.
+            Default: 1024
+        blob_dir : Path, optional
+            Directorio donde guardar los contenidos sustituidos.
+            Default: None
+        queue_size : int
+            Número máximo de registros pendientes de escribir. Si es 0 la
+            cola no tiene límite. Default: 10000
+        """
+
+        self._log_path = Path(log_path)
+        self._sample_rate = sample_rate
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._elider = PayloadElider(elide_threshold, blob_dir)
+        self._files = {
+            nombre: RotatingFile(
+                self._log_path.joinpath(nombre),
+                max_bytes,
+                max_age,
+                backup_count,
+                compress,
+            )
+            for nombre in (SOAP_LOG_FILENAME, RESPONSES_LOG_FILENAME)
+        }
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self._dropped_logged = 0
+
+    def _start(self) -> None:
+        """Arranca el hilo escritor de forma lazy."""
+
+        with self._lock:
+            if self._thread is None:
+                self._log_path.mkdir(parents=True, exist_ok=True)
+                self._thread = threading.Thread(
+                    target=self._run, name="aapp2face-soaplog", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    def sample(self) -> bool:
+        """Decide si la petición en curso debe registrarse."""
+
+        return self._sample_rate >= 1 or random.random() < self._sample_rate
+
+    @property
+    def dropped(self) -> int:
+        """Número de registros descartados por estar la cola llena."""
+
+        with self._lock:
+            return self._dropped
+
+    def log(
+        self,
+        nombre_metodo: str,
+        args,
+        result,
+        sent: etree._Element | None,
+        received: etree._Element | None,
+        wsdl: str,
+    ) -> None:
+        """Encola el registro de una petición SOAP.
+
+        Parameters
+        ----------
+        nombre_metodo : str
+            Nombre del método SOAP invocado
+        args
+            Argumentos de la llamada
+        result
+            Respuesta interpretada por zeep
+        sent : etree._Element
+            Sobre SOAP enviado
+        received : etree._Element
+            Sobre SOAP recibido
+        wsdl : str
+            Ruta del WSDL del servicio
+        """
+
+        self._start()
+        fecha_hora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            self._queue.put_nowait(
+                (fecha_hora, nombre_metodo, args, result, sent, received, wsdl)
+            )
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def _format_soap(self, fecha_hora, sent, received) -> str:
+        partes = []
+        for titulo, envelope in (("PETICIÓN", sent), ("RESPUESTA", received)):
+            partes.append(f"{fecha_hora} *** {titulo} ***\n\n")
+            if envelope is not None:
+                partes.append(self._elider.envelope(envelope))
+            partes.append("\n")
+        return "".join(partes)
+
+    def _format_response(self, fecha_hora, nombre_metodo, args, result, wsdl) -> str:
+        args_str = " ".join([str(elem) for elem in args])
+        return (
+            f"{fecha_hora} *** RESPUESTA A MÉTODO {nombre_metodo} (ARGS: {args_str}) ***\n"
+            f"*** USING: {wsdl} ***\n"
+            f"{self._elider.result(result)}\n\n"
+        )
+
+    def _write_batch(self, batch: list) -> None:
+        soap = []
+        responses = []
+        with self._lock:
+            descartados = self._dropped - self._dropped_logged
+            self._dropped_logged = self._dropped
+        if descartados:
+            fecha_hora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            soap.append(
+                f"{fecha_hora} *** {descartados} REGISTROS DESCARTADOS "
+                "POR COLA LLENA ***\n\n"
+            )
+        for fecha_hora, nombre_metodo, args, result, sent, received, wsdl in batch:
+            responses.append(
+                self._format_response(fecha_hora, nombre_metodo, args, result, wsdl)
+            )
+            soap.append(self._format_soap(fecha_hora, sent, received))
+        self._files[RESPONSES_LOG_FILENAME].write("".join(responses))
+        self._files[SOAP_LOG_FILENAME].write("".join(soap))
+        for file in self._files.values():
+            file.flush()
+
+    def _run(self) -> None:
+        """Bucle del hilo escritor."""
+
+        terminar = False
+        while not terminar:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self._flush_interval)
+            except queue.Empty:
+                continue
+            while True:
+                if item is None:
+                    terminar = True
+                else:
+                    batch.append(item)
+                if terminar or len(batch) >= self._batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception:
+                    # Un fallo del registro nunca debe afectar a las
+                    # llamadas a FACe
+                    pass
+            for _ in range(len(batch) + terminar):
+                self._queue.task_done()
+        for file in self._files.values():
+            file.close()
+
+    def flush(self) -> None:
+        """Espera a que se escriban todos los registros encolados."""
+
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Escribe los registros pendientes y detiene el hilo escritor."""
+
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+            atexit.unregister(self.close)
@@ -0,0 +1,769 @@
+"""
+Módulo de almacenamiento de las facturas descargadas
+"""
+
+import errno
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import uuid
+import warnings
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import IO, Iterable
+
+from .encoding import _exists_error, _fsync_dir, b64decode_chunks, write_atomic
+from .profiling import section
+
+BLOBS_DIRNAME = ".blobs"
+MANIFEST_FILENAME = "manifiesto.json"
+INDEX_FILENAME = "indice.jsonl"
+DURABILITY_LEVELS = ("none", "batch", "always")
+LAYOUTS = ("flat", "date", "office", "hash")
+HASH_SHARD_LEVELS = 2
+ARCHIVE_GROUPS = ("day", "office")
+
+
+@dataclass(slots=True, frozen=True)
+class StoredFile:
+    """Archivo guardado en un almacén de descargas.
+
+    Attributes
+    ----------
+    path : Path
+        Ruta del archivo guardado
+    sha256 : str
+        Hash SHA-256 del contenido
+    size : int
+        Tamaño en bytes del contenido
+    """
+
+    path: Path
+    sha256: str
+    size: int
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for bloque in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def digest_base64(contenido: str | bytes) -> tuple[str, int]:
+    """Calcula el hash SHA-256 y el tamaño de un contenido en base64 sin
+    decodificarlo completo en memoria.
+
+    Parameters
+    ----------
+    contenido : str | bytes
+        Contenido codificado en base64
+
+    Returns
+    -------
+    tuple[str, int]
+        hash SHA-256 y tamaño en bytes del contenido decodificado
+    """
+
+    digest = hashlib.sha256()
+    size = 0
+    for bloque in b64decode_chunks(contenido):
+        digest.update(bloque)
+        size += len(bloque)
+
+    return digest.hexdigest(), size
+
+
+class DirectoryStore:
+    """Almacén de descargas que guarda los archivos de cada factura tal
+    cual en un directorio con su número de registro.
+
+    Los directorios de las facturas pueden repartirse en subdirectorios
+    por fecha de registro, por oficina contable o por prefijo del hash
+    del número de registro, para que ningún directorio acumule cientos
+    de miles de entradas.
+
+    Los archivos se escriben de forma atómica. Con durabilidad "batch"
+    su sincronización con el disco se agrupa hasta la siguiente llamada
+    a `sync`, de modo que un lote de descargas no espera al disco por
+    cada archivo.
+    """
+
+    def __init__(self, path: Path, durability: str = "always", layout: str = "flat"):
+        """Constructor
+
+        Parameters
+        ----------
+        path : Path
+            Directorio raíz de las descargas
+        durability : str
+            Sincronización de los archivos con el disco: "none" la deja
+            a cargo del sistema, "batch" la agrupa hasta llamar a
+            `sync` y "always" la realiza con cada archivo. Default:
+            "always"
+        layout : str
+            Reparto de los directorios de las facturas: "flat" en el
+            directorio raíz, "date" en `año/mes/día` de registro,
+            "office" en la oficina contable y "hash" en dos niveles con
+            el prefijo del hash SHA-1 del número de registro. Default:
+            "flat"
+        """
+
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Nivel de durabilidad desconocido: {durability}")
+        if layout not in LAYOUTS:
+            raise ValueError(f"Reparto de directorios desconocido: {layout}")
+        self.path = Path(path)
+        self.durability = durability
+        self.layout = layout
+        self._lock = threading.Lock()
+        self._pendientes: set[Path] = set()
+
+    def _escribir(
+        self, path: Path, bloques: Iterable[bytes], force: bool = False
+    ) -> tuple[str, int]:
+        resultado = write_atomic(
+            path,
+            bloques,
+            force,
+            "always" if self.durability == "always" else "none",
+        )
+        self._pendiente(path)
+        return resultado
+
+    def _pendiente(self, path: Path) -> None:
+        if self.durability == "batch":
+            with self._lock:
+                self._pendientes.add(path)
+                # Los directorios de la factura pueden ser nuevos, por lo
+                # que también se sincronizan las entradas de sus padres
+                for directorio in path.parents:
+                    self._pendientes.add(directorio)
+                    if directorio == self.path:
+                        break
+
+    def directorio(
+        self,
+        numero_registro: str,
+        oficina_contable: str | None = None,
+        fecha_registro: str | None = None,
+    ) -> Path:
+        """Devuelve el directorio de los archivos de una factura.
+
+        Si el reparto de directorios necesita la oficina contable o la
+        fecha de registro y no se conocen, se usan los subdirectorios
+        `sin_oficina` o `sin_fecha`.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        oficina_contable : str | None
+            Código DIR3 de la oficina contable de la factura. Default:
+            None
+        fecha_registro : str | None
+            Fecha de registro de la factura en FACe, con formato
+            `AAAA-MM-DD` seguido opcionalmente de la hora. Default: None
+        """
+
+        if self.layout == "date":
+            try:
+                fecha = datetime.strptime((fecha_registro or "")[:10], "%Y-%m-%d")
+                return self.path.joinpath(
+                    f"{fecha:%Y}", f"{fecha:%m}", f"{fecha:%d}", numero_registro
+                )
+            except ValueError:
+                return self.path.joinpath("sin_fecha", numero_registro)
+        if self.layout == "office":
+            return self.path.joinpath(
+                oficina_contable or "sin_oficina", numero_registro
+            )
+        if self.layout == "hash":
+            digest = hashlib.sha1(numero_registro.encode("utf-8")).hexdigest()
+            prefijos = [digest[2 * n : 2 * n + 2] for n in range(HASH_SHARD_LEVELS)]
+            return self.path.joinpath(*prefijos, numero_registro)
+        return self.path.joinpath(numero_registro)
+
+    def localizar(self, numero_registro: str) -> Path | None:
+        """Busca el directorio existente de los archivos de una factura.
+
+        Con los repartos por fecha o por oficina, que dependen de datos
+        que no forman parte del número de registro, se comprueba cada
+        subdirectorio del reparto.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+
+        Returns
+        -------
+        Path | None
+            directorio de la factura o None si no se encuentra
+        """
+
+        # Sin oficina o fecha conocidas se usa el mismo directorio
+        path = self.directorio(numero_registro)
+        if path.is_dir():
+            return path
+        if self.layout in ("flat", "hash"):
+            return None
+        patron = "*/*/*/" if self.layout == "date" else "*/"
+        for path in self.path.glob(patron + numero_registro):
+            oculto = path.relative_to(self.path).parts[0].startswith(".")
+            if path.is_dir() and not oculto:
+                return path
+        return None
+
+    def guardar(
+        self,
+        numero_registro: str,
+        nombre: str,
+        contenido: str | bytes,
+        force: bool = False,
+        oficina_contable: str | None = None,
+        fecha_registro: str | None = None,
+    ) -> StoredFile:
+        """Guarda un archivo de una factura.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        nombre : str
+            Nombre del archivo
+        contenido : str | bytes
+            Contenido del archivo codificado en base64
+        force : bool
+            Sobrescribe el archivo si existe. En caso contrario lanza
+            una excepción. Default: False
+        oficina_contable : str | None
+            Código DIR3 de la oficina contable de la factura, para los
+            almacenes que agrupan las facturas por oficina. Default: None
+        fecha_registro : str | None
+            Fecha de registro de la factura en FACe, para los almacenes
+            que agrupan las facturas por fecha. Default: None
+
+        Returns
+        -------
+        StoredFile
+            ruta, hash y tamaño del archivo guardado
+
+        Raises
+        ------
+        FileExistsError
+            Si el archivo existe y no se fuerza su sobrescritura
+        """
+
+        directorio = self.directorio(numero_registro, oficina_contable, fecha_registro)
+        directorio.mkdir(parents=True, exist_ok=True)
+        path = directorio.joinpath(nombre)
+        return StoredFile(
+            path, *self._escribir(path, b64decode_chunks(contenido), force)
+        )
+
+    def verificar(self, archivo: StoredFile, verify_hash: bool = False) -> bool:
+        """Indica si un archivo guardado sigue intacto.
+
+        Parameters
+        ----------
+        archivo : StoredFile
+            Archivo guardado
+        verify_hash : bool
+            Comprueba el hash del contenido además de su tamaño.
+            Default: False
+        """
+
+        try:
+            if Path(archivo.path).stat().st_size != archivo.size:
+                return False
+        except FileNotFoundError:
+            return False
+        return not verify_hash or _sha256(archivo.path) == archivo.sha256
+
+    def sync(self) -> None:
+        """Sincroniza con el disco los archivos escritos desde la última
+        sincronización."""
+
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, set()
+        if not pendientes:
+            return
+        with section("disk"):
+            directorios = []
+            for path in pendientes:
+                if path.is_file():
+                    with open(path, "rb+") as file:
+                        os.fsync(file.fileno())
+                elif path.is_dir():
+                    directorios.append(path)
+            # Las entradas de cada directorio, una vez sincronizados sus
+            # archivos y subdirectorios
+            for path in sorted(directorios, key=lambda path: -len(path.parts)):
+                _fsync_dir(path)
+
+    def close(self) -> None:
+        """Finaliza las escrituras pendientes del almacén."""
+
+        self.sync()
+
+
+class ContentAddressedStore(DirectoryStore):
+    """Almacén de descargas que guarda cada contenido distinto una sola vez.
+
+    Los contenidos se guardan en el directorio `.blobs`, nombrados por
+    su hash SHA-256. El directorio de cada factura contiene un
+    manifiesto con el hash y tamaño de cada uno de sus archivos y, si
+    se usan enlaces duros, un enlace a cada contenido con el nombre del
+    archivo. Los archivos enlazados comparten el contenido con el resto
+    de facturas, por lo que no deben modificarse.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        hardlinks: bool = True,
+        durability: str = "always",
+        layout: str = "flat",
+    ):
+        """Constructor
+
+        Parameters
+        ----------
+        path : Path
+            Directorio raíz de las descargas
+        hardlinks : bool
+            Crea en el directorio de cada factura un enlace duro a cada
+            contenido. Si el sistema de archivos no admite enlaces, los
+            archivos solo constan en el manifiesto. Default: True
+        durability : str
+            Sincronización de los archivos con el disco. Default:
+            "always"
+        layout : str
+            Reparto de los directorios de las facturas. Default: "flat"
+        """
+
+        super().__init__(path, durability, layout)
+        self.hardlinks = hardlinks
+        self.blobs = self.path.joinpath(BLOBS_DIRNAME)
+
+    def blob(self, digest: str) -> Path:
+        """Devuelve la ruta de un contenido a partir de su hash.
+
+        Parameters
+        ----------
+        digest : str
+            Hash SHA-256 del contenido
+        """
+
+        return self.blobs.joinpath(digest[:2], digest)
+
+    def manifiesto(self, numero_registro: str) -> dict[str, dict]:
+        """Devuelve el manifiesto de los archivos de una factura.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+
+        Returns
+        -------
+        dict[str, dict]
+            hash (`sha256`) y tamaño (`size`) de cada archivo por nombre
+        """
+
+        directorio = self.localizar(numero_registro)
+        if directorio is None:
+            return {}
+        return self._leer_manifiesto(directorio)
+
+    def _leer_manifiesto(self, directorio: Path) -> dict[str, dict]:
+        path = directorio.joinpath(MANIFEST_FILENAME)
+        if not path.exists():
+            return {}
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+
+    def ruta(self, numero_registro: str, nombre: str) -> Path:
+        """Devuelve la ruta del contenido de un archivo de una factura.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        nombre : str
+            Nombre del archivo
+
+        Raises
+        ------
+        FileNotFoundError
+            Si el archivo no consta en el manifiesto de la factura
+        """
+
+        entrada = self.manifiesto(numero_registro).get(nombre)
+        if entrada is None:
+            raise FileNotFoundError(
+                errno.ENOENT,
+                os.strerror(errno.ENOENT),
+                str(self.directorio(numero_registro).joinpath(nombre)),
+            )
+        return self.blob(entrada["sha256"])
+
+    def guardar(
+        self,
+        numero_registro: str,
+        nombre: str,
+        contenido: str | bytes,
+        force: bool = False,
+        oficina_contable: str | None = None,
+        fecha_registro: str | None = None,
+    ) -> StoredFile:
+        directorio = self.directorio(numero_registro, oficina_contable, fecha_registro)
+        path = directorio.joinpath(nombre)
+        manifiesto = self._leer_manifiesto(directorio)
+        if not force and (nombre in manifiesto or path.exists()):
+            raise _exists_error(path)
+
+        with section("base64"):
+            digest, size = digest_base64(contenido)
+        blob = self.blob(digest)
+        # Un contenido de tamaño distinto es una escritura no sincronizada
+        # que se perdió, por lo que se vuelve a escribir
+        if not blob.exists() or blob.stat().st_size != size:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            self._escribir(blob, b64decode_chunks(contenido), force=True)
+
+        directorio.mkdir(parents=True, exist_ok=True)
+        if self.hardlinks:
+            enlace = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+            try:
+                with section("disk"):
+                    os.link(blob, enlace)
+                    os.replace(enlace, path)
+                if self.durability == "always":
+                    _fsync_dir(directorio)
+                self._pendiente(path)
+            except OSError:
+                enlace.unlink(missing_ok=True)
+                path = blob
+        else:
+            path = blob
+
+        manifiesto[nombre] = {"sha256": digest, "size": size}
+        self._escribir(
+            directorio.joinpath(MANIFEST_FILENAME),
+            [json.dumps(manifiesto, indent=4, ensure_ascii=False).encode("utf-8")],
+            force=True,
+        )
+
+        return StoredFile(path, digest, size)
+
+
+def _entrada_indice(entrada: dict) -> tuple[str, str, int]:
+    # Las entradas del índice de `ArchiveStore` se conservan en memoria
+    # como tuplas, con la ruta de cada volumen compartida entre ellas
+    return sys.intern(entrada["volumen"]), entrada["sha256"], entrada["size"]
+
+
+class _MiembroZip(io.BufferedIOBase):
+    """Archivo de un volumen ZIP abierto para su lectura, que mantiene
+    abierto el volumen hasta que se cierra."""
+
+    def __init__(self, volumen: zipfile.ZipFile, nombre: str):
+        super().__init__()
+        self._volumen = volumen
+        self._miembro = volumen.open(nombre)
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int | None = -1) -> bytes:
+        return self._miembro.read(size)
+
+    def read1(self, size: int = -1) -> bytes:
+        return self._miembro.read1(size)
+
+    def seekable(self) -> bool:
+        return self._miembro.seekable()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._miembro.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._miembro.tell()
+
+    def close(self) -> None:
+        if not self.closed:
+            try:
+                self._miembro.close()
+            finally:
+                self._volumen.close()
+                super().close()
+
+
+class ArchiveStore(DirectoryStore):
+    """Almacén de descargas que empaqueta los archivos de las facturas
+    en archivos ZIP comprimidos.
+
+    Los archivos se agrupan por día de registro o por oficina contable
+    en un directorio por grupo, que contiene una serie de volúmenes ZIP
+    numerados. Cada contenido se comprime según se decodifica, sin
+    archivos temporales, y se anota en el índice `indice.jsonl` del
+    directorio raíz con el volumen que lo contiene. El índice se lee
+    la primera vez que se necesita, no al crear el almacén.
+
+    Cada llamada a `sync` cierra los volúmenes abiertos, escribiendo su
+    directorio central, y solo entonces anota sus contenidos en el
+    índice. Un volumen cerrado no vuelve a modificarse, de modo que una
+    interrupción nunca afecta a contenidos ya indexados.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        group: str = "day",
+        max_bytes: int = 0,
+        durability: str = "always",
+    ):
+        """Constructor
+
+        Parameters
+        ----------
+        path : Path
+            Directorio raíz de las descargas
+        group : str
+            Agrupación de los volúmenes: "day" por día de registro u
+            "office" por oficina contable. Default: "day"
+        max_bytes : int
+            Tamaño en bytes a partir del cual se cierra un volumen y se
+            continúa en el siguiente. Con 0 no hay límite. Default: 0
+        durability : str
+            Con "none" los volúmenes y el índice no se sincronizan con
+            el disco. En otro caso se sincronizan al cerrarse en cada
+            llamada a `sync`. Default: "always"
+        """
+
+        if group not in ARCHIVE_GROUPS:
+            raise ValueError(f"Agrupación desconocida: {group}")
+        super().__init__(path, durability)
+        self.group = group
+        self.max_bytes = max_bytes
+        self.index = self.path.joinpath(INDEX_FILENAME)
+        self._abiertos: dict[str, zipfile.ZipFile] = {}
+        self._siguientes: dict[str, int] = {}
+        self._indice_cargado: dict[tuple[str, str], tuple[str, str, int]] | None = None
+        self._sin_indexar: dict[tuple[str, str], dict] = {}
+
+    @property
+    def _indice(self) -> dict[tuple[str, str], tuple[str, str, int]]:
+        """Volumen, hash y tamaño de cada archivo indexado, por número de
+        registro y nombre, que se leen del índice en su primer uso."""
+
+        if self._indice_cargado is None:
+            indice = {}
+            if self.index.exists():
+                with open(self.index, encoding="utf-8") as file:
+                    for linea in file:
+                        try:
+                            entrada = json.loads(linea)
+                        except json.JSONDecodeError:
+                            # Anotación truncada por una interrupción
+                            continue
+                        indice[
+                            (entrada["numero_registro"], entrada["nombre"])
+                        ] = _entrada_indice(entrada)
+            self._indice_cargado = indice
+        return self._indice_cargado
+
+    def grupo(
+        self, oficina_contable: str | None = None, fecha_registro: str | None = None
+    ) -> str:
+        """Devuelve el grupo en el que se guardan los archivos de una
+        factura.
+
+        Si la agrupación necesita la oficina contable y no se conoce, se
+        usa el grupo `sin_oficina`. Si necesita la fecha de registro y no
+        se conoce, se usa la fecha del día.
+
+        Parameters
+        ----------
+        oficina_contable : str | None
+            Código DIR3 de la oficina contable de la factura. Default:
+            None
+        fecha_registro : str | None
+            Fecha de registro de la factura en FACe, con formato
+            `AAAA-MM-DD` seguido opcionalmente de la hora. Default: None
+        """
+
+        if self.group == "office":
+            return oficina_contable or "sin_oficina"
+        try:
+            fecha = datetime.strptime((fecha_registro or "")[:10], "%Y-%m-%d")
+        except ValueError:
+            return date.today().isoformat()
+        return f"{fecha:%Y-%m-%d}"
+
+    def _volumen(self, grupo: str) -> zipfile.ZipFile:
+        archivo = self._abiertos.get(grupo)
+        if archivo is not None:
+            # El puntero del ZIP abierto indica el tamaño ya escrito
+            if not self.max_bytes or archivo.fp.tell() < self.max_bytes:
+                return archivo
+            del self._abiertos[grupo]
+            self._cerrar([archivo])
+
+        directorio = self.path.joinpath(grupo)
+        if grupo not in self._siguientes:
+            directorio.mkdir(parents=True, exist_ok=True)
+            numeros = [
+                int(volumen.stem)
+                for volumen in directorio.glob("*.zip")
+                if volumen.stem.isdigit()
+            ]
+            self._siguientes[grupo] = max(numeros, default=0) + 1
+        numero = self._siguientes[grupo]
+        self._siguientes[grupo] += 1
+
+        # Permanece abierto hasta la siguiente llamada a `sync`
+        # pylint: disable-next=consider-using-with
+        archivo = zipfile.ZipFile(
+            directorio.joinpath(f"{numero:06d}.zip"), "x", zipfile.ZIP_DEFLATED
+        )
+        self._abiertos[grupo] = archivo
+        return archivo
+
+    def _cerrar(self, archivos: list[zipfile.ZipFile]) -> None:
+        for archivo in archivos:
+            archivo.close()
+            if self.durability != "none":
+                with open(archivo.filename, "rb") as file:
+                    os.fsync(file.fileno())
+                _fsync_dir(Path(archivo.filename).parent)
+
+    def guardar(
+        self,
+        numero_registro: str,
+        nombre: str,
+        contenido: str | bytes,
+        force: bool = False,
+        oficina_contable: str | None = None,
+        fecha_registro: str | None = None,
+    ) -> StoredFile:
+        clave = (numero_registro, nombre)
+        miembro = f"{numero_registro}/{nombre}"
+        grupo = self.grupo(oficina_contable, fecha_registro)
+        with self._lock:
+            if not force and (clave in self._indice or clave in self._sin_indexar):
+                raise _exists_error(self.path.joinpath(miembro))
+            archivo = self._volumen(grupo)
+            info = zipfile.ZipInfo(miembro, datetime.now().timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            digest = hashlib.sha256()
+            size = 0
+            bloques = b64decode_chunks(contenido)
+            with warnings.catch_warnings():
+                # Un contenido sobrescrito se repite en el volumen y el
+                # índice apunta a la última copia
+                warnings.simplefilter("ignore", UserWarning)
+                with archivo.open(info, "w", force_zip64=True) as miembro_zip:
+                    while True:
+                        with section("base64"):
+                            bloque = next(bloques, None)
+                        if bloque is None:
+                            break
+                        digest.update(bloque)
+                        size += len(bloque)
+                        with section("disk"):
+                            miembro_zip.write(bloque)
+            volumen = Path(archivo.filename)
+            self._sin_indexar[clave] = {
+                "numero_registro": numero_registro,
+                "nombre": nombre,
+                "volumen": os.path.relpath(volumen, self.path),
+                "sha256": digest.hexdigest(),
+                "size": size,
+            }
+
+        return StoredFile(volumen.joinpath(miembro), digest.hexdigest(), size)
+
+    def abrir(self, numero_registro: str, nombre: str) -> IO[bytes]:
+        """Abre para su lectura un archivo de una factura.
+
+        Si el archivo está en un volumen todavía abierto se llama antes
+        a `sync` para cerrarlo.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        nombre : str
+            Nombre del archivo
+
+        Raises
+        ------
+        FileNotFoundError
+            Si el archivo no consta en el índice
+        """
+
+        if (numero_registro, nombre) in self._sin_indexar:
+            self.sync()
+        entrada = self._indice.get((numero_registro, nombre))
+        if entrada is None:
+            raise FileNotFoundError(
+                errno.ENOENT,
+                os.strerror(errno.ENOENT),
+                str(self.path.joinpath(numero_registro, nombre)),
+            )
+        # El volumen se cierra al cerrar el archivo devuelto
+        # pylint: disable-next=consider-using-with
+        volumen = zipfile.ZipFile(self.path.joinpath(entrada[0]))
+        try:
+            return _MiembroZip(volumen, f"{numero_registro}/{nombre}")
+        except BaseException:
+            volumen.close()
+            raise
+
+    def verificar(self, archivo: StoredFile, verify_hash: bool = False) -> bool:
+        path = Path(archivo.path)
+        entrada = self._indice.get((path.parent.name, path.name))
+        if (
+            entrada is None
+            or entrada[1:] != (archivo.sha256, archivo.size)
+            or not self.path.joinpath(entrada[0]).exists()
+        ):
+            return False
+        if not verify_hash:
+            return True
+        digest = hashlib.sha256()
+        with self.abrir(path.parent.name, path.name) as file:
+            for bloque in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(bloque)
+        return digest.hexdigest() == archivo.sha256
+
+    def sync(self) -> None:
+        """Cierra los volúmenes abiertos y anota sus contenidos en el
+        índice."""
+
+        with self._lock:
+            with section("disk"):
+                self._cerrar(list(self._abiertos.values()))
+                self._abiertos.clear()
+                if not self._sin_indexar:
+                    return
+                self.path.mkdir(parents=True, exist_ok=True)
+                with open(self.index, "a", encoding="utf-8") as file:
+                    for entrada in self._sin_indexar.values():
+                        file.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+                    file.flush()
+                    if self.durability != "none":
+                        os.fsync(file.fileno())
+            if self._indice_cargado is not None:
+                for clave, entrada in self._sin_indexar.items():
+                    self._indice_cargado[clave] = _entrada_indice(entrada)
+            self._sin_indexar.clear()
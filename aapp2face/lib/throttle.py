@@ -0,0 +1,339 @@
+"""
+Módulo de limitación de peticiones y cortocircuito de llamadas a FACe
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from . import exceptions as excs
+from .retry import is_transient
+
+
+@contextmanager
+def _file_lock(file):
+    """Bloqueo exclusivo de un archivo compartido entre procesos."""
+
+    if os.name == "nt":
+        import msvcrt
+
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+class TokenBucket:
+    """Cubo de fichas para limitar el ritmo de peticiones.
+
+    El cubo se rellena a razón de `rate` fichas por segundo hasta un
+    máximo de `capacity`. Cada petición consume una ficha y, si no hay
+    disponibles, espera el tiempo necesario para que se genere. Las
+    esperas se reservan por orden de llegada, de modo que el ritmo se
+    mantiene estable aunque haya muchos hilos esperando.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        """Constructor
+
+        Parameters
+        ----------
+        rate : float
+            Número de peticiones por segundo permitidas
+        capacity : float
+            Número de peticiones que pueden realizarse en ráfaga.
+            Default: 1
+        """
+
+        self.rate = rate
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._timestamp = time.time()
+
+    def _reservar(self, tokens: float, timestamp: float) -> tuple[float, float, float]:
+        """Consume una ficha y calcula la espera necesaria.
+
+        Returns
+        -------
+        tuple[float, float, float]
+            fichas y marca de tiempo actualizadas y espera en segundos
+        """
+
+        ahora = time.time()
+        tokens = min(self.capacity, tokens + (ahora - timestamp) * self.rate)
+        tokens -= 1
+        espera = -tokens / self.rate if tokens < 0 else 0.0
+        return tokens, ahora, espera
+
+    def acquire(self) -> float:
+        """Espera hasta disponer de turno para realizar una petición.
+
+        Returns
+        -------
+        float
+            segundos esperados
+        """
+
+        with self._lock:
+            self._tokens, self._timestamp, espera = self._reservar(
+                self._tokens, self._timestamp
+            )
+        if espera > 0:
+            time.sleep(espera)
+        return espera
+
+
+class SharedTokenBucket(TokenBucket):
+    """Cubo de fichas compartido entre procesos a través de un archivo.
+
+    El estado del cubo se guarda en un archivo local protegido mediante
+    un bloqueo exclusivo, de forma que todos los procesos que usen el
+    mismo archivo comparten el ritmo de peticiones.
+    """
+
+    def __init__(self, path: Path, rate: float, capacity: float = 1):
+        """Constructor
+
+        Parameters
+        ----------
+        path : Path
+            Archivo donde se guarda el estado compartido del cubo
+        rate : float
+            Número de peticiones por segundo permitidas
+        capacity : float
+            Número de peticiones que pueden realizarse en ráfaga.
+            Default: 1
+        """
+
+        super().__init__(rate, capacity)
+        self._path = Path(path)
+
+    def acquire(self) -> float:
+        with self._lock, open(self._path, "a+") as file:
+            with _file_lock(file):
+                file.seek(0)
+                contenido = file.read().split()
+                if len(contenido) == 2:
+                    tokens, timestamp = float(contenido[0]), float(contenido[1])
+                else:
+                    tokens, timestamp = self.capacity, time.time()
+                tokens, timestamp, espera = self._reservar(tokens, timestamp)
+                file.seek(0)
+                file.truncate()
+                file.write(f"{tokens} {timestamp}")
+                file.flush()
+        if espera > 0:
+            time.sleep(espera)
+        return espera
+
+
+class RateLimiter:
+    """Limitador de peticiones global y por operación.
+
+    Cada petición debe obtener turno en el límite global y en el de su
+    operación, si existen. Si se indica un directorio compartido, los
+    límites se comparten con los demás procesos que usen el mismo
+    directorio.
+    """
+
+    def __init__(
+        self,
+        global_rate: float | None = None,
+        operation_rates: dict[str, float] | None = None,
+        burst: float = 1,
+        shared_dir: Path | None = None,
+    ):
+        """Constructor
+
+        Parameters
+        ----------
+        global_rate : float, optional
+            Peticiones por segundo permitidas para el conjunto de
+            operaciones. Default: None
+        operation_rates : dict[str, float], optional
+            Peticiones por segundo permitidas para cada método SOAP de
+            FACe. Los nombres no distinguen mayúsculas. Default: None
+        burst : float
+            Número de peticiones que pueden realizarse en ráfaga.
+            Default: 1
+        shared_dir : Path, optional
+            Directorio donde guardar el estado compartido entre procesos.
+            Default: None
+        """
+
+        self._global = None
+        if global_rate:
+            self._global = self._bucket("global", global_rate, burst, shared_dir)
+        self._operaciones = {
+            operacion.lower(): self._bucket(operacion.lower(), rate, burst, shared_dir)
+            for operacion, rate in (operation_rates or {}).items()
+            if rate
+        }
+
+    @staticmethod
+    def _bucket(
+        nombre: str, rate: float, burst: float, shared_dir: Path | None
+    ) -> TokenBucket:
+        if shared_dir is None:
+            return TokenBucket(rate, burst)
+        return SharedTokenBucket(
+            Path(shared_dir).joinpath(f"ratelimit.{nombre}"), rate, burst
+        )
+
+    def acquire(self, operacion: str) -> float:
+        """Espera hasta disponer de turno para una petición de la operación.
+
+        Parameters
+        ----------
+        operacion : str
+            Nombre del método SOAP de FACe
+
+        Returns
+        -------
+        float
+            segundos esperados
+        """
+
+        espera = 0.0
+        if self._global is not None:
+            espera += self._global.acquire()
+        bucket = self._operaciones.get(operacion.lower())
+        if bucket is not None:
+            espera += bucket.acquire()
+        return espera
+
+
+class CircuitBreaker:
+    """Cortocircuito de llamadas ante fallos continuados de FACe.
+
+    Tras `failure_threshold` fallos transitorios consecutivos el circuito
+    se abre y las llamadas fallan inmediatamente con `CircuitOpenError`
+    durante `reset_timeout` segundos. Pasado ese tiempo se permite una
+    llamada de prueba: si tiene éxito el circuito se cierra y si falla
+    vuelve a abrirse.
+
+    Los errores de gestión devueltos por FACe indican que el servicio
+    responde correctamente y no se contabilizan como fallos.
+    """
+
+    CLOSED = "cerrado"
+    OPEN = "abierto"
+    HALF_OPEN = "semiabierto"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """Constructor
+
+        Parameters
+        ----------
+        failure_threshold : int
+            Número de fallos consecutivos que abren el circuito.
+            Default: 5
+        reset_timeout : float
+            Segundos que el circuito permanece abierto antes de permitir
+            una llamada de prueba. Default: 30.0
+        """
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> str:
+        """Estado actual del circuito."""
+
+        with self._lock:
+            return self._state
+
+    def before_call(self, operacion: str = "") -> bool:
+        """Comprueba si puede realizarse una llamada.
+
+        Parameters
+        ----------
+        operacion : str, optional
+            Nombre del método SOAP de FACe, usado en el mensaje de error
+
+        Returns
+        -------
+        bool
+            Si la llamada es la llamada de prueba tras abrirse el
+            circuito. En ese caso debe registrarse su resultado o, si se
+            interrumpe, liberarse con `release`.
+
+        Raises
+        ------
+        CircuitOpenError
+            Si el circuito está abierto.
+        """
+
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            if (
+                self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                self._state = self.HALF_OPEN
+                return True
+            raise excs.CircuitOpenError(
+                f"Llamada a {operacion or 'FACe'} cancelada: demasiados fallos "
+                "consecutivos en la comunicación con FACe"
+            )
+
+    def record_success(self) -> None:
+        """Registra una llamada completada con éxito."""
+
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def release(self) -> None:
+        """Libera la llamada de prueba interrumpida sin resultado, de
+        modo que la siguiente llamada pueda realizar una nueva prueba."""
+
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.OPEN
+
+    def record_failure(self, exc: BaseException) -> None:
+        """Registra una llamada fallida.
+
+        Parameters
+        ----------
+        exc : BaseException
+            Excepción producida en la llamada
+        """
+
+        with self._lock:
+            if not is_transient(exc):
+                # Un error no transitorio no dice nada de la disponibilidad
+                # de FACe: no cuenta como fallo ni cierra el circuito. Si
+                # era la llamada de prueba, el circuito vuelve a abrirse
+                # hasta la siguiente prueba.
+                if self._state == self.HALF_OPEN:
+                    self._state = self.OPEN
+                    self._opened_at = time.monotonic()
+                return
+            self._failures += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
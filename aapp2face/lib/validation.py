@@ -0,0 +1,248 @@
+"""
+Módulo de validación de las facturas descargadas en formato Facturae
+"""
+
+import base64
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from lxml import etree
+
+from .encoding import b64decode_chunks
+
+FACTURAE_SCHEMAS = {
+    "http://www.facturae.es/Facturae/2007/v3.1/Facturae": "Facturaev3_1.xsd",
+    "http://www.facturae.es/Facturae/2009/v3.2/Facturae": "Facturaev3_2.xsd",
+    "http://www.facturae.gob.es/formato/Versiones/Facturaev3_2_1.xml": "Facturaev3_2_1.xsd",
+    "http://www.facturae.gob.es/formato/Versiones/Facturaev3_2_2.xml": "Facturaev3_2_2.xsd",
+}
+"""Archivo del esquema de cada versión de Facturae según su espacio de
+nombres"""
+
+XMLDSIG_NAMESPACE = "http://www.w3.org/2000/09/xmldsig#"
+
+
+@dataclass(slots=True, frozen=True)
+class ResultadoValidacion:
+    """Resultado de la validación de una factura.
+
+    Attributes
+    ----------
+    numero_registro : str
+        Número de registro de la factura en FACe
+    version : str | None
+        Versión de Facturae de la factura, o None si no se reconoce
+    errores : tuple[str, ...]
+        Errores de esquema o de firma encontrados
+    """
+
+    numero_registro: str
+    version: str | None
+    errores: tuple[str, ...] = ()
+
+    @property
+    def valida(self) -> bool:
+        """Indica si la factura ha superado la validación."""
+
+        return not self.errores
+
+
+class _SchemaResolver(etree.Resolver):
+    """Resuelve los esquemas importados por los de Facturae, como el de
+    XMLDSig, con los archivos del directorio de esquemas en lugar de
+    descargarlos."""
+
+    def __init__(self, schema_dir: Path):
+        super().__init__()
+        self.schema_dir = schema_dir
+
+    def resolve(self, url, pubid, context):
+        path = self.schema_dir.joinpath(os.path.basename(url or ""))
+        if path.is_file():
+            return self.resolve_filename(str(path), context)
+        return None
+
+
+@lru_cache(maxsize=None)
+def _esquema(path: Path) -> etree.XMLSchema:
+    """Compila un esquema una sola vez por proceso."""
+
+    parser = etree.XMLParser(no_network=True)
+    parser.resolvers.add(_SchemaResolver(path.parent))
+    return etree.XMLSchema(etree.parse(str(path), parser))
+
+
+def _verificar_firma(documento: etree._Element) -> list[str]:
+    try:
+        # xmlsec se instala con zeep[xmlsec] para firmar las peticiones
+        import xmlsec
+    except ImportError:
+        return ["No se puede verificar la firma sin la librería xmlsec"]
+
+    firma = xmlsec.tree.find_node(documento, xmlsec.constants.NodeSignature)
+    if firma is None:
+        return ["La factura no está firmada"]
+    certificado = firma.find(f".//{{{XMLDSIG_NAMESPACE}}}X509Certificate")
+    if certificado is None or not certificado.text:
+        return ["La firma no incluye el certificado del firmante"]
+
+    # Las referencias de XAdES apuntan a elementos por su atributo Id
+    for elemento in documento.iter(etree.Element):
+        if elemento.get("Id") is not None:
+            xmlsec.tree.add_ids(elemento, ["Id"])
+    contexto = xmlsec.SignatureContext()
+    try:
+        contexto.key = xmlsec.Key.from_memory(
+            base64.b64decode("".join(certificado.text.split())),
+            xmlsec.constants.KeyDataFormatCertDer,
+        )
+        contexto.verify(firma)
+    except xmlsec.Error as exc:
+        return [f"Firma no válida: {exc}"]
+    return []
+
+
+def validar_facturae(
+    contenido: bytes, schema_dir: Path, verify_signature: bool = True
+) -> tuple[str | None, list[str]]:
+    """Valida una factura en formato Facturae.
+
+    Se comprueba la factura contra el esquema de su versión, que debe
+    encontrarse en el directorio de esquemas junto con los esquemas que
+    importa, y opcionalmente su firma XAdES.
+
+    Parameters
+    ----------
+    contenido : bytes
+        Documento de la factura
+    schema_dir : Path
+        Directorio con los esquemas XSD de Facturae
+    verify_signature : bool
+        Verifica la firma de la factura con el certificado que incluye.
+        Default: True
+
+    Returns
+    -------
+    tuple[str | None, list[str]]
+        versión de Facturae y errores encontrados
+    """
+
+    parser = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True)
+    try:
+        documento = etree.fromstring(contenido, parser)
+    except etree.XMLSyntaxError as exc:
+        return None, [f"XML mal formado: {exc}"]
+
+    espacio = etree.QName(documento).namespace
+    nombre = FACTURAE_SCHEMAS.get(espacio)
+    if nombre is None:
+        return None, [f"Versión de Facturae no reconocida: {espacio}"]
+    version = nombre.removeprefix("Facturaev").removesuffix(".xsd").replace("_", ".")
+
+    path = Path(schema_dir, nombre).resolve()
+    if not path.is_file():
+        return version, [f"No se encuentra el esquema {path}"]
+    esquema = _esquema(path)
+    errores = []
+    if not esquema.validate(documento):
+        errores.extend(
+            f"Línea {error.line}: {error.message}" for error in esquema.error_log
+        )
+    if verify_signature:
+        errores.extend(_verificar_firma(documento))
+
+    return version, errores
+
+
+def _validar(
+    numero_registro: str,
+    contenido: str | bytes,
+    schema_dir: Path,
+    verify_signature: bool,
+) -> ResultadoValidacion:
+    version, errores = validar_facturae(
+        b"".join(b64decode_chunks(contenido)), schema_dir, verify_signature
+    )
+    return ResultadoValidacion(numero_registro, version, tuple(errores))
+
+
+class FacturaeValidator:
+    """Validador de facturas descargadas en un conjunto de procesos.
+
+    Las facturas se validan en segundo plano según se envían, de modo
+    que la validación avanza a la vez que las descargas. Cada proceso
+    compila una sola vez el esquema de cada versión de Facturae.
+
+    Puede usarse como gestor de contexto, que finaliza los procesos al
+    salir. Si se sale por un error, las validaciones aún no iniciadas se
+    cancelan.
+    """
+
+    def __init__(
+        self,
+        schema_dir: Path,
+        verify_signature: bool = True,
+        max_workers: int | None = None,
+    ):
+        """Constructor
+
+        Parameters
+        ----------
+        schema_dir : Path
+            Directorio con los esquemas XSD de Facturae
+        verify_signature : bool
+            Verifica la firma de las facturas. Default: True
+        max_workers : int | None
+            Número de procesos. Por defecto, el número de procesadores.
+            Default: None
+        """
+
+        self.schema_dir = Path(schema_dir)
+        self.verify_signature = verify_signature
+        self._executor = ProcessPoolExecutor(max_workers=max_workers)
+        self._pendientes: list[Future] = []
+
+    def enviar(
+        self, numero_registro: str, contenido: str | bytes
+    ) -> Future[ResultadoValidacion]:
+        """Envía una factura a validar.
+
+        Parameters
+        ----------
+        numero_registro : str
+            Número de registro de la factura en FACe
+        contenido : str | bytes
+            Documento de la factura codificado en base64, tal como se
+            descarga de FACe
+        """
+
+        futuro = self._executor.submit(
+            _validar,
+            numero_registro,
+            contenido,
+            self.schema_dir,
+            self.verify_signature,
+        )
+        self._pendientes.append(futuro)
+        return futuro
+
+    def resultados(self) -> list[ResultadoValidacion]:
+        """Espera a que terminen las validaciones enviadas y devuelve
+        sus resultados en el orden de envío."""
+
+        pendientes, self._pendientes = self._pendientes, []
+        return [futuro.result() for futuro in pendientes]
+
+    def close(self) -> None:
+        """Espera a las validaciones enviadas y finaliza los procesos."""
+
+        self._executor.shutdown()
+
+    def __enter__(self) -> "FacturaeValidator":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._executor.shutdown(cancel_futures=exc_type is not None)
@@ -0,0 +1,110 @@
+"""
+Compara el tiempo de interpretación de las respuestas de listados con
+`aapp2face.lib.fastparse` y con zeep.
+
+Las respuestas capturadas en `tests/responses` se amplían hasta el
+número de facturas indicado y se interpretan por las dos vías hasta
+obtener los objetos que devuelve `FACeConnection`.
+
+Uso: python -m benchmarks.fastparse [FACTURAS] [REPETICIONES]
+"""
+
+import copy
+import sys
+import timeit
+from pathlib import Path
+
+import requests
+import zeep
+from lxml import etree
+
+from aapp2face import FACeConnection
+from aapp2face.lib.fastparse import (
+    parse_consultar_listado_facturas,
+    parse_solicitar_nuevas_facturas,
+)
+
+XML_RESPONSES_PATH = Path(__file__).parent.parent.joinpath("tests", "responses")
+WSDL = str(XML_RESPONSES_PATH.joinpath("face.wsdl"))
+
+
+class _Cliente:
+    """Conector que devuelve la respuesta interpretada por la función
+    indicada, sin llamar a FACe."""
+
+    def __init__(self, interpretar):
+        self._interpretar = interpretar
+
+    def consultar_listado_facturas(self, numeros_registro):
+        return self._interpretar()
+
+    def solicitar_nuevas_facturas(self, oficina_contable):
+        return self._interpretar()
+
+
+def ampliar(content: bytes, elemento: str, facturas: int) -> bytes:
+    """Repite el primer elemento del listado hasta el número de facturas
+    indicado, con números de registro distintos."""
+
+    doc = etree.fromstring(content)
+    items = [e for e in doc.iter() if etree.QName(e).localname == elemento]
+    padre = items[0].getparent()
+    for item in items:
+        padre.remove(item)
+    for numero in range(facturas):
+        item = copy.deepcopy(items[0])
+        for hijo in item.iter("numeroRegistro"):
+            hijo.text = f"2024{numero:08d}"
+        padre.append(item)
+    return etree.tostring(doc, xml_declaration=True, encoding="UTF-8")
+
+
+def medir(facturas: int, repeticiones: int) -> None:
+    client = zeep.Client(WSDL)
+    binding = client.service._binding
+    casos = [
+        (
+            "consultarListadoFacturas",
+            parse_consultar_listado_facturas,
+            lambda face: face.consultar_listado_facturas([""]),
+        ),
+        (
+            "solicitarNuevasFacturas",
+            parse_solicitar_nuevas_facturas,
+            lambda face: face.solicitar_nuevas_facturas(),
+        ),
+    ]
+
+    print(f"{'Operación':<26} {'zeep (ms)':>10} {'lxml (ms)':>10} {'Mejora':>7}")
+    for operacion, parser, llamar in casos:
+        content = ampliar(
+            XML_RESPONSES_PATH.joinpath(f"{operacion}.xml").read_bytes(),
+            operacion,
+            facturas,
+        )
+        response = requests.Response()
+        response.status_code = 200
+        response._content = content
+        operation = binding.get(operacion)
+
+        face_zeep = FACeConnection(
+            _Cliente(lambda: binding.process_reply(client, operation, response))
+        )
+        face_lxml = FACeConnection(_Cliente(lambda: parser(content)))
+        assert llamar(face_zeep) == llamar(face_lxml)
+
+        tiempos = [
+            min(timeit.repeat(lambda: llamar(face), number=1, repeat=repeticiones))
+            for face in (face_zeep, face_lxml)
+        ]
+        print(
+            f"{operacion:<26} {tiempos[0] * 1000:>10.1f} {tiempos[1] * 1000:>10.1f} "
+            f"{tiempos[0] / tiempos[1]:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    medir(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
@@ -0,0 +1,439 @@
+import base64
+import csv
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+import zeep.exceptions
+from typer.testing import CliRunner
+
+from aapp2face import FACeConnection, FACeFakeSoapClient, FakeProfile, RetryPolicy
+from aapp2face.cli.main import app
+from aapp2face.lib.batch import (
+    CAMPOS_NO_ELECTRONICA,
+    ejecutar_lote,
+    leer_facturas_no_electronicas,
+    leer_manifiesto,
+    notificar_facturas,
+    notificar_facturas_no_electronicas,
+    validar_facturas_no_electronicas,
+)
+from aapp2face.lib.encoding import b64encode_file
+from aapp2face.lib.exceptions import UndefinedError
+from aapp2face.lib.objects import (
+    DatosPersonales,
+    DatosSolicitante,
+    NotificaFactura,
+    PeticionDocumentoCesion,
+)
+
+from .constants import TEST_RESPONSES_PATH as SIM_RESPONSES_PATH
+
+TEST_RESPONSES_PATH = "./tests/responses"
+FACTURA = Path(TEST_RESPONSES_PATH).joinpath("sample-factura-firmada-32v1.xsig")
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def temporary_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def manifiesto(temporary_dir):
+    shutil.copy(FACTURA, temporary_dir.joinpath("factura.xsig"))
+    path = temporary_dir.joinpath("manifiesto.csv")
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(
+            [
+                "numero_registro",
+                "fecha_registro",
+                "path_factura",
+                "organo_gestor",
+                "unidad_tramitadora",
+                "oficina_contable",
+                "codigo_rcf",
+                "estado",
+            ]
+        )
+        for numero in ["2018-800", "2018-801"]:
+            writer.writerow(
+                [
+                    numero,
+                    "2018-10-09T12:00:00",
+                    "factura.xsig",
+                    "P00000010",
+                    "P00000010",
+                    "P00000010",
+                    numero,
+                    "1300",
+                ]
+            )
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [3, 1000, 1 << 20])
+def test_codificacion_por_bloques(chunk_size):
+    assert b64encode_file(FACTURA, chunk_size) == base64.b64encode(
+        FACTURA.read_bytes()
+    ).decode("ascii")
+
+
+def test_codificacion_fichero_vacio(temporary_dir):
+    vacio = temporary_dir.joinpath("vacio")
+    vacio.touch()
+
+    assert b64encode_file(vacio) == ""
+
+
+def test_notificar_facturas(manifiesto):
+    face = FACeConnection(FACeFakeSoapClient(Path(TEST_RESPONSES_PATH)))
+
+    correcta, erronea = notificar_facturas(face, leer_manifiesto(manifiesto), 2)
+
+    assert correcta.correcto
+    assert correcta.resultado == NotificaFactura("202001020800", "2018-10-09 14:37:56")
+    assert correcta.peticion.path_factura == manifiesto.parent / "factura.xsig"
+    assert not erronea.correcto
+    assert erronea.error.code == "555"
+    assert erronea.fila()["codigo_error"] == "555"
+
+
+def test_manifiesto_incompleto(temporary_dir):
+    path = temporary_dir.joinpath("manifiesto.csv")
+    path.write_text("numero_registro;fecha_registro\n2018-800;2018-10-09T12:00:00\n")
+
+    with pytest.raises(ValueError, match="path_factura"):
+        list(leer_manifiesto(path))
+
+
+def test_cli_notificar_manifiesto(manifiesto, temporary_dir):
+    results = temporary_dir.joinpath("resultados.csv")
+
+    result = runner.invoke(
+        app,
+        [
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "facturas",
+            "notificar",
+            "--results",
+            str(results),
+            str(manifiesto),
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert "1 facturas notificadas y 1 errores" in result.stdout
+    with open(results, newline="") as file:
+        filas = list(csv.DictReader(file, delimiter=";"))
+    assert [fila["registro_face"] for fila in filas] == ["202001020800", ""]
+    assert filas[1]["codigo_error"] == "555"
+
+
+def test_cli_notificar_manifiesto_erroneo(manifiesto, temporary_dir):
+    results = temporary_dir.joinpath("resultados.csv")
+    with open(manifiesto, "a", newline="") as file:
+        file.write("2018-802;2018-10-09T12:00:00;factura.xsig;;;;2018-802;1300\n")
+
+    result = runner.invoke(
+        app,
+        [
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "facturas",
+            "notificar",
+            "--results",
+            str(results),
+            str(manifiesto),
+        ],
+    )
+
+    assert result.exit_code == 4
+    assert "línea 4" in result.stdout
+    assert not results.exists()
+
+
+def test_cli_notificar_directorio(temporary_dir):
+    directorio = temporary_dir.joinpath("facturas")
+    directorio.mkdir()
+    shutil.copy(FACTURA, directorio.joinpath("2018-800.xsig"))
+    results = temporary_dir.joinpath("resultados.csv")
+    args = [
+        "--fake-set",
+        TEST_RESPONSES_PATH,
+        "facturas",
+        "notificar",
+        "--results",
+        str(results),
+        "--organo-gestor",
+        "P00000010",
+        "--unidad-tramitadora",
+        "P00000010",
+        "--oficina-contable",
+        "P00000010",
+    ]
+
+    result = runner.invoke(app, args + [str(directorio)])
+
+    assert result.exit_code == 2
+    assert not results.exists()
+
+    result = runner.invoke(app, args + ["--estado", "1300", str(directorio)])
+
+    assert result.exit_code == 0
+    assert "1 facturas notificadas y 0 errores" in result.stdout
+
+
+FACTURA_NO_ELECTRONICA = {
+    "numero_registro": "2018-900",
+    "fecha_registro": "2018-10-10T09:00:00",
+    "emisor": {
+        "tipo": "F",
+        "nombre_razon_social": "JUAN",
+        "apellido1": "LOPEZ",
+        "apellido2": "LOPEZ",
+        "documento_nacional": "00000000A",
+    },
+    "receptor": {
+        "tipo": "J",
+        "nombre_razon_social": "ORGANISMO AUTONOMO",
+        "documento_nacional": "S0000000",
+    },
+    "numero": "9500",
+    "serie": "2018",
+    "importe": "2521,38",
+    "fecha_expedicion": "2018-10-09T18:50:00",
+    "organo_gestor": "P00000010",
+    "unidad_tramitadora": "P00000010",
+    "oficina_contable": "P00000010",
+    "codigo_rcf": "1235",
+    "estado": "1300",
+}
+
+
+def escribir_ndjson(path, facturas):
+    path.write_text("\n".join(json.dumps(factura) for factura in facturas) + "\n")
+    return path
+
+
+def escribir_csv(path, facturas):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=CAMPOS_NO_ELECTRONICA, delimiter=";")
+        writer.writeheader()
+        for factura in facturas:
+            fila = {}
+            for campo, valor in factura.items():
+                if isinstance(valor, dict):
+                    fila.update({f"{campo}_{k}": v for k, v in valor.items()})
+                else:
+                    fila[campo] = valor
+            writer.writerow(fila)
+    return path
+
+
+def test_leer_facturas_no_electronicas(temporary_dir):
+    ndjson = escribir_ndjson(
+        temporary_dir.joinpath("facturas.ndjson"), [FACTURA_NO_ELECTRONICA]
+    )
+    csv_path = escribir_csv(
+        temporary_dir.joinpath("facturas.csv"), [FACTURA_NO_ELECTRONICA]
+    )
+
+    [(linea, peticion)] = leer_facturas_no_electronicas(ndjson)
+    [(_, desde_csv)] = leer_facturas_no_electronicas(csv_path)
+
+    assert linea == 1
+    assert peticion == desde_csv
+    assert peticion.emisor == DatosPersonales(
+        "F", "JUAN", "LOPEZ", "LOPEZ", "00000000A"
+    )
+    assert peticion.tercero == DatosPersonales("", "", "", "", "")
+    assert peticion.codigo_cnae == ""
+
+
+def test_validar_facturas_no_electronicas(temporary_dir):
+    erronea = dict(
+        FACTURA_NO_ELECTRONICA,
+        fecha_registro="10/10/2018",
+        importe="2.521,38",
+        oficina_contable="P0001",
+        emisor=dict(FACTURA_NO_ELECTRONICA["emisor"], tipo="X"),
+    )
+    del erronea["numero"]
+    path = escribir_ndjson(
+        temporary_dir.joinpath("facturas.ndjson"),
+        [FACTURA_NO_ELECTRONICA, erronea],
+    )
+
+    grupos, errores = validar_facturas_no_electronicas(path)
+
+    assert errores == [
+        "Línea 2: falta el campo numero",
+        "Línea 2: fecha_registro no tiene el formato 'YYYY-MM-DDThh:mm:ss'",
+        "Línea 2: emisor_tipo debe ser 'F' o 'J'",
+        "Línea 2: importe no es un importe válido",
+        "Línea 2: oficina_contable no es un código DIR3 válido",
+        "Línea 2: número de registro repetido (línea 1)",
+    ]
+    assert {oficina: len(grupo) for oficina, grupo in grupos.items()} == {
+        "P00000010": 1,
+        "P0001": 1,
+    }
+
+
+def test_error_por_peticion():
+    def procesar(numero):
+        if numero == 2:
+            raise zeep.exceptions.Fault("Error interno")
+        if numero == 3:
+            raise zeep.exceptions.TransportError(status_code=502)
+        return numero
+
+    resultados = list(ejecutar_lote(procesar, range(5), max_workers=2))
+
+    assert [resultado.resultado for resultado in resultados] == [0, 1, None, None, 4]
+    assert isinstance(resultados[2].error, zeep.exceptions.Fault)
+    assert resultados[3].error.status_code == 502
+
+
+def test_reintento_por_factura(temporary_dir):
+    class Conexion:
+        llamadas = 0
+
+        def notifica_factura_no_electronica(self, numero_registro, *args):
+            self.llamadas += 1
+            if self.llamadas == 1:
+                raise UndefinedError("001", "Error no definido")
+            return NotificaFactura("202001020900", "2018-10-10 11:56:37")
+
+    path = escribir_ndjson(
+        temporary_dir.joinpath("facturas.ndjson"), [FACTURA_NO_ELECTRONICA]
+    )
+    peticiones = [peticion for _, peticion in leer_facturas_no_electronicas(path)]
+    policy = RetryPolicy(max_attempts=2, initial_delay=0)
+
+    [sin_reintento] = notificar_facturas_no_electronicas(
+        Conexion(), peticiones, retry_policy=policy
+    )
+    [con_reintento] = notificar_facturas_no_electronicas(
+        Conexion(), peticiones, retry_policy=policy, idempotent=True
+    )
+
+    assert sin_reintento.error.code == "001"
+    assert con_reintento.resultado.numero_registro == "202001020900"
+
+
+def test_reintento_por_factura_sin_multiplicar(temporary_dir):
+    reintentos = {"conector": 0, "lote": 0}
+
+    def contar(capa):
+        def on_retry(operacion, intento, exc, espera):
+            reintentos[capa] += 1
+
+        return on_retry
+
+    client = FACeFakeSoapClient(
+        Path(TEST_RESPONSES_PATH),
+        FakeProfile({"defecto": {"errores": {"001": 1}}}),
+        RetryPolicy(
+            initial_delay=0, non_idempotent=frozenset(), on_retry=contar("conector")
+        ),
+    )
+    path = escribir_ndjson(
+        temporary_dir.joinpath("facturas.ndjson"), [FACTURA_NO_ELECTRONICA]
+    )
+    peticiones = [peticion for _, peticion in leer_facturas_no_electronicas(path)]
+    policy = RetryPolicy(max_attempts=2, initial_delay=0, on_retry=contar("lote"))
+
+    [resultado] = notificar_facturas_no_electronicas(
+        FACeConnection(client), peticiones, retry_policy=policy, idempotent=True
+    )
+
+    assert resultado.error.code == "001"
+    assert reintentos == {"conector": 0, "lote": 1}
+
+
+def test_cli_cargar(temporary_dir):
+    otra = dict(
+        FACTURA_NO_ELECTRONICA, numero_registro="2018-901", oficina_contable="P00000020"
+    )
+    path = escribir_csv(
+        temporary_dir.joinpath("facturas.csv"), [FACTURA_NO_ELECTRONICA, otra]
+    )
+    results = temporary_dir.joinpath("resultados.csv")
+
+    result = runner.invoke(
+        app,
+        [
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "facturas",
+            "cargar",
+            "--results",
+            str(results),
+            str(path),
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert "P00000010: 1 correctas y 0 errores" in result.stdout
+    assert "P00000020: 0 correctas y 1 errores" in result.stdout
+    assert "1 facturas cargadas y 1 errores" in result.stdout
+    with open(results, newline="") as file:
+        filas = list(csv.DictReader(file, delimiter=";"))
+    assert filas[0]["registro_face"] == "202001020900"
+
+
+def test_cli_cargar_no_valida(temporary_dir):
+    path = escribir_ndjson(
+        temporary_dir.joinpath("facturas.ndjson"),
+        [dict(FACTURA_NO_ELECTRONICA, importe="")],
+    )
+    results = temporary_dir.joinpath("resultados.csv")
+
+    result = runner.invoke(
+        app,
+        [
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "facturas",
+            "cargar",
+            "--results",
+            str(results),
+            str(path),
+        ],
+    )
+
+    assert result.exit_code == 4
+    assert "Línea 1: falta el campo importe" in result.stdout
+    assert not results.exists()
+
+
+def test_obtener_documentos_cesion(temporary_dir):
+    face = FACeConnection(FACeFakeSoapClient(Path(SIM_RESPONSES_PATH)))
+    peticiones = [
+        PeticionDocumentoCesion("CSV1", "CGN"),
+        PeticionDocumentoCesion("CSV2", "CGN"),
+    ]
+    solicitante = DatosSolicitante("99999999R", "NOMBRE", "APELLIDOS")
+
+    resultados = list(
+        face.obtener_documentos_cesion(peticiones, solicitante, temporary_dir)
+    )
+
+    assert resultados[0].resultado.nombre == "doc-cesion.pdf"
+    assert resultados[0].resultado.documento == ""
+    assert temporary_dir.joinpath("doc-cesion.pdf").stat().st_size > 0
+    assert resultados[1].error.code == "534"
+    assert isinstance(
+        next(
+            face.obtener_documentos_cesion(peticiones[:1], solicitante, temporary_dir)
+        ).error,
+        FileExistsError,
+    )
@@ -0,0 +1,95 @@
+import base64
+import tempfile
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aapp2face import CessionDocumentCache, FACeConnection, FACeFakeSoapClient
+from aapp2face.cli.main import app
+from aapp2face.lib.exceptions import FACeManagementException
+from aapp2face.lib.objects import DatosSolicitante, DocumentoCesion
+
+from .constants import TEST_RESPONSES_PATH
+
+runner = CliRunner()
+
+SOLICITANTE = DatosSolicitante("99999999R", "NOMBRE", "APELLIDOS")
+
+
+@pytest.fixture
+def temporary_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def documento(nombre: str, tamano: int) -> DocumentoCesion:
+    contenido = base64.b64encode(b"x" * tamano).decode()
+    return DocumentoCesion("202001020718", contenido, nombre, "application/pdf")
+
+
+def test_documento_desde_cache(temporary_dir):
+    cache = CessionDocumentCache(temporary_dir.joinpath("cache"))
+    face = FACeConnection(FACeFakeSoapClient(Path(TEST_RESPONSES_PATH)), cache)
+    original = face.obtener_documento_cesion("CSV1", "CGN", SOLICITANTE)
+
+    # Sin respuestas simuladas solo puede obtenerse desde la caché
+    sin_respuestas = FACeConnection(FACeFakeSoapClient(temporary_dir), cache)
+    with pytest.raises(FACeManagementException):
+        sin_respuestas.obtener_documento_cesion("CSV1", "OTRO", SOLICITANTE)
+
+    assert sin_respuestas.obtener_documento_cesion("CSV1", "CGN", SOLICITANTE) == (
+        original
+    )
+    cache.close()
+
+    # La caché persiste entre instancias
+    cache = CessionDocumentCache(temporary_dir.joinpath("cache"))
+    assert cache.obtener("CSV1", "CGN") == original
+    assert cache.obtener("CSV2", "CGN") is None
+    cache.close()
+
+
+def test_eliminacion_por_tamano(temporary_dir):
+    cache = CessionDocumentCache(temporary_dir, max_bytes=250)
+
+    cache.guardar("CSV1", "CGN", documento("uno.pdf", 100))
+    cache.guardar("CSV2", "CGN", documento("dos.pdf", 100))
+    assert cache.obtener("CSV1", "CGN").nombre == "uno.pdf"
+    cache.guardar("CSV3", "CGN", documento("tres.pdf", 100))
+
+    assert cache.obtener("CSV2", "CGN") is None
+    assert cache.obtener("CSV1", "CGN") is not None
+    assert cache.obtener("CSV3", "CGN") is not None
+    assert cache.tamano() == 200
+    assert len(list(temporary_dir.glob("[0-9a-f]" * 64))) == 2
+    cache.close()
+
+
+def test_cli_documento_con_cache(temporary_dir):
+    config = temporary_dir.joinpath("config.ini")
+    config.write_text(f"[CessionCache]\ndir = {temporary_dir.joinpath('cache')}\n")
+    argumentos = [
+        "--config",
+        str(config),
+        "--fake-set",
+        TEST_RESPONSES_PATH,
+        "--download-dir",
+        str(temporary_dir),
+        "cesiones",
+        "documento",
+        "--force",
+        "CSV1",
+        "CGN",
+        "99999999R",
+        "NOMBRE",
+        "APELLIDOS",
+    ]
+
+    for _ in range(2):
+        result = runner.invoke(app, argumentos)
+        assert result.exit_code == 0
+
+    cache = CessionDocumentCache(temporary_dir.joinpath("cache"))
+    assert cache.obtener("CSV1", "CGN").nombre == "doc-cesion.pdf"
+    cache.close()
@@ -205,3 +205,95 @@ def test_gestionar_error_factura_no_existente():
     )
     assert result.exit_code == 4
     assert expected_output.replace("\n", "") in result.stdout.replace("\n", "")
+
+
+def test_estados(temporary_dir):
+    lista = Path(temporary_dir).joinpath("lista.txt")
+    lista.write_text("202001020719\n\n")
+    export = Path(temporary_dir).joinpath("cesiones.csv")
+
+    result = runner.invoke(
+        app,
+        [
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "cesiones",
+            "estados",
+            "--list",
+            str(lista),
+            "--export",
+            str(export),
+            "202001020718",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert "1 cesiones consultadas y 1 errores" in result.stdout
+    assert export.read_text().splitlines() == [
+        "numero_registro;codigo;comentario;codigo_error;error",
+        "202001020718;6200;;;",
+        "202001020719;;;501;No se han encontrado facturas asociadas de la oficina contable al RCF",
+    ]
+
+
+def test_documentos(temporary_dir):
+    origen = Path(temporary_dir).joinpath("documentos.csv")
+    origen.write_text("csv;repositorio\nCSV1;CGN\nCSV2;CGN\n")
+    descargas = Path(temporary_dir).joinpath("descargas")
+    descargas.mkdir()
+    export = Path(temporary_dir).joinpath("documentos-resultado.csv")
+    argumentos = [
+        "--fake-set",
+        TEST_RESPONSES_PATH,
+        "--download-dir",
+        str(descargas),
+        "cesiones",
+        "documentos",
+        str(origen),
+        "99999999R",
+        "NOMBRE",
+        "APELLIDOS",
+    ]
+
+    result = runner.invoke(app, argumentos)
+
+    assert result.exit_code == 0
+    assert "Error 534" in result.stdout
+    assert "1 documentos obtenidos y 1 errores" in result.stdout
+    assert (
+        md5sum(descargas.joinpath("doc-cesion.pdf"))
+        == "3e4d3fa47dfee3a94be616e44d1e5733"
+    )
+
+    result = runner.invoke(app, argumentos[:6] + ["-e", str(export)] + argumentos[6:])
+
+    assert result.exit_code == 0
+    assert "El archivo doc-cesion.pdf ya existe" in result.stdout
+    assert export.read_text().splitlines()[1:] == [
+        "CSV1;CGN;;;;;El archivo ya existe",
+        "CSV2;CGN;;;;534;Ocurrió un error al obtener el documento de Notarios",
+    ]
+
+
+def test_documentos_archivo_no_valido(temporary_dir):
+    origen = Path(temporary_dir).joinpath("documentos.csv")
+    origen.write_text("csv\nCSV1\n")
+
+    result = runner.invoke(
+        app,
+        [
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "--download-dir",
+            temporary_dir,
+            "cesiones",
+            "documentos",
+            str(origen),
+            "99999999R",
+            "NOMBRE",
+            "APELLIDOS",
+        ],
+    )
+
+    assert result.exit_code == 4
+    assert "Faltan campos en el archivo: repositorio" in result.stdout
@@ -234,7 +234,7 @@ def test_descargar_todas_las_facturas_nuevas(temporary_dir):
     assert expected_output.replace("\n", "") in result.stdout.replace("\n", "")
 
 
-def test_descargar_factura_ya_confirmada():
+def test_descargar_factura_ya_confirmada(temporary_dir):
     numero_registro = "1111"
     expected_output = (
         "Aviso: Usando entorno de simulación. Algunos parámetros de configuración serán ignorados."
@@ -245,10 +245,19 @@ def test_descargar_factura_ya_confirmada():
 
     result = runner.invoke(
         app,
-        ["--fake-set", TEST_RESPONSES_PATH, "facturas", "descargar", numero_registro],
+        [
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "--download-dir",
+            temporary_dir,
+            "facturas",
+            "descargar",
+            numero_registro,
+        ],
     )
     assert result.exit_code == 0
     assert expected_output.replace("\n", "") in result.stdout.replace("\n", "")
+    assert list(Path(temporary_dir).iterdir()) == []
 
 
 def test_confirmar_descarga_factura():
@@ -0,0 +1,104 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aapp2face import FACeConnection, FACeFakeSoapClient, FakeDataGenerator
+from aapp2face.cli.main import app
+from aapp2face.lib.exceptions import FACeManagementException
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def temporary_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+def test_generar_juego_coherente(temporary_dir):
+    generador = FakeDataGenerator(
+        facturas=50, oficinas=3, anexos=2, tam_anexo=1024, semilla=1
+    )
+    resumen = generador.generar(Path(temporary_dir))
+    conexion = FACeConnection(FACeFakeSoapClient(Path(temporary_dir)))
+
+    nuevas = conexion.solicitar_nuevas_facturas()
+    assert len(nuevas) == resumen["registradas"]
+    assert len(conexion.consultar_unidades()) > 0
+
+    for nueva in nuevas:
+        factura = conexion.descargar_factura(nueva.numero_registro)
+        assert factura.nombre == f"factura-{nueva.numero_registro}.xml"
+        nombres = [anexo.nombre for anexo in factura.anexos]
+        assert len(nombres) == len(set(nombres))
+        estado = conexion.consultar_listado_facturas([nueva.numero_registro])[0]
+        assert estado.tramitacion.codigo == "1200"
+
+    por_oficina = sum(
+        len(conexion.solicitar_nuevas_facturas(relacion.oficina_contable.codigo))
+        for relacion in {
+            r.oficina_contable.codigo: r for r in conexion.consultar_unidades()
+        }.values()
+    )
+    assert por_oficina == resumen["registradas"]
+
+
+def test_generar_juego_consulta_listado(temporary_dir):
+    FakeDataGenerator(
+        facturas=600, proporcion_registradas=1, tam_anexo=16, semilla=2
+    ).generar(Path(temporary_dir))
+    conexion = FACeConnection(FACeFakeSoapClient(Path(temporary_dir)))
+
+    numeros = [f"2024{numero:08d}" for numero in range(1, 601)]
+    estados = conexion.consultar_listado_facturas(numeros + ["999999999999"])
+
+    assert [estado.numero_registro for estado in estados[:-1]] == numeros
+    assert all(estado.tramitacion.codigo == "1200" for estado in estados[:-1])
+    assert estados[-1].codigo == "511"
+
+
+def test_generar_juego_bytes_utf8(temporary_dir):
+    resumen = FakeDataGenerator(facturas=10, tam_anexo=16, semilla=4).generar(
+        Path(temporary_dir)
+    )
+
+    total = sum(file.stat().st_size for file in Path(temporary_dir).iterdir())
+    assert resumen["bytes"] == total
+
+
+def test_generar_juego_reproducible(temporary_dir):
+    primero = Path(temporary_dir).joinpath("1")
+    segundo = Path(temporary_dir).joinpath("2")
+    FakeDataGenerator(facturas=10, tam_anexo=128, semilla=7).generar(primero)
+    FakeDataGenerator(facturas=10, tam_anexo=128, semilla=7).generar(segundo)
+
+    archivos = sorted(file.name for file in primero.iterdir())
+    assert archivos == sorted(file.name for file in segundo.iterdir())
+    for archivo in archivos:
+        assert (
+            primero.joinpath(archivo).read_bytes()
+            == segundo.joinpath(archivo).read_bytes()
+        )
+
+
+def test_generar_factura_tramitada_no_descargable(temporary_dir):
+    FakeDataGenerator(facturas=20, proporcion_registradas=0, semilla=3).generar(
+        Path(temporary_dir)
+    )
+    conexion = FACeConnection(FACeFakeSoapClient(Path(temporary_dir)))
+
+    assert conexion.solicitar_nuevas_facturas() == []
+    with pytest.raises(FACeManagementException):
+        conexion.descargar_factura("202400000001")
+
+
+def test_cli_genresp_sintetico(temporary_dir):
+    result = runner.invoke(
+        app, ["genresp", temporary_dir, "--facturas", "20", "--semilla", "1"]
+    )
+
+    assert result.exit_code == 0
+    assert "20 facturas generadas" in result.stdout
+    assert Path(temporary_dir).joinpath("solicitarNuevasFacturas.json").exists()
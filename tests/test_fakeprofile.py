@@ -0,0 +1,99 @@
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aapp2face import FACeConnection, FACeFakeSoapClient, FakeProfile
+from aapp2face.cli.main import app
+from aapp2face.lib.exceptions import SOAPSecurityException, UndefinedError
+
+from .constants import TEST_RESPONSES_PATH
+
+runner = CliRunner()
+
+
+def conexion(profile: dict) -> FACeConnection:
+    client = FACeFakeSoapClient(Path(TEST_RESPONSES_PATH), FakeProfile(profile))
+    return FACeConnection(client)
+
+
+def test_latencia_fija():
+    face = conexion({"defecto": {"latencia": {"distribucion": "fija", "valor": 0.05}}})
+
+    inicio = time.monotonic()
+    face.consultar_estados()
+    assert time.monotonic() - inicio >= 0.05
+
+
+def test_latencia_por_operacion():
+    face = conexion(
+        {
+            "defecto": {"latencia": {"distribucion": "fija", "valor": 1}},
+            "operaciones": {
+                "consultarEstados": {"latencia": {"distribucion": "fija", "valor": 0}}
+            },
+        }
+    )
+
+    inicio = time.monotonic()
+    face.consultar_estados()
+    assert time.monotonic() - inicio < 1
+
+
+def test_inyeccion_error_indeterminado():
+    face = conexion({"defecto": {"errores": {"001": 1}}})
+
+    with pytest.raises(UndefinedError):
+        face.consultar_estados()
+
+
+def test_inyeccion_error_seguridad():
+    face = conexion({"operaciones": {"consultarUnidades": {"errores": {"101": 1}}}})
+
+    assert len(face.consultar_estados()) > 0
+    with pytest.raises(SOAPSecurityException):
+        face.consultar_unidades()
+
+
+def test_inyeccion_timeout():
+    face = conexion({"defecto": {"errores": {"timeout": 1}, "timeout": 0}})
+
+    with pytest.raises(TimeoutError):
+        face.consultar_estados()
+
+
+def test_limite_peticiones_con_error():
+    face = conexion(
+        {"defecto": {"limite": {"peticiones": 2, "periodo": 60, "codigo": "001"}}}
+    )
+
+    face.consultar_estados()
+    face.consultar_estados()
+    with pytest.raises(UndefinedError):
+        face.consultar_estados()
+
+
+def test_limite_peticiones_con_espera():
+    face = conexion({"defecto": {"limite": {"peticiones": 1, "periodo": 0.1}}})
+
+    inicio = time.monotonic()
+    face.consultar_estados()
+    face.consultar_estados()
+    assert time.monotonic() - inicio >= 0.1
+
+
+def test_cli_fake_profile():
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as file:
+        json.dump({"defecto": {"errores": {"001": 1}}}, file)
+
+    result = runner.invoke(
+        app,
+        ["--fake-set", TEST_RESPONSES_PATH, "--fake-profile", file.name, "estados"],
+    )
+    Path(file.name).unlink()
+
+    assert result.exit_code == 4
+    assert "Error 001" in result.stdout
@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+from zeep.exceptions import DTDForbidden
+
+from aapp2face import FACeConnection, FACeFakeSoapClient
+from aapp2face.lib.fastparse import (
+    parse_consultar_listado_facturas,
+    parse_solicitar_nuevas_facturas,
+)
+
+from .constants import TEST_RESPONSES_PATH
+
+XML_RESPONSES_PATH = Path("./tests/responses")
+
+
+@pytest.fixture
+def face_connection():
+    return FACeConnection(FACeFakeSoapClient(Path(TEST_RESPONSES_PATH)))
+
+
+def test_consultar_listado_facturas(face_connection):
+    content = XML_RESPONSES_PATH.joinpath("consultarListadoFacturas.xml").read_bytes()
+
+    result = parse_consultar_listado_facturas(content)
+
+    assert result.resultado.codigo == "0"
+    assert result.resultado.codigo_seguimiento is None
+    assert result.items == face_connection.consultar_listado_facturas(
+        ["202001020718", "9999"]
+    )
+
+
+def test_solicitar_nuevas_facturas(face_connection):
+    content = XML_RESPONSES_PATH.joinpath("solicitarNuevasFacturas.xml").read_bytes()
+
+    result = parse_solicitar_nuevas_facturas(content)
+
+    assert result.items == face_connection.solicitar_nuevas_facturas()
+
+
+def test_respuesta_sin_resultado():
+    with pytest.raises(ValueError):
+        parse_solicitar_nuevas_facturas(b"<Envelope><Body/></Envelope>")
+
+
+@pytest.mark.parametrize(
+    "dtd",
+    [
+        '<!DOCTYPE Envelope [<!ENTITY a "aaaaaaaaaa"><!ENTITY b "&a;&a;&a;&a;">]>',
+        '<!DOCTYPE Envelope [<!ENTITY a SYSTEM "file:///etc/passwd">]>',
+    ],
+)
+def test_respuesta_con_dtd(dtd):
+    content = XML_RESPONSES_PATH.joinpath("solicitarNuevasFacturas.xml").read_bytes()
+    inicio = content.index(b"<", content.index(b"?>"))
+    content = content[:inicio] + dtd.encode() + content[inicio:]
+
+    with pytest.raises(DTDForbidden):
+        parse_solicitar_nuevas_facturas(content)
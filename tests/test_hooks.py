@@ -0,0 +1,97 @@
+from pathlib import Path
+
+import pytest
+
+from aapp2face import (
+    CallInfo,
+    ClientHook,
+    FACeConnection,
+    FACeFakeSoapClient,
+    FakeProfile,
+    RetryPolicy,
+)
+from aapp2face.lib.exceptions import FACeManagementException, UndefinedError
+from aapp2face.lib.hooks import phase, summarize_arg
+
+from .constants import TEST_RESPONSES_PATH
+
+
+class Trazas(ClientHook):
+    def __init__(self):
+        self.eventos = []
+
+    def before_call(self, info: CallInfo):
+        self.eventos.append(("before", info.operacion, info.intento))
+
+    def after_call(self, info: CallInfo):
+        self.eventos.append(("after", info.operacion, info.intento))
+        self.info = info
+
+    def on_error(self, info: CallInfo):
+        self.eventos.append(("error", info.operacion, type(info.error)))
+        self.info = info
+
+
+@pytest.fixture
+def trazas():
+    return Trazas()
+
+
+def test_ganchos_llamada_correcta(trazas):
+    face = FACeConnection(FACeFakeSoapClient(Path(TEST_RESPONSES_PATH), hooks=[trazas]))
+
+    face.consultar_codigo_rcf("202001017112")
+
+    assert trazas.eventos == [
+        ("before", "consultarCodigoRCF", 1),
+        ("after", "consultarCodigoRCF", 1),
+    ]
+    assert trazas.info.args == ["202001017112"]
+    assert set(trazas.info.fases) == {"network", "deserialize"}
+    assert trazas.info.recibidos > 0
+    assert trazas.info.duracion >= sum(trazas.info.fases.values())
+
+
+def test_ganchos_llamada_erronea(trazas):
+    face = FACeConnection(FACeFakeSoapClient(Path(TEST_RESPONSES_PATH), hooks=[trazas]))
+
+    with pytest.raises(FACeManagementException):
+        face.descargar_factura("1111")
+
+    assert trazas.eventos == [
+        ("before", "descargarFactura", 1),
+        ("error", "descargarFactura", FACeManagementException),
+    ]
+
+
+def test_ganchos_por_intento(trazas):
+    client = FACeFakeSoapClient(
+        Path(TEST_RESPONSES_PATH),
+        FakeProfile({"defecto": {"errores": {"001": 1}}}),
+        RetryPolicy(max_attempts=2, initial_delay=0),
+        hooks=[trazas],
+    )
+
+    with pytest.raises(UndefinedError):
+        FACeConnection(client).consultar_estados()
+
+    assert trazas.eventos == [
+        ("before", "consultarEstados", 1),
+        ("error", "consultarEstados", UndefinedError),
+        ("before", "consultarEstados", 2),
+        ("error", "consultarEstados", UndefinedError),
+    ]
+
+
+def test_fase_sin_llamada_en_curso():
+    with phase("sign"):
+        pass
+
+
+def test_resumen_argumentos():
+    assert summarize_arg("P00000010") == "P00000010"
+    assert summarize_arg("A" * 100) == "A" * 64 + "... (100 caracteres)"
+    assert summarize_arg(["1", "2"]) == "[2 elementos]"
+    assert summarize_arg({"numeroRegistro": "1", "factura": "..."}) == (
+        "{numeroRegistro, factura}"
+    )
@@ -0,0 +1,122 @@
+import base64
+import tempfile
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aapp2face.cli.main import app
+from aapp2face.lib.index import INDEX_DB_FILENAME, InvoiceIndex, datos_facturae
+from aapp2face.lib.objects import DescargaFactura, NuevaFactura
+
+from .constants import TEST_RESPONSES_PATH
+
+runner = CliRunner()
+
+FACTURA = Path("./tests/responses/sample-factura-firmada-32v1.xsig").read_bytes()
+
+
+@pytest.fixture
+def temporary_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def descarga(numero: str, contenido: bytes = FACTURA) -> DescargaFactura:
+    return DescargaFactura(
+        numero,
+        None,
+        "63.13",
+        "A82735122",
+        f"factura-{numero}.xsig",
+        base64.b64encode(contenido).decode(),
+        "application/xml",
+        [],
+    )
+
+
+def test_datos_facturae():
+    assert datos_facturae(FACTURA) == {
+        "nombre_proveedor": "Company Comp SA",
+        "fecha_expedicion": "2010-03-10",
+    }
+    assert datos_facturae(b"%PDF-1.4") == {}
+
+
+def test_datos_facturae_solo_cabecera():
+    fin_cabecera = FACTURA.index(b"</InvoiceIssueData>") + len(b"</InvoiceIssueData>")
+    bloques = iter([FACTURA[:fin_cabecera], b"<<no es XML"])
+
+    assert datos_facturae(bloques) == {
+        "nombre_proveedor": "Company Comp SA",
+        "fecha_expedicion": "2010-03-10",
+    }
+
+
+def test_indice_sin_uso_no_crea_base_datos(temporary_dir):
+    indice = InvoiceIndex(temporary_dir / INDEX_DB_FILENAME)
+    indice.commit()
+    indice.close()
+
+    assert not (temporary_dir / INDEX_DB_FILENAME).exists()
+
+
+def test_indice_buscar(temporary_dir):
+    indice = InvoiceIndex(temporary_dir / INDEX_DB_FILENAME)
+    nueva = NuevaFactura(
+        "202001020718", "P00000010", "P00000010", "P00000010", "2014-03-19 10:57:38"
+    )
+    indice.indexar("202001020718", descarga("000000B18"), nueva)
+    indice.indexar("202001020719", descarga("000000B19", b"<otra/>"))
+    indice.close()
+
+    indice = InvoiceIndex(temporary_dir / INDEX_DB_FILENAME)
+    assert [f["numero_registro"] for f in indice.buscar("Company")] == ["202001020718"]
+    assert len(indice.buscar(proveedor="A82735122")) == 2
+    assert len(indice.buscar(proveedor="comp")) == 1
+    assert indice.buscar(numero="000000B19")[0]["fecha_expedicion"] is None
+    assert len(indice.buscar(desde="2010-01-01", hasta="2010-12-31")) == 1
+    assert indice.buscar(oficina_contable="P00000010")[0]["fecha_registro"] == (
+        "2014-03-19 10:57:38"
+    )
+
+    # Una nueva descarga sin datos de registro conserva los indexados
+    indice.indexar("202001020718", descarga("000000B18-R"))
+    assert indice.buscar("000000B18*")[0]["oficina_contable"] == "P00000010"
+    assert indice.buscar("000000B18*")[0]["numero"] == "000000B18-R"
+    indice.close()
+
+
+def test_cli_buscar(temporary_dir):
+    argumentos = ["--fake-set", TEST_RESPONSES_PATH, "--download-dir", temporary_dir]
+
+    result = runner.invoke(app, argumentos + ["facturas", "descargar"])
+    assert result.exit_code == 0
+
+    result = runner.invoke(app, argumentos + ["facturas", "buscar", "B18"])
+    assert result.exit_code == 4
+    assert "No existe el índice" in result.stdout
+
+    config = Path(temporary_dir).joinpath("config.ini")
+    config.write_text("[Storage]\nindex = True\n")
+    result = runner.invoke(
+        app, ["--config", str(config)] + argumentos + ["facturas", "descargar", "-f"]
+    )
+    assert result.exit_code == 0
+
+    result = runner.invoke(
+        app, argumentos + ["facturas", "buscar", "--proveedor", "A82735122"]
+    )
+    assert result.exit_code == 0
+    assert "2 facturas encontradas" in result.stdout
+
+    result = runner.invoke(
+        app, argumentos + ["facturas", "buscar", "-o", "P00000010", "000000B19"]
+    )
+    assert result.exit_code == 0
+    assert "202001020719" in result.stdout
+    assert "1 facturas encontradas" in result.stdout
+
+    result = runner.invoke(app, argumentos + ["facturas", "buscar", '"B19'])
+    assert result.exit_code == 4
+    assert "Búsqueda no válida" in result.stdout
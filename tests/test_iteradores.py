@@ -0,0 +1,159 @@
+import types
+from pathlib import Path
+
+import pytest
+
+from aapp2face import FACeConnection, FACeFakeSoapClient
+from aapp2face.lib.exceptions import PartialResultsError
+from aapp2face.lib.objects import (
+    CambiarEstadoFactura,
+    ConsultarFactura,
+    NuevaAnulacion,
+    NuevaFactura,
+    PeticionCambiarEstadoFactura,
+    Relacion,
+)
+
+from .constants import TEST_RESPONSES_PATH
+
+
+class ClienteLotes:
+    """Conector que registra el tamaño de cada petición de listado."""
+
+    def __init__(self):
+        self.lotes = []
+
+    def consultar_listado_facturas(self, numeros_registro):
+        self.lotes.append(len(numeros_registro))
+        estado = {"codigo": "1200", "descripcion": "Registrada", "motivo": None}
+        return {
+            "facturas": {
+                "consultarListadoFacturas": [
+                    {
+                        "codigo": "0",
+                        "descripcion": "Correcto",
+                        "factura": {
+                            "numeroRegistro": numero,
+                            "tramitacion": estado,
+                            "anulacion": estado,
+                        },
+                    }
+                    for numero in numeros_registro
+                ]
+            }
+        }
+
+    def cambiar_estado_listado_facturas(self, facturas):
+        self.lotes.append(len(facturas))
+        return {
+            "facturas": {
+                "cambiarEstadoListadoFacturas": [
+                    {
+                        "codigo": "0",
+                        "descripcion": "Correcto",
+                        "factura": {
+                            "numeroRegistro": factura.numero_registro,
+                            "codigo": factura.codigo,
+                        },
+                    }
+                    for factura in facturas
+                ]
+            }
+        }
+
+
+@pytest.fixture
+def face_connection():
+    return FACeConnection(FACeFakeSoapClient(Path(TEST_RESPONSES_PATH)))
+
+
+def test_iteradores_equivalentes(face_connection):
+    for nombre, args, tipo in [
+        ("consultar_unidades", (), Relacion),
+        ("solicitar_nuevas_facturas", (), NuevaFactura),
+        ("solicitar_nuevas_anulaciones", (), NuevaAnulacion),
+    ]:
+        iterador = getattr(face_connection, f"iter_{nombre}")(*args)
+
+        assert isinstance(iterador, types.GeneratorType)
+        elementos = list(iterador)
+        assert elementos == getattr(face_connection, nombre)(*args)
+        assert all(isinstance(elemento, tipo) for elemento in elementos)
+
+
+def test_consultar_listado_por_lotes():
+    client = ClienteLotes()
+    face = FACeConnection(client)
+    numeros = (str(numero) for numero in range(1201))
+
+    iterador = face.iter_consultar_listado_facturas(numeros)
+    primera = next(iterador)
+
+    assert isinstance(primera, ConsultarFactura)
+    assert primera.numero_registro == "0"
+    assert client.lotes == [500]
+
+    resto = list(iterador)
+
+    assert len(resto) == 1200
+    assert client.lotes == [500, 500, 201]
+
+
+def test_cambiar_estado_listado_por_lotes():
+    client = ClienteLotes()
+    face = FACeConnection(client)
+    peticiones = [
+        PeticionCambiarEstadoFactura("P00000010", str(numero), "2400", "")
+        for numero in range(250)
+    ]
+
+    resultado = face.cambiar_estado_listado_facturas(peticiones)
+
+    assert client.lotes == [100, 100, 50]
+    assert len(resultado) == 250
+    assert all(isinstance(factura, CambiarEstadoFactura) for factura in resultado)
+
+
+def test_cambiar_estado_listado_resultados_parciales():
+    client = ClienteLotes()
+    cambiar = client.cambiar_estado_listado_facturas
+
+    def cambiar_con_fallo(facturas):
+        if len(client.lotes) == 2:
+            raise TimeoutError()
+        return cambiar(facturas)
+
+    client.cambiar_estado_listado_facturas = cambiar_con_fallo
+    peticiones = [
+        PeticionCambiarEstadoFactura("P00000010", str(numero), "2400", "")
+        for numero in range(250)
+    ]
+
+    with pytest.raises(PartialResultsError) as excinfo:
+        FACeConnection(client).cambiar_estado_listado_facturas(peticiones)
+
+    assert client.lotes == [100, 100]
+    assert isinstance(excinfo.value.__cause__, TimeoutError)
+    assert [factura.numero_registro for factura in excinfo.value.resultados] == [
+        str(numero) for numero in range(200)
+    ]
+
+
+def test_cambiar_estado_listado_fallo_primer_lote():
+    client = ClienteLotes()
+
+    def cambiar_con_fallo(facturas):
+        raise TimeoutError()
+
+    client.cambiar_estado_listado_facturas = cambiar_con_fallo
+    peticiones = [PeticionCambiarEstadoFactura("P00000010", "1", "2400", "")]
+
+    with pytest.raises(TimeoutError):
+        FACeConnection(client).cambiar_estado_listado_facturas(peticiones)
+
+
+def test_listado_vacio_sin_peticiones():
+    client = ClienteLotes()
+
+    assert FACeConnection(client).consultar_listado_facturas([]) == []
+    assert client.lotes == []
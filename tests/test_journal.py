@@ -0,0 +1,150 @@
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aapp2face import FACeConnection
+from aapp2face.cli.main import app
+from aapp2face.lib.journal import JOURNAL_FILENAME, DownloadJournal
+from aapp2face.lib.storage import DirectoryStore
+
+from .constants import TEST_RESPONSES_PATH
+from .helpers import md5sum
+
+runner = CliRunner()
+
+NUMERO_REGISTRO = "202001020718"
+FACTURA = "sample-factura-firmada-32v1.xsig"
+
+
+@pytest.fixture
+def temporary_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def descargar(path, journal=True):
+    config = path.joinpath("config.ini")
+    config.write_text(f"[Storage]\njournal = {journal}\n")
+    return runner.invoke(
+        app,
+        [
+            "--config",
+            str(config),
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "--download-dir",
+            str(path),
+            "facturas",
+            "descargar",
+            NUMERO_REGISTRO,
+        ],
+    )
+
+
+def test_diario_completadas(temporary_dir):
+    store = DirectoryStore(temporary_dir)
+    journal = DownloadJournal(temporary_dir)
+    journal.inicio("1")
+    archivo = store.guardar("1", "factura.xml", "PGZhY3R1cmEvPg==")
+    journal.fin("1", [archivo], {"numero_registro": "1"})
+    journal.inicio("2")
+    journal.close()
+    with open(temporary_dir.joinpath(JOURNAL_FILENAME), "a") as file:
+        file.write('{"evento": "fin", "numero_')
+
+    journal = DownloadJournal(temporary_dir)
+
+    assert journal.completada("1", verify_hash=True)
+    assert journal.datos("1") == {"numero_registro": "1"}
+    assert not journal.interrumpida("1")
+    assert journal.interrumpida("2")
+    assert not journal.completada("2")
+
+    archivo.path.write_bytes(b"<fxctura/>")
+    assert journal.completada("1")
+    assert not journal.completada("1", verify_hash=True)
+    archivo.path.write_bytes(b"<fac")
+    assert not journal.completada("1")
+
+
+def test_cli_descargar_sin_diario(temporary_dir):
+    result = descargar(temporary_dir, journal=False)
+
+    assert result.exit_code == 0
+    assert not temporary_dir.joinpath(JOURNAL_FILENAME).exists()
+
+
+def test_cli_descargar_omite_completadas(temporary_dir):
+    descargar(temporary_dir)
+
+    result = descargar(temporary_dir)
+
+    assert result.exit_code == 0
+    assert "ya existe" not in result.stdout
+    assert "0 facturas descargadas" in result.stdout
+    assert "1 facturas ya descargadas anteriormente" in result.stdout
+    assert f"Núm. Registro: {NUMERO_REGISTRO}" in result.stdout
+
+
+def test_cli_descargar_reanuda_interrumpida(temporary_dir):
+    factura = temporary_dir.joinpath(NUMERO_REGISTRO, FACTURA)
+    factura.parent.mkdir()
+    factura.write_bytes(b"<?xml")
+    temporary_dir.joinpath(JOURNAL_FILENAME).write_text(
+        json.dumps({"evento": "inicio", "numero_registro": NUMERO_REGISTRO}) + "\n"
+    )
+
+    result = descargar(temporary_dir)
+
+    assert result.exit_code == 0
+    assert "ya existe" not in result.stdout
+    assert "1 facturas descargadas" in result.stdout
+    assert md5sum(factura) == "2f1d9e07888f0e97f48f35f32e998d3b"
+    assert DownloadJournal(temporary_dir).completada(NUMERO_REGISTRO)
+
+
+def test_cli_descargar_repite_completada_danada(temporary_dir):
+    descargar(temporary_dir)
+    factura = temporary_dir.joinpath(NUMERO_REGISTRO, FACTURA)
+    factura.write_bytes(b"<?xml")
+
+    result = descargar(temporary_dir)
+
+    assert result.exit_code == 0
+    assert "ya existe" not in result.stdout
+    assert "1 facturas descargadas" in result.stdout
+    assert md5sum(factura) == "2f1d9e07888f0e97f48f35f32e998d3b"
+
+
+def test_cli_descargar_anota_antes_de_error_inesperado(temporary_dir, monkeypatch):
+    descargar_factura = FACeConnection.descargar_factura
+
+    def descargar_con_fallo(self, numero_registro):
+        if numero_registro != NUMERO_REGISTRO:
+            raise RuntimeError("Fallo inesperado")
+        return descargar_factura(self, numero_registro)
+
+    monkeypatch.setattr(FACeConnection, "descargar_factura", descargar_con_fallo)
+    config = temporary_dir.joinpath("config.ini")
+    config.write_text("[Storage]\njournal = True\n")
+    result = runner.invoke(
+        app,
+        [
+            "--config",
+            str(config),
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "--download-dir",
+            str(temporary_dir),
+            "facturas",
+            "descargar",
+            NUMERO_REGISTRO,
+            "9999",
+        ],
+    )
+
+    assert isinstance(result.exception, RuntimeError)
+    assert DownloadJournal(temporary_dir).completada(NUMERO_REGISTRO)
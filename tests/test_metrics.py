@@ -0,0 +1,125 @@
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aapp2face import FACeConnection, FACeFakeSoapClient, Metrics
+from aapp2face.cli.main import app
+from aapp2face.lib.exceptions import FACeManagementException
+
+from .constants import TEST_RESPONSES_PATH
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def temporary_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+@pytest.fixture
+def metrics():
+    return Metrics()
+
+
+@pytest.fixture
+def face_connection(metrics):
+    return FACeConnection(
+        FACeFakeSoapClient(Path(TEST_RESPONSES_PATH), hooks=[metrics])
+    )
+
+
+def test_metricas_llamadas(face_connection, metrics):
+    face_connection.consultar_estados()
+    with pytest.raises(FACeManagementException):
+        face_connection.descargar_factura("1111")
+
+    snapshot = metrics.snapshot()
+    llamadas = {
+        (serie["labels"]["operation"], serie["labels"]["result"]): serie["value"]
+        for serie in snapshot["aapp2face_face_calls_total"]
+    }
+    assert llamadas == {("consultarEstados", "ok"): 1, ("descargarFactura", "error"): 1}
+    assert snapshot["aapp2face_face_errors_total"] == [
+        {
+            "labels": {
+                "code": "502",
+                "exception": "FACeManagementException",
+                "operation": "descargarFactura",
+            },
+            "value": 1,
+        }
+    ]
+    respuestas = snapshot["aapp2face_face_response_bytes"]
+    assert sum(serie["count"] for serie in respuestas) == 2
+    assert all(serie["sum"] > 0 for serie in respuestas)
+
+
+def test_formato_prometheus(metrics):
+    metrics.record_call("consultarEstados", 0.2)
+    metrics.record_call("consultarEstados", 3)
+
+    texto = metrics.to_prometheus()
+
+    assert "# TYPE aapp2face_face_call_duration_seconds histogram" in texto
+    assert (
+        'aapp2face_face_call_duration_seconds_bucket{operation="consultarEstados",le="0.25"} 1'
+        in texto
+    )
+    assert (
+        'aapp2face_face_call_duration_seconds_bucket{operation="consultarEstados",le="+Inf"} 2'
+        in texto
+    )
+    assert (
+        'aapp2face_face_call_duration_seconds_sum{operation="consultarEstados"} 3.2'
+        in texto
+    )
+    assert (
+        'aapp2face_face_calls_total{operation="consultarEstados",result="ok"} 2.0'
+        in texto
+    )
+
+
+def test_cli_exporta_metricas(temporary_dir):
+    path = Path(temporary_dir).joinpath("metrics.json")
+
+    result = runner.invoke(
+        app,
+        ["--fake-set", TEST_RESPONSES_PATH, "--metrics-file", str(path), "estados"],
+    )
+
+    assert result.exit_code == 0
+    snapshot = json.loads(path.read_text())
+    assert snapshot["aapp2face_cli_commands_total"] == [
+        {"labels": {"command": "estados", "result": "ok"}, "value": 1}
+    ]
+    assert snapshot["aapp2face_face_calls_total"][0]["labels"] == {
+        "operation": "consultarEstados",
+        "result": "ok",
+    }
+
+
+def test_cli_metricas_subcomando_error(temporary_dir):
+    path = Path(temporary_dir).joinpath("metrics.prom")
+
+    result = runner.invoke(
+        app,
+        [
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "--metrics-file",
+            str(path),
+            "facturas",
+            "nuevas",
+            "P99999999",
+        ],
+    )
+
+    assert result.exit_code == 4
+    assert (
+        'aapp2face_cli_commands_total{command="facturas nuevas",result="error"} 1.0'
+        in path.read_text()
+    )
@@ -0,0 +1,42 @@
+import dataclasses
+from pathlib import Path
+
+import pytest
+
+from aapp2face import FACeConnection, FACeFakeSoapClient
+from aapp2face.lib.objects import ConsultarFactura, FACeItemResult, NuevaFactura
+
+from .constants import TEST_RESPONSES_PATH
+
+
+@pytest.fixture
+def face_connection():
+    return FACeConnection(FACeFakeSoapClient(Path(TEST_RESPONSES_PATH)))
+
+
+def test_objetos_sin_dict():
+    factura = NuevaFactura("1", "P00000010", "P00000010", "P00000010", "2023-01-01")
+
+    assert not hasattr(factura, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        factura.numero_registro = "2"
+
+
+def test_estados_compartidos(face_connection):
+    primera, error = face_connection.consultar_listado_facturas(
+        ["202001020718", "9999"]
+    )
+    segunda, _ = face_connection.consultar_listado_facturas(["202001020718", "9999"])
+
+    assert isinstance(primera, ConsultarFactura)
+    assert isinstance(error, FACeItemResult)
+    assert primera == segunda
+    assert primera.tramitacion is segunda.tramitacion
+    assert primera.anulacion is segunda.anulacion
+
+
+def test_codigos_internados(face_connection):
+    primera = face_connection.solicitar_nuevas_facturas()
+    segunda = face_connection.solicitar_nuevas_facturas()
+
+    assert primera[0].oficina_contable is segunda[0].oficina_contable
@@ -0,0 +1,135 @@
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from typer.testing import CliRunner
+
+from aapp2face import FACeConnection, FACeConnectionPool, FACeFakeSoapClient
+from aapp2face.cli.main import app
+from aapp2face.lib.exceptions import UnknownIdentityError
+
+from .constants import TEST_RESPONSES_PATH
+
+runner = CliRunner()
+
+
+def conexion_simulada() -> FACeConnection:
+    return FACeConnection(FACeFakeSoapClient(Path(TEST_RESPONSES_PATH)))
+
+
+class ConexionLenta:
+    """Conexión que registra el máximo de llamadas simultáneas."""
+
+    def __init__(self):
+        self.en_curso = 0
+        self.maximo = 0
+        self._lock = threading.Lock()
+
+    def consultar_estado_cesion(self, numero_registro):
+        with self._lock:
+            self.en_curso += 1
+            self.maximo = max(self.maximo, self.en_curso)
+        time.sleep(0.01)
+        with self._lock:
+            self.en_curso -= 1
+        return numero_registro
+
+
+def test_pool_enruta_por_oficina():
+    pool = FACeConnectionPool()
+    pool.add("rcf1", conexion_simulada())
+    pool.add("rcf2", conexion_simulada(), oficinas=["P99999999"])
+
+    assert pool.nombres == ["rcf1", "rcf2"]
+    assert "P00000010" in pool.oficinas("rcf1")
+    assert pool.identidad("P00000010") == "rcf1"
+    assert pool.identidad("P99999999") == "rcf2"
+    with pytest.raises(UnknownIdentityError):
+        pool.identidad("P00000099")
+    with pytest.raises(ValueError):
+        pool.add("rcf1", conexion_simulada())
+
+    facturas = pool.llamar_oficina("P00000010", "solicitar_nuevas_facturas", "")
+    assert [factura.numero_registro for factura in facturas] == [
+        "202001020718",
+        "202001020719",
+    ]
+
+
+def test_pool_en_todas():
+    pool = FACeConnectionPool()
+    pool.add("rcf1", conexion_simulada())
+    pool.add("rcf2", conexion_simulada())
+
+    resultados = list(pool.en_todas("solicitar_nuevas_facturas", ""))
+
+    assert [resultado.peticion for resultado in resultados] == ["rcf1", "rcf2"]
+    assert all(len(resultado.resultado) == 2 for resultado in resultados)
+
+
+def test_pool_limita_concurrencia_por_identidad():
+    pool = FACeConnectionPool()
+    lentas = {"rcf1": ConexionLenta(), "rcf2": ConexionLenta()}
+    pool.add("rcf1", lentas["rcf1"], oficinas=["P00000010"], max_concurrency=2)
+    pool.add("rcf2", lentas["rcf2"], oficinas=["P00000020"], max_concurrency=1)
+    peticiones = [
+        SimpleNamespace(oficina_contable=oficina, numero_registro=str(numero))
+        for numero, oficina in enumerate(["P00000010", "P00000020", "P00000030"] * 6)
+    ]
+
+    resultados = list(
+        pool.ejecutar_lote(
+            lambda conexion, peticion: conexion.consultar_estado_cesion(
+                peticion.numero_registro
+            ),
+            peticiones,
+            max_workers=8,
+        )
+    )
+
+    assert [resultado.resultado for resultado in resultados if resultado.correcto] == [
+        peticion.numero_registro
+        for peticion in peticiones
+        if peticion.oficina_contable != "P00000030"
+    ]
+    assert all(
+        isinstance(resultado.error, UnknownIdentityError)
+        for resultado in resultados
+        if resultado.peticion.oficina_contable == "P00000030"
+    )
+    assert lentas["rcf1"].maximo <= 2
+    assert lentas["rcf2"].maximo == 1
+
+
+def test_cli_nuevas_todas_las_identidades(tmp_path):
+    config = tmp_path.joinpath("config.ini")
+    config.write_text(
+        "[X509.rcf1]\ncert_file = rcf1.pem\nkey_file = rcf1.key\n\n"
+        "[X509.rcf2]\ncert_file = rcf2.pem\nkey_file = rcf2.key\n"
+        "oficinas = P99999999\nmax_concurrency = 2\n"
+    )
+    argumentos = ["--config", str(config), "--fake-set", TEST_RESPONSES_PATH]
+
+    result = runner.invoke(app, argumentos + ["facturas", "nuevas", "-a"])
+    assert result.exit_code == 0
+    assert "4 nuevas facturas disponibles" in result.stdout
+
+    # La oficina P99999999 se consulta con la identidad rcf2
+    result = runner.invoke(app, argumentos + ["facturas", "nuevas", "-a", "P99999999"])
+    assert result.exit_code == 4
+    assert "Error 411" in result.stdout
+
+    result = runner.invoke(app, argumentos + ["-i", "rcf3", "facturas", "nuevas"])
+    assert result.exit_code == 1
+    assert "No existe la identidad" in result.stdout
+
+
+def test_cli_nuevas_sin_identidades():
+    result = runner.invoke(
+        app, ["--fake-set", TEST_RESPONSES_PATH, "facturas", "nuevas", "-a"]
+    )
+
+    assert result.exit_code == 4
+    assert "No hay identidades" in result.stdout
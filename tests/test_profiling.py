@@ -0,0 +1,63 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aapp2face import FACeConnection, FACeFakeSoapClient, Profiler
+from aapp2face.cli.main import app
+from aapp2face.lib.profiling import get_profiler, section
+
+from .constants import TEST_RESPONSES_PATH
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def temporary_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+def test_perfil_fases(temporary_dir):
+    profiler = Profiler()
+    face = FACeConnection(
+        FACeFakeSoapClient(Path(TEST_RESPONSES_PATH), hooks=[profiler])
+    )
+
+    profiler.activate()
+    try:
+        factura = face.descargar_factura("202001020718")
+        factura.guardar(Path(temporary_dir))
+    finally:
+        profiler.deactivate()
+
+    resumen = profiler.summary()
+    assert {"network", "deserialize", "base64", "disk"} <= set(resumen)
+    assert resumen["disk"][0] == 1
+    assert get_profiler() is None
+
+
+def test_seccion_sin_perfilador():
+    with section("disk"):
+        pass
+
+
+def test_cli_profile(temporary_dir):
+    dump = Path(temporary_dir).joinpath("estados.prof")
+
+    result = runner.invoke(
+        app,
+        [
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "--profile-dump",
+            str(dump),
+            "estados",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert "Perfil de ejecución: estados" in result.stdout
+    assert "deserialize" in result.stdout
+    assert dump.stat().st_size > 0
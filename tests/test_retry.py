@@ -0,0 +1,119 @@
+from pathlib import Path
+
+import pytest
+import requests
+import zeep.exceptions
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from aapp2face import FACeConnection, FACeFakeSoapClient, FakeProfile, RetryPolicy
+from aapp2face.lib.exceptions import FACeManagementException, UndefinedError
+
+from .constants import TEST_RESPONSES_PATH
+
+
+def conexion(profile: dict, policy: RetryPolicy) -> FACeConnection:
+    client = FACeFakeSoapClient(Path(TEST_RESPONSES_PATH), FakeProfile(profile), policy)
+    return FACeConnection(client)
+
+
+class Reintentos:
+    def __init__(self):
+        self.avisos = []
+
+    def __call__(self, operacion, intento, exc, espera):
+        self.avisos.append((operacion, intento, type(exc)))
+
+
+def test_reintento_tras_error_transitorio():
+    avisos = Reintentos()
+    policy = RetryPolicy(initial_delay=0.1, jitter=False, on_retry=avisos)
+    face = conexion(
+        {"defecto": {"limite": {"peticiones": 1, "periodo": 0.05, "codigo": "001"}}},
+        policy,
+    )
+
+    face.consultar_estados()
+    face.consultar_estados()
+
+    assert avisos.avisos == [("consultarEstados", 1, UndefinedError)]
+
+
+def test_reintentos_agotados():
+    avisos = Reintentos()
+    policy = RetryPolicy(max_attempts=3, initial_delay=0, on_retry=avisos)
+    face = conexion({"defecto": {"errores": {"001": 1}}}, policy)
+
+    with pytest.raises(UndefinedError):
+        face.consultar_estados()
+    assert len(avisos.avisos) == 2
+
+
+def test_sin_reintento_error_gestion():
+    avisos = Reintentos()
+    policy = RetryPolicy(initial_delay=0, on_retry=avisos)
+    face = conexion({}, policy)
+
+    with pytest.raises(FACeManagementException):
+        face.descargar_factura("1111")
+    assert avisos.avisos == []
+
+
+def test_sin_reintento_operacion_no_idempotente():
+    avisos = Reintentos()
+    policy = RetryPolicy(initial_delay=0, on_retry=avisos)
+    face = conexion({"defecto": {"errores": {"001": 1}}}, policy)
+
+    with pytest.raises(UndefinedError):
+        face.confirmar_descarga_factura("P00000010", "202001020718", "1234")
+    assert avisos.avisos == []
+
+
+def test_clasificacion_errores():
+    policy = RetryPolicy()
+
+    assert policy.is_retryable("descargarFactura", TimeoutError())
+    assert policy.is_retryable("descargarFactura", requests.exceptions.ReadTimeout())
+    assert not policy.is_retryable("descargarFactura", ValueError())
+    assert not policy.is_retryable(
+        "confirmarDescargaFactura", requests.exceptions.ReadTimeout()
+    )
+    assert policy.is_retryable(
+        "confirmarDescargaFactura", requests.exceptions.ConnectTimeout()
+    )
+    assert policy.is_retryable(
+        "notificaFactura", UndefinedError("001", ""), idempotent=True
+    )
+
+
+def test_clasificacion_errores_transporte():
+    policy = RetryPolicy()
+
+    for status_code in (429, 502, 503, 504):
+        exc = zeep.exceptions.TransportError(status_code=status_code)
+        assert policy.is_retryable("descargarFactura", exc)
+    assert not policy.is_retryable(
+        "descargarFactura", zeep.exceptions.TransportError(status_code=404)
+    )
+    assert not policy.is_retryable(
+        "confirmarDescargaFactura", zeep.exceptions.TransportError(status_code=503)
+    )
+
+
+def test_clasificacion_conexion_rechazada():
+    policy = RetryPolicy()
+    rechazada = requests.exceptions.ConnectionError(
+        MaxRetryError(None, "/", NewConnectionError(None, "Connection refused"))
+    )
+    cortada = requests.exceptions.ConnectionError(
+        MaxRetryError(None, "/", ConnectionResetError())
+    )
+
+    assert policy.is_retryable("confirmarDescargaFactura", rechazada)
+    assert not policy.is_retryable("confirmarDescargaFactura", cortada)
+    assert policy.is_retryable("descargarFactura", cortada)
+
+
+def test_espera_exponencial_limitada():
+    policy = RetryPolicy(initial_delay=1, max_delay=5, multiplier=2, jitter=False)
+
+    assert [policy.delay(intento) for intento in range(1, 5)] == [1, 2, 4, 5]
@@ -0,0 +1,183 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+import requests
+import zeep.exceptions
+from lxml import etree
+from zeep.transports import Transport
+
+from aapp2face import FACeConnection, FACeSoapClient
+from aapp2face.lib import soap
+from aapp2face.lib.exceptions import UndefinedError
+
+XML_RESPONSES_PATH = Path("./tests/responses")
+WSDL = str(XML_RESPONSES_PATH.joinpath("face.wsdl"))
+
+FAULT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/">
+  <SOAP-ENV:Body>
+    <SOAP-ENV:Fault>
+      <faultcode>SOAP-ENV:Server</faultcode>
+      <faultstring>Error interno</faultstring>
+    </SOAP-ENV:Fault>
+  </SOAP-ENV:Body>
+</SOAP-ENV:Envelope>"""
+
+
+def respuesta(content: bytes, status_code: int = 200) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    response.headers["Content-Type"] = "text/xml; charset=utf-8"
+    return response
+
+
+@pytest.fixture
+def cliente_soap(tmp_path, monkeypatch):
+    """Crea clientes SOAP con el WSDL de pruebas que reciben como
+    respuesta el contenido indicado, sin conectar con FACe."""
+
+    monkeypatch.setattr(soap, "BinarySignatureTimestamp", lambda key, cert: None)
+    for nombre in ("cert.pem", "key.pem"):
+        tmp_path.joinpath(nombre).touch()
+
+    def crear(
+        response: requests.Response, fast_parse: bool, soap_logger=None
+    ) -> FACeConnection:
+        monkeypatch.setattr(
+            Transport, "post", lambda self, address, message, headers: response
+        )
+        return FACeConnection(
+            FACeSoapClient(
+                WSDL,
+                str(tmp_path.joinpath("cert.pem")),
+                str(tmp_path.joinpath("key.pem")),
+                debug=soap_logger is not None,
+                soap_logger=soap_logger,
+                fast_parse=fast_parse,
+            )
+        )
+
+    return crear
+
+
+def test_historial_por_hilo():
+    historial = soap._CallHistoryPlugin()
+    barrera = threading.Barrier(4)
+
+    def llamar(numero: int):
+        peticion = etree.fromstring(f"<peticion>{numero}</peticion>")
+        historial.egress(peticion, {}, None, {})
+        barrera.wait()
+        historial.ingress(
+            etree.fromstring(f"<respuesta>{numero}</respuesta>"), {}, None
+        )
+        barrera.wait()
+        return historial.last_sent.text, historial.last_received.text
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        resultados = list(executor.map(llamar, range(4)))
+
+    assert resultados == [(str(numero), str(numero)) for numero in range(4)]
+    assert historial.last_sent is None
+
+
+def test_conexion_unica_entre_hilos(tmp_path, monkeypatch):
+    creados = []
+
+    class Cliente:
+        def __init__(self, wsdl, plugins, wsse, transport):
+            time.sleep(0.01)
+            creados.append(wsdl)
+
+    monkeypatch.setattr(soap.zeep, "Client", Cliente)
+    monkeypatch.setattr(soap, "BinarySignatureTimestamp", lambda key, cert: None)
+    for nombre in ("cert.pem", "key.pem"):
+        tmp_path.joinpath(nombre).touch()
+    cliente = FACeSoapClient(
+        "face.wsdl",
+        str(tmp_path.joinpath("cert.pem")),
+        str(tmp_path.joinpath("key.pem")),
+        max_connections=8,
+    )
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: cliente._connect(), range(8)))
+    cliente._connect()
+
+    assert creados == ["face.wsdl"]
+
+
+@pytest.mark.parametrize(
+    "archivo, llamar",
+    [
+        (
+            "consultarListadoFacturas.xml",
+            lambda face: face.consultar_listado_facturas(["202001020718", "9999"]),
+        ),
+        ("solicitarNuevasFacturas.xml", lambda face: face.solicitar_nuevas_facturas()),
+    ],
+)
+def test_interpretacion_rapida(cliente_soap, archivo, llamar):
+    content = XML_RESPONSES_PATH.joinpath(archivo).read_bytes()
+
+    rapida = llamar(cliente_soap(respuesta(content), fast_parse=True))
+
+    assert rapida == llamar(cliente_soap(respuesta(content), fast_parse=False))
+    assert len(rapida) == 2
+
+
+@pytest.mark.parametrize("fast_parse", [True, False])
+def test_interpretacion_rapida_fault(cliente_soap, fast_parse):
+    face = cliente_soap(respuesta(FAULT, 500), fast_parse)
+
+    with pytest.raises(zeep.exceptions.Fault) as excinfo:
+        face.consultar_listado_facturas(["202001020718"])
+    assert excinfo.value.message == "Error interno"
+    assert excinfo.value.code == "SOAP-ENV:Server"
+
+
+@pytest.mark.parametrize("fast_parse", [True, False])
+def test_registro_llamada_fallida(cliente_soap, fast_parse):
+    registros = []
+
+    class Registro:
+        def sample(self):
+            return True
+
+        def log(self, nombre_metodo, args, result, sent, received, wsdl):
+            registros.append((nombre_metodo, result, sent, received))
+
+    face = cliente_soap(respuesta(FAULT, 500), fast_parse, Registro())
+
+    with pytest.raises(zeep.exceptions.Fault) as excinfo:
+        face.consultar_listado_facturas(["202001020718"])
+
+    [(nombre_metodo, result, sent, received)] = registros
+    assert nombre_metodo == "consultarListadoFacturas"
+    assert result is excinfo.value
+    assert sent is not None
+    assert received.find(".//faultstring").text == "Error interno"
+
+
+def test_interpretacion_rapida_error_http(cliente_soap):
+    face = cliente_soap(respuesta(b"<html>Service Unavailable</html", 503), True)
+
+    with pytest.raises(zeep.exceptions.TransportError) as excinfo:
+        face.solicitar_nuevas_facturas()
+    assert excinfo.value.status_code == 503
+
+
+def test_interpretacion_rapida_cabecera_resultado(cliente_soap):
+    content = (
+        XML_RESPONSES_PATH.joinpath("solicitarNuevasFacturas.xml")
+        .read_bytes()
+        .replace(b"<codigo>0</codigo>", b"<codigo>001</codigo>", 1)
+    )
+    face = cliente_soap(respuesta(content), fast_parse=True)
+
+    with pytest.raises(UndefinedError):
+        face.solicitar_nuevas_facturas()
@@ -0,0 +1,132 @@
+import base64
+import gzip
+import hashlib
+import tempfile
+from pathlib import Path
+
+import pytest
+from lxml import etree
+
+from aapp2face import SoapLogger
+from aapp2face.lib.soaplog import PayloadElider, RotatingFile
+
+
+@pytest.fixture
+def temporary_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+def envelope(texto: str) -> etree._Element:
+    elemento = etree.Element("Envelope")
+    etree.SubElement(elemento, "Body").text = texto
+    return elemento
+
+
+def test_registro_en_segundo_plano(temporary_dir):
+    logger = SoapLogger(Path(temporary_dir))
+
+    logger.log(
+        "consultarEstados",
+        ["1234"],
+        "RESULTADO",
+        envelope("peticion"),
+        envelope("respuesta"),
+        "face.wsdl",
+    )
+    logger.close()
+
+    soap = Path(temporary_dir).joinpath("soap.log").read_text(encoding="utf-8")
+    responses = (
+        Path(temporary_dir).joinpath("responses.log").read_text(encoding="utf-8")
+    )
+    assert "*** PETICIÓN ***" in soap
+    assert "<Body>peticion</Body>" in soap
+    assert "<Body>respuesta</Body>" in soap
+    assert "RESPUESTA A MÉTODO consultarEstados (ARGS: 1234)" in responses
+    assert "*** USING: face.wsdl ***" in responses
+    assert "RESULTADO" in responses
+
+
+def test_registro_descarta_con_cola_llena(temporary_dir, monkeypatch):
+    logger = SoapLogger(Path(temporary_dir), queue_size=1)
+    # Sin hilo escritor la cola no se vacía
+    monkeypatch.setattr(logger, "_start", lambda: None)
+
+    for numero in range(3):
+        logger.log("consultarEstados", [str(numero)], "", None, None, "face.wsdl")
+    assert logger.dropped == 2
+
+    monkeypatch.undo()
+    logger._start()
+    logger.close()
+
+    soap = Path(temporary_dir).joinpath("soap.log").read_text(encoding="utf-8")
+    responses = (
+        Path(temporary_dir).joinpath("responses.log").read_text(encoding="utf-8")
+    )
+    assert "*** 2 REGISTROS DESCARTADOS POR COLA LLENA ***" in soap
+    assert "(ARGS: 0)" in responses
+    assert "(ARGS: 1)" not in responses
+
+
+def test_rotacion_por_tamano_comprimida(temporary_dir):
+    path = Path(temporary_dir).joinpath("soap.log")
+    file = RotatingFile(path, max_bytes=10, backup_count=2, compress=True)
+
+    for linea in ("primera linea\n", "segunda linea\n", "tercera linea\n"):
+        file.write(linea)
+    file.close()
+
+    assert path.read_text() == "tercera linea\n"
+    with gzip.open(path.with_name("soap.log.1.gz"), "rt") as f:
+        assert f.read() == "segunda linea\n"
+    with gzip.open(path.with_name("soap.log.2.gz"), "rt") as f:
+        assert f.read() == "primera linea\n"
+
+
+def test_rotacion_conserva_maximo(temporary_dir):
+    path = Path(temporary_dir).joinpath("soap.log")
+    file = RotatingFile(path, max_bytes=1, backup_count=1)
+
+    for linea in ("a\n", "b\n", "c\n"):
+        file.write(linea)
+    file.close()
+
+    assert sorted(p.name for p in Path(temporary_dir).iterdir()) == [
+        "soap.log",
+        "soap.log.1",
+    ]
+    assert path.with_name("soap.log.1").read_text() == "b\n"
+
+
+def test_muestreo(temporary_dir):
+    assert not SoapLogger(Path(temporary_dir), sample_rate=0).sample()
+    assert SoapLogger(Path(temporary_dir), sample_rate=1).sample()
+
+
+def test_omite_contenidos_binarios(temporary_dir):
+    blob_dir = Path(temporary_dir).joinpath("blobs")
+    elider = PayloadElider(threshold=16, blob_dir=blob_dir)
+    datos = b"%PDF" + bytes(range(256)) * 4
+    digest = hashlib.sha256(datos).hexdigest()
+    sobre = envelope(base64.b64encode(datos).decode())
+
+    texto = elider.envelope(sobre)
+
+    assert f"[base64 omitido: {len(datos)} bytes, sha256={digest}]" in texto
+    assert sobre.find("Body").text == base64.b64encode(datos).decode()
+    assert blob_dir.joinpath(digest[:2], digest).read_bytes() == datos
+
+
+def test_omite_contenidos_binarios_respuesta():
+    elider = PayloadElider(threshold=16)
+    datos = bytes(100)
+
+    texto = elider.result({"factura": {"nombre": "factura.xsig", "factura": datos}})
+
+    assert "factura.xsig" in texto
+    assert (
+        f"[binario omitido: 100 bytes, sha256={hashlib.sha256(datos).hexdigest()}]"
+        in texto
+    )
@@ -0,0 +1,333 @@
+import base64
+import binascii
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aapp2face import ArchiveStore, ContentAddressedStore, DirectoryStore
+from aapp2face.cli.main import app
+from aapp2face.lib import storage
+from aapp2face.lib.journal import DownloadJournal
+from aapp2face.lib.storage import INDEX_FILENAME, MANIFEST_FILENAME
+
+from .constants import TEST_RESPONSES_PATH
+from .helpers import md5sum
+
+runner = CliRunner()
+
+ANEXO = base64.encodebytes(b"Condiciones generales\n" * 100)
+
+
+@pytest.fixture
+def temporary_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def test_almacen_directorio(temporary_dir):
+    store = DirectoryStore(temporary_dir)
+
+    path = store.guardar("202001020718", "anexo.txt", ANEXO).path
+
+    assert path == temporary_dir / "202001020718" / "anexo.txt"
+    assert path.read_bytes() == base64.b64decode(ANEXO)
+    with pytest.raises(FileExistsError):
+        store.guardar("202001020718", "anexo.txt", ANEXO)
+    store.guardar("202001020718", "anexo.txt", base64.b64encode(b"nuevo"), force=True)
+    assert path.read_bytes() == b"nuevo"
+
+
+def test_almacen_contenidos_deduplica(temporary_dir):
+    store = ContentAddressedStore(temporary_dir)
+
+    primero = store.guardar("202001020718", "condiciones.txt", ANEXO).path
+    segundo = store.guardar("202001020719", "anexo.txt", ANEXO).path
+
+    assert primero.read_bytes() == base64.b64decode(ANEXO)
+    assert primero.stat().st_ino == segundo.stat().st_ino
+    assert len(list(store.blobs.rglob("*"))) == 2
+    manifiesto = store.manifiesto("202001020719")
+    assert manifiesto["anexo.txt"]["size"] == len(base64.b64decode(ANEXO))
+    assert store.ruta("202001020719", "anexo.txt") == store.blob(
+        manifiesto["anexo.txt"]["sha256"]
+    )
+    with pytest.raises(FileExistsError):
+        store.guardar("202001020719", "anexo.txt", ANEXO)
+
+
+def test_almacen_contenidos_sin_enlaces(temporary_dir):
+    store = ContentAddressedStore(temporary_dir, hardlinks=False)
+
+    path = store.guardar("202001020718", "anexo.txt", ANEXO).path
+
+    assert path.parent.parent == store.blobs
+    assert not temporary_dir.joinpath("202001020718", "anexo.txt").exists()
+    assert store.ruta("202001020718", "anexo.txt") == path
+    with pytest.raises(FileNotFoundError):
+        store.ruta("202001020718", "otro.txt")
+
+
+def test_cli_descargar_contenidos(temporary_dir):
+    config = temporary_dir.joinpath("config.ini")
+    config.write_text("[Storage]\nmode = cas\n")
+    descargas = temporary_dir.joinpath("descargas")
+    descargas.mkdir()
+
+    result = runner.invoke(
+        app,
+        [
+            "--config",
+            str(config),
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "--download-dir",
+            str(descargas),
+            "facturas",
+            "descargar",
+            "202001020718",
+        ],
+    )
+
+    assert result.exit_code == 0
+    factura = descargas.joinpath("202001020718", "sample-factura-firmada-32v1.xsig")
+    assert md5sum(factura) == "2f1d9e07888f0e97f48f35f32e998d3b"
+    manifiesto = json.loads(
+        descargas.joinpath("202001020718", MANIFEST_FILENAME).read_text()
+    )
+    assert set(manifiesto) == {"sample-factura-firmada-32v1.xsig", "anexo_1.pdf"}
+
+
+def test_escritura_atomica_fallida(temporary_dir):
+    store = DirectoryStore(temporary_dir)
+    store.guardar("202001020718", "anexo.txt", ANEXO)
+
+    with pytest.raises(binascii.Error):
+        store.guardar("202001020718", "anexo.txt", "no es base64!", force=True)
+
+    directorio = temporary_dir.joinpath("202001020718")
+    assert [path.name for path in directorio.iterdir()] == ["anexo.txt"]
+    assert directorio.joinpath("anexo.txt").read_bytes() == base64.b64decode(ANEXO)
+
+
+def test_sincronizacion_por_lotes(temporary_dir, monkeypatch):
+    archivos = []
+    directorios = []
+    monkeypatch.setattr(os, "fsync", archivos.append)
+    monkeypatch.setattr(storage, "_fsync_dir", directorios.append)
+    store = DirectoryStore(temporary_dir, durability="batch", layout="office")
+
+    for numero in range(3):
+        store.guardar(str(numero), "anexo.txt", ANEXO, oficina_contable="P00000010")
+    store.sync()
+    store.sync()
+
+    oficina = temporary_dir.joinpath("P00000010")
+    assert len(archivos) == 3
+    assert sorted(directorios[:3]) == [oficina.joinpath(str(n)) for n in range(3)]
+    assert directorios[3:] == [oficina, temporary_dir]
+    store.guardar("3", "anexo.txt", ANEXO, oficina_contable="P00000010")
+    store.close()
+    assert len(archivos) == 4
+    assert directorios[5:] == [oficina.joinpath("3"), oficina, temporary_dir]
+
+
+def test_durabilidad_desconocida(temporary_dir):
+    with pytest.raises(ValueError):
+        DirectoryStore(temporary_dir, durability="siempre")
+
+
+def test_almacen_archivos_por_oficina(temporary_dir):
+    store = ArchiveStore(temporary_dir, group="office", durability="batch")
+
+    guardado = store.guardar(
+        "202001020718", "anexo.txt", ANEXO, oficina_contable="P00000010"
+    )
+    store.guardar("202001020719", "anexo.txt", ANEXO)
+    with pytest.raises(FileExistsError):
+        store.guardar("202001020718", "anexo.txt", ANEXO, oficina_contable="P00000010")
+
+    assert not temporary_dir.joinpath(INDEX_FILENAME).exists()
+    with store.abrir("202001020718", "anexo.txt") as file:
+        assert file.read() == base64.b64decode(ANEXO)
+    volumen = temporary_dir / "P00000010" / "000001.zip"
+    assert guardado.path == volumen / "202001020718" / "anexo.txt"
+    assert zipfile.ZipFile(volumen).namelist() == ["202001020718/anexo.txt"]
+    assert temporary_dir.joinpath("sin_oficina", "000001.zip").exists()
+    assert store.verificar(guardado, verify_hash=True)
+
+    # Los volúmenes cerrados no se modifican
+    store.guardar(
+        "202001020718",
+        "anexo.txt",
+        base64.b64encode(b"nuevo"),
+        force=True,
+        oficina_contable="P00000010",
+    )
+    store.close()
+    with ArchiveStore(temporary_dir, group="office").abrir(
+        "202001020718", "anexo.txt"
+    ) as file:
+        assert file.read() == b"nuevo"
+    assert temporary_dir.joinpath("P00000010", "000002.zip").exists()
+    assert not store.verificar(guardado)
+
+
+def test_almacen_archivos_tamano_maximo(temporary_dir):
+    store = ArchiveStore(temporary_dir, max_bytes=1)
+
+    for numero in range(3):
+        store.guardar(str(numero), "anexo.txt", ANEXO)
+    store.close()
+
+    assert len(list(temporary_dir.rglob("*.zip"))) == 3
+    with store.abrir("2", "anexo.txt") as file:
+        assert file.read() == base64.b64decode(ANEXO)
+    with pytest.raises(FileNotFoundError):
+        store.abrir("3", "anexo.txt")
+
+
+def test_almacen_archivos_volumen_interrumpido(temporary_dir):
+    store = ArchiveStore(temporary_dir)
+    store.guardar("202001020718", "anexo.txt", ANEXO)
+    # Simula una interrupción sin cerrar el volumen ni anotar el índice
+    volumen = next(temporary_dir.rglob("*.zip"))
+
+    store = ArchiveStore(temporary_dir)
+    store.guardar("202001020718", "anexo.txt", ANEXO)
+    store.close()
+
+    with store.abrir("202001020718", "anexo.txt") as file:
+        assert file.read() == base64.b64decode(ANEXO)
+    assert volumen.with_name("000002.zip").exists()
+
+
+def test_almacen_archivos_por_dia_de_registro(temporary_dir):
+    store = ArchiveStore(temporary_dir)
+    store.guardar(
+        "202001020718", "anexo.txt", ANEXO, fecha_registro="2014-03-19 10:00:00"
+    )
+    store.close()
+
+    assert temporary_dir.joinpath("2014-03-19", "000001.zip").exists()
+    store = ArchiveStore(temporary_dir)
+    file = store.abrir("202001020718", "anexo.txt")
+    # El volumen permanece abierto mientras se lee el archivo
+    assert file.read(10) == base64.b64decode(ANEXO)[:10]
+    assert file.read() == base64.b64decode(ANEXO)[10:]
+    file.close()
+    assert file.closed
+
+
+def test_cli_descargar_archivos(temporary_dir):
+    config = temporary_dir.joinpath("config.ini")
+    config.write_text("[Storage]\nmode = archive\njournal = True\n")
+    descargas = temporary_dir.joinpath("descargas")
+    descargas.mkdir()
+    argumentos = [
+        "--config",
+        str(config),
+        "--fake-set",
+        TEST_RESPONSES_PATH,
+        "--download-dir",
+        str(descargas),
+        "facturas",
+        "descargar",
+        "202001020718",
+    ]
+
+    result = runner.invoke(app, argumentos)
+
+    assert result.exit_code == 0
+    store = ArchiveStore(descargas)
+    with store.abrir("202001020718", "sample-factura-firmada-32v1.xsig") as file:
+        assert (
+            hashlib.md5(file.read()).hexdigest() == "2f1d9e07888f0e97f48f35f32e998d3b"
+        )
+    assert DownloadJournal(descargas, store).completada(
+        "202001020718", verify_hash=True
+    )
+
+    result = runner.invoke(app, argumentos)
+
+    assert result.exit_code == 0
+    assert "ya descargadas anteriormente" in result.stdout
+    assert len(list(descargas.rglob("*.zip"))) == 1
+
+
+@pytest.mark.parametrize(
+    "layout, relativo",
+    [
+        ("flat", "202001020718"),
+        ("date", "2014/03/19/202001020718"),
+        ("office", "P00000010/202001020718"),
+        ("hash", "bc/2f/202001020718"),
+    ],
+)
+def test_almacen_directorio_repartido(temporary_dir, layout, relativo):
+    store = DirectoryStore(temporary_dir, layout=layout)
+
+    path = store.guardar(
+        "202001020718",
+        "anexo.txt",
+        ANEXO,
+        oficina_contable="P00000010",
+        fecha_registro="2014-03-19 10:57:38",
+    ).path
+
+    assert path == temporary_dir / relativo / "anexo.txt"
+    assert store.localizar("202001020718") == path.parent
+    assert store.localizar("202001020719") is None
+
+
+def test_almacen_directorio_repartido_sin_datos(temporary_dir):
+    store = DirectoryStore(temporary_dir, layout="date")
+
+    path = store.guardar("202001020718", "anexo.txt", ANEXO).path
+
+    assert path.parent == temporary_dir / "sin_fecha" / "202001020718"
+    assert store.localizar("202001020718") == path.parent
+    with pytest.raises(ValueError):
+        DirectoryStore(temporary_dir, layout="alfabetico")
+
+
+def test_almacen_contenidos_repartido(temporary_dir):
+    store = ContentAddressedStore(temporary_dir, layout="office")
+
+    store.guardar("202001020718", "anexo.txt", ANEXO, oficina_contable="P00000010")
+
+    assert temporary_dir.joinpath("P00000010", "202001020718", "anexo.txt").exists()
+    assert set(store.manifiesto("202001020718")) == {"anexo.txt"}
+    assert store.ruta("202001020718", "anexo.txt").parent.parent == store.blobs
+
+
+def test_cli_descargar_repartido(temporary_dir):
+    config = temporary_dir.joinpath("config.ini")
+    config.write_text("[Storage]\nlayout = date\n")
+    descargas = temporary_dir.joinpath("descargas")
+    descargas.mkdir()
+
+    result = runner.invoke(
+        app,
+        [
+            "--config",
+            str(config),
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "--download-dir",
+            str(descargas),
+            "facturas",
+            "descargar",
+        ],
+    )
+
+    assert result.exit_code == 0
+    factura = descargas.joinpath(
+        "2014", "03", "19", "202001020718", "sample-factura-firmada-32v1.xsig"
+    )
+    assert md5sum(factura) == "2f1d9e07888f0e97f48f35f32e998d3b"
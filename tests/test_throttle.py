@@ -0,0 +1,133 @@
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from aapp2face import (
+    CircuitBreaker,
+    FACeConnection,
+    FACeFakeSoapClient,
+    FakeProfile,
+    RateLimiter,
+)
+from aapp2face.lib.exceptions import (
+    CircuitOpenError,
+    FACeManagementException,
+    UndefinedError,
+)
+from aapp2face.lib.throttle import SharedTokenBucket, TokenBucket
+
+from .constants import TEST_RESPONSES_PATH
+
+
+@pytest.fixture
+def temporary_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield tmpdir
+
+
+def test_token_bucket_limita_ritmo():
+    bucket = TokenBucket(rate=20, capacity=1)
+
+    inicio = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - inicio >= 0.09
+
+
+def test_token_bucket_compartido(temporary_dir):
+    path = Path(temporary_dir).joinpath("bucket")
+    primero = SharedTokenBucket(path, rate=20, capacity=1)
+    segundo = SharedTokenBucket(path, rate=20, capacity=1)
+
+    assert primero.acquire() == 0
+    assert segundo.acquire() > 0
+
+
+def test_rate_limiter_por_operacion():
+    limiter = RateLimiter(operation_rates={"descargarFactura": 20})
+
+    assert limiter.acquire("consultarEstados") == 0
+    assert limiter.acquire("consultarEstados") == 0
+    assert limiter.acquire("descargarFactura") == 0
+    assert limiter.acquire("DESCARGARFACTURA") > 0
+
+
+def test_circuit_breaker_abre_tras_fallos():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client = FACeFakeSoapClient(
+        Path(TEST_RESPONSES_PATH),
+        FakeProfile({"defecto": {"errores": {"001": 1}}}),
+        circuit_breaker=breaker,
+    )
+    face = FACeConnection(client)
+
+    for _ in range(2):
+        with pytest.raises(UndefinedError):
+            face.consultar_estados()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        face.consultar_estados()
+
+
+def test_circuit_breaker_ignora_errores_gestion():
+    breaker = CircuitBreaker(failure_threshold=1)
+    face = FACeConnection(
+        FACeFakeSoapClient(Path(TEST_RESPONSES_PATH), circuit_breaker=breaker)
+    )
+
+    with pytest.raises(FACeManagementException):
+        face.descargar_factura("1111")
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker_cierra_tras_prueba():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure(TimeoutError())
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.05)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker_prueba_con_error_gestion():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure(TimeoutError())
+    breaker.record_failure(ValueError())
+    breaker.record_failure(TimeoutError())
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.05)
+    assert breaker.before_call()
+    breaker.record_failure(FACeManagementException("511", ""))
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    time.sleep(0.05)
+    assert breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_circuit_breaker_prueba_interrumpida():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    client = FACeFakeSoapClient(Path(TEST_RESPONSES_PATH), circuit_breaker=breaker)
+    breaker.record_failure(TimeoutError())
+    time.sleep(0.05)
+
+    def interrumpir():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        client._invocar("consultarEstados", interrumpir)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,161 @@
+import base64
+import tempfile
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from aapp2face.cli.main import app
+from aapp2face.lib.validation import FacturaeValidator, validar_facturae
+
+from .constants import TEST_RESPONSES_PATH
+
+runner = CliRunner()
+
+FACTURA = Path("./tests/responses/sample-factura-firmada-32v1.xsig").read_bytes()
+
+# Esquemas reducidos con la estructura de primer nivel de Facturae 3.2
+FACTURAE_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    xmlns:fe="http://www.facturae.es/Facturae/2009/v3.2/Facturae"
+    xmlns:ds="http://www.w3.org/2000/09/xmldsig#"
+    targetNamespace="http://www.facturae.es/Facturae/2009/v3.2/Facturae">
+  <xs:import namespace="http://www.w3.org/2000/09/xmldsig#"
+      schemaLocation="http://www.w3.org/TR/xmldsig-core/xmldsig-core-schema.xsd"/>
+  <xs:complexType name="Libre">
+    <xs:sequence>
+      <xs:any processContents="skip" minOccurs="0" maxOccurs="unbounded"/>
+    </xs:sequence>
+  </xs:complexType>
+  <xs:element name="Facturae">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="FileHeader" type="fe:Libre"/>
+        <xs:element name="Parties" type="fe:Libre"/>
+        <xs:element name="Invoices" type="fe:Libre"/>
+        <xs:element ref="ds:Signature" minOccurs="0"/>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+XMLDSIG_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    targetNamespace="http://www.w3.org/2000/09/xmldsig#">
+  <xs:element name="Signature">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:any processContents="skip" minOccurs="0" maxOccurs="unbounded"/>
+      </xs:sequence>
+      <xs:anyAttribute processContents="skip"/>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+
+@pytest.fixture
+def schema_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        path.joinpath("Facturaev3_2.xsd").write_text(FACTURAE_XSD)
+        path.joinpath("xmldsig-core-schema.xsd").write_text(XMLDSIG_XSD)
+        yield path
+
+
+def test_validar_facturae(schema_dir):
+    assert validar_facturae(FACTURA, schema_dir, verify_signature=False) == ("3.2", [])
+
+
+def test_validar_facturae_errores(schema_dir):
+    sin_partes = FACTURA.replace(b"<Parties>", b"<Partes>").replace(
+        b"</Parties>", b"</Partes>"
+    )
+
+    version, errores = validar_facturae(sin_partes, schema_dir, verify_signature=False)
+
+    assert version == "3.2"
+    assert len(errores) == 1 and "Partes" in errores[0]
+    assert validar_facturae(b"<Facturae>", schema_dir)[1][0].startswith(
+        "XML mal formado"
+    )
+    assert validar_facturae(b"<Facturae/>", schema_dir) == (
+        None,
+        ["Versión de Facturae no reconocida: None"],
+    )
+    schema_dir.joinpath("Facturaev3_2.xsd").unlink()
+    assert validar_facturae(FACTURA, schema_dir)[1][0].startswith(
+        "No se encuentra el esquema"
+    )
+
+
+def test_validar_facturae_firma(schema_dir):
+    pytest.importorskip("xmlsec")
+
+    assert validar_facturae(FACTURA, schema_dir) == ("3.2", [])
+    manipulada = FACTURA.replace(b"<TotalAmount>63.13", b"<TotalAmount>63.14", 1)
+    assert validar_facturae(manipulada, schema_dir)[1][0].startswith("Firma no válida")
+
+
+def test_validador_procesos(schema_dir):
+    with FacturaeValidator(
+        schema_dir, verify_signature=False, max_workers=2
+    ) as validator:
+        validator.enviar("202001020718", base64.b64encode(FACTURA))
+        validator.enviar("202001020719", base64.b64encode(b"<Facturae/>").decode())
+        resultados = validator.resultados()
+
+    assert [resultado.numero_registro for resultado in resultados] == [
+        "202001020718",
+        "202001020719",
+    ]
+    assert resultados[0].valida and resultados[0].version == "3.2"
+    assert not resultados[1].valida
+
+
+def test_validador_cierra_tras_error(schema_dir):
+    with pytest.raises(RuntimeError):
+        with FacturaeValidator(schema_dir, max_workers=1) as validator:
+            raise RuntimeError()
+
+    with pytest.raises(RuntimeError):
+        validator.enviar("202001020718", base64.b64encode(FACTURA))
+
+
+def test_cli_descargar_validando(schema_dir):
+    config = schema_dir.joinpath("config.ini")
+    config.write_text(
+        f"[Validation]\nschema_dir = {schema_dir}\nverify_signature = False\nworkers = 1\n"
+    )
+    descargas = schema_dir.joinpath("descargas")
+    descargas.mkdir()
+
+    result = runner.invoke(
+        app,
+        [
+            "--config",
+            str(config),
+            "--fake-set",
+            TEST_RESPONSES_PATH,
+            "--download-dir",
+            str(descargas),
+            "facturas",
+            "descargar",
+            "--validate",
+            "202001020718",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert "0 facturas no superan la validación" in result.stdout
+
+
+def test_cli_descargar_validando_sin_esquemas():
+    result = runner.invoke(
+        app,
+        ["--fake-set", TEST_RESPONSES_PATH, "facturas", "descargar", "--validate"],
+    )
+
+    assert result.exit_code == 4
+    assert "No se ha configurado el directorio de esquemas" in result.stdout